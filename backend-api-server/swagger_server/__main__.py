@@ -9,11 +9,17 @@ import argparse
 from datetime import datetime
 from swagger_server import encoder
 import swagger_server.mal2.db.handler.db_handler as db_handler
+import swagger_server.mal2.db.handler.db_engine as db_engine
 import swagger_server.mal2.db.handler.db_blacklist_handler as db_blacklist_handler
 import swagger_server.mal2.db.handler.db_greylist_handler as db_greylist_handler
 import swagger_server.mal2.db.handler.db_ignorelist_handler as db_ignorelist_handler
 import swagger_server.mal2.db.handler.db_whitelist_handler as db_whitelist_handler
+import swagger_server.mal2.sources.source_fetch as source_fetch
 import swagger_server.mal2.crypto.crypto_handler as crypto_handler
+import swagger_server.mal2.jobs.analysis_job_queue as analysis_job_queue
+import swagger_server.mal2.verify.model_registry as model_registry
+import swagger_server.mal2.cache.domain_index as domain_index
+import swagger_server.mal2.controller.mal2_default_controler as mal2_controller
 import swagger_server.mal2.common.common_utils as utils
 from swagger_server import logger_config as log
 
@@ -27,47 +33,74 @@ dataLock = threading.Lock()
 data_import_thread = threading.Thread()
 cleanup_thread = threading.Thread()
 
-def start_app(re_init_db=False, use_ssl=False):
+def start_app(re_init_db=False, use_ssl=False, force_import=False):
     
-    def import_data():
-        """Imports whitelist, blacklist and ignorelist data if required
+    def import_data(force=False):
+        """Imports whitelist, blacklist and ignorelist data if required - remote sources unchanged since the last import are skipped
+        unless forced
         """
-        #re-import new ignorelist entries
-        if db_ignorelist_handler.check_reimport_required() == True:
-            db_ignorelist_handler.import_ignorelists()
-        #re-import new greylist entries
-        if db_greylist_handler.check_reimport_required() == True:
-            db_greylist_handler.import_greylists()
-        #re-import new blacklists entries
-        if db_blacklist_handler.check_reimport_required() == True:
-            db_blacklist_handler.import_blacklists()
-        #re-import new whitelists entries
-        if db_whitelist_handler.check_reimport_required() == True:
-            db_whitelist_handler.import_whitelists()
+        #lists due for re-import in import order: ignorelist, greylist, blacklist, whitelist
+        handlers = [handler for handler in [db_ignorelist_handler, db_greylist_handler, db_blacklist_handler, db_whitelist_handler]
+            if handler.check_reimport_required() == True]
+        if not handlers:
+            return
+        #fetch stage - all sources of all due lists concurrently, outside the dataLock as no db access is involved
+        fetched = source_fetch.fetch([source for handler in handlers for source in handler.get_sources()], force=force)
+        #write stage
+        with dataLock:
+            failed = []
+            if db_ignorelist_handler in handlers and not db_ignorelist_handler.import_ignorelists(fetched):
+                failed.append("ignorelist")
+            if db_greylist_handler in handlers and not db_greylist_handler.import_greylists(fetched):
+                failed.append("greylist")
+            if db_blacklist_handler in handlers and not db_blacklist_handler.import_blacklists(fetched):
+                failed.append("blacklist")
+            if db_whitelist_handler in handlers and not db_whitelist_handler.import_whitelists(fetched):
+                failed.append("whitelist")
+            if failed:
+                #the best entries of the failed lists were not refreshed - keep serving the previous snapshots and domain set
+                log.mal2_rest_log.error("import failed for %s - skipped re-rendering the lists",", ".join(failed))
+                return
+            #read the just imported entries from the primary - replicas may still lag behind
+            with db_handler.primary_reads():
+                #swap in the new list memberships
+                domain_index.rebuild()
+                #render the full lists once for all downloads
+                mal2_controller.render_list_snapshots()
+                #and the domain set for classifying sites on the client
+                mal2_controller.render_domain_set()
 
     #second thread for handling db blacklist import every x hours
     def dataImportThread_interrupt():
         global data_import_thread
         data_import_thread.cancel()
 
-    def dataImportThread_check_for_data():
+    def dataImportThread_check_for_data(force=False):
         """rechecks every POOL_TIME if data import is required
         """
         global commonDataStruct
         global data_import_thread
-        with dataLock:
-            #FIXME Do your stuff with commonDataStruct here (currently no data lock)
-            import_data()
+        #fetches outside and writes within the dataLock
+        import_data(force)
+        try:
+            #pick up updated mal2-model package files without restart
+            model_registry.reload_if_changed()
+        except Exception as e:
+            log.mal2_rest_log.error("reloading mal2-models error: %s",str(e))
 
         # Set the next thread to happen
         data_import_thread = threading.Timer(POOL_TIME, dataImportThread_check_for_data, ())
         data_import_thread.start()   
 
-    def dataImportThread_start(re_init_db):
+    def dataImportThread_start(re_init_db, force_import):
         # Do initialisation stuff here
         global data_import_thread
         #skip initial import of data if re-init db is false or data already exists
-        if re_init_db == True or db_handler.check_db_data_exists()== False:
+        if force_import == True:
+            log.mal2_rest_log.debug("forced re-import of all sources schedued to stark in 5 seconds")
+            #re-import unchanged sources as well e.g. after the import logic changed
+            data_import_thread = threading.Timer(5, dataImportThread_check_for_data, (True,))
+        elif re_init_db == True or db_handler.check_db_data_exists()== False:
             log.mal2_rest_log.debug("re-import of data schedued to stark in 5 seconds")
             # Create your thread - trigger initial import 5 sec after launching thread
             data_import_thread = threading.Timer(5, dataImportThread_check_for_data, ())
@@ -109,6 +142,8 @@ def start_app(re_init_db=False, use_ssl=False):
             log.check_and_throw_away_logs()
             #persist prediction data
             db_handler.export_db_predictions_to_disc()
+            #dispose finished analysis jobs
+            analysis_job_queue.cleanup_finished_jobs()
 
         # Set the next thread to happen
         cleanup_thread = threading.Timer(POOL_TIME2, cleanupThread_check_for_data_to_dispose, ())
@@ -123,7 +158,7 @@ def start_app(re_init_db=False, use_ssl=False):
             #close db connection
             log.mal2_rest_log.info("dispose db engine")
             db_handler.Session.close()
-            db_handler.engine.dispose()
+            db_engine.dispose()
         except Exception as e:
             log.mal2_rest_log.error("close_and_cleanup close db error: %s",str(e))
         try:
@@ -133,6 +168,12 @@ def start_app(re_init_db=False, use_ssl=False):
             utils.nukedir_recursively(verify_output_dir)
         except Exception as e:
             log.mal2_rest_log.error("close_and_cleanup nuke verify_output_dir error: %s",str(e))
+        try:
+            #stop analysis job workers (unfinished jobs are resumed on next start)
+            log.mal2_rest_log.info("stop analysis job workers")
+            analysis_job_queue.stop_workers()
+        except Exception as e:
+            log.mal2_rest_log.error("close_and_cleanup stopping analysis job workers error: %s",str(e))
         try:    
             #shutdown data import thread
             log.mal2_rest_log.info("interrupt data import thread")
@@ -149,8 +190,8 @@ def start_app(re_init_db=False, use_ssl=False):
     app = connexion.App(__name__, specification_dir='./swagger/')
     app.app.json_encoder = encoder.JSONEncoder
     app.add_api('swagger.yaml', arguments={'title': 'Fake-Shop Detector API'})
-    # add CORS support to send Access-Control-Allow-Origin header
-    CORS(app.app)
+    # add CORS support to send Access-Control-Allow-Origin header - expose the pagination and analysis job headers to browser clients
+    CORS(app.app, expose_headers=["Link", "Location", "ETag", "X-List-Version", "Retry-After"])
 
     #Register cleanup function when the Ctr+C command is received 
     atexit.register(close_and_cleanup)
@@ -161,10 +202,20 @@ def start_app(re_init_db=False, use_ssl=False):
         crypto_handler.initKeys()
         #setup database
         db_handler.initDb(re_init_db)
+        #load the mal2-models and vectorizers once
+        model_registry.preload()
+        with db_handler.primary_reads():
+            #build the in-memory domain index from the existing list entries
+            domain_index.rebuild()
+            #render the full lists from the existing list entries
+            mal2_controller.render_list_snapshots()
+            mal2_controller.render_domain_set()
         # Initiate data re-import check thread for blacklist/whitelist data
-        dataImportThread_start(re_init_db)
+        dataImportThread_start(re_init_db, force_import)
         #Initiate data cleanup thread
         cleanupThread_start(re_init_db)
+        #Initiate analysis job workers - resumes queued jobs
+        analysis_job_queue.start_workers(mal2_controller.process_analysis_job)
 
         if(use_ssl):
             app.run(port=8080, debug=False, ssl_context=(crypto_handler.sslkeys_loc+"cert.pem",crypto_handler.sslkeys_loc+"privkey.pem"), threaded=True)
@@ -183,7 +234,8 @@ if __name__ == '__main__':
     Args = argparse.ArgumentParser(description="rest-api server for mal2-eCommerce Fake-Shop detection plugin")
     Args.add_argument("--re-init-db", default=False, action="store_true", dest='reinit_db', help="Set flag if you want to start fresh i.e. re-init the db schema + re-import csv data")
     Args.add_argument("--use-ssl", default=False, action="store_true", dest='use_ssl', help="Set flag if you want to enable self-signed ssl")
+    Args.add_argument("--force-import", default=False, action="store_true", dest='force_import', help="Set flag if you want to re-import all list sources on startup even if unchanged since the last import")
     args = Args.parse_args()
 
     #to start with fresh db call 'python -m swagger_server --re-init-db'
-    start_app(args.reinit_db, args.use_ssl)
\ No newline at end of file
+    start_app(args.reinit_db, args.use_ssl, args.force_import)
\ No newline at end of file
@@ -13,6 +13,7 @@ import swagger_server.mal2.db.handler.db_handler as db
 import swagger_server.mal2.db.model.db_model as db_model
 from swagger_server import logger_config as log
 import swagger_server.mal2.controller.mal2_default_controler as mal2_controller
+import swagger_server.mal2.common.admission as admission
 from flask import Response
 
 
@@ -47,6 +48,9 @@ def reanalyze_post(site):  # noqa: E501
         #forward to mal2_controller
         try:
             ret = mal2_controller.analyze_post(site)
+        except admission.AdmissionRejected as e:
+            log.mal2_rest_log.info("reanalyse_post rejected: "+str(e))
+            return admission.rejected_response(e)
         except Exception as e:
             log.mal2_rest_log.exception("analyse_post exception: "+str(e))
             res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
@@ -2,10 +2,12 @@ import connexion
 import six
 
 #swagger web modules
+from swagger_server.models.analysis_job import AnalysisJob  # noqa: E501
 from swagger_server.models.black_list_entry import BlackListEntry  # noqa: E501
 from swagger_server.models.grey_list_entry import GreyListEntry  # noqa: E501
 from swagger_server.models.ignore_list_entry import IgnoreListEntry  # noqa: E501
 from swagger_server.models.inline_response400 import InlineResponse400  # noqa: E501
+from swagger_server.models.list_changes import ListChanges  # noqa: E501
 from swagger_server.models.site import Site  # noqa: E501
 from swagger_server.models.site_analysis_result import SiteAnalysisResult  # noqa: E501
 from swagger_server.models.white_list_entry import WhiteListEntry  # noqa: E501
@@ -17,16 +19,20 @@ import swagger_server.mal2.db.handler.db_handler as db
 import swagger_server.mal2.db.model.db_model as db_model
 from swagger_server import logger_config as log
 import swagger_server.mal2.controller.mal2_default_controler as mal2_controller
+import swagger_server.mal2.common.admission as admission
 from flask import Response
 
 
-def analyze_post(body):  # noqa: E501
+
+def analyze_post(body, respond_async=None):  # noqa: E501
     """request Fake-Score analysis result of a given site
 
     returns the Fake-Score Analysis of a given site, either mal2_ai prediction or Whitelist/Blacklist entry # noqa: E501
 
     :param body: site and parameter configuration on which to run analysis on
     :type body: dict | bytes
+    :param respond_async: opt-in asynchronous mode - sites that require a mal2_ai prediction are enqueued as analysis job
+    :type respond_async: bool
 
     :rtype: SiteAnalysisResult
     """
@@ -53,7 +59,10 @@ def analyze_post(body):  # noqa: E501
         log.mal2_rest_log.info("analyse_post for: site_base_url: "+body.site_base_url+" clientID: "+body.client_id+" re_process: "+str(body.re_process))
         #forward to mal2_controller
         try:
-            ret = mal2_controller.analyze_post(body)
+            ret = mal2_controller.analyze_post(body, respond_async=respond_async==True)
+        except admission.AdmissionRejected as e:
+            log.mal2_rest_log.info("analyse_post rejected: "+str(e))
+            return admission.rejected_response(e)
         except Exception as e:
             log.mal2_rest_log.exception("analyse_post exception: "+str(e))
             res_body ='{"detail": "'+str(e)+'","status": 400, "title": "analyze error","type": "about:blank"}'
@@ -62,11 +71,97 @@ def analyze_post(body):  # noqa: E501
             #remove db session (and auto-create new Session)
             log.mal2_rest_log.debug("removing db session %s",db.Session)
             db.Session.remove()
+
+        if isinstance(ret, tuple) and ret[1] == 202:
+            #analysis job was enqueued - point the client to the job's result
+            job = ret[0]
+            log.mal2_rest_log.info("returning analyse_post enqueued job: %s",job)
+            return job, 202, {"Location": connexion.request.base_url+"/"+job.job_id}
         
     log.mal2_rest_log.info("returning analyse_post results: %s",ret)
     return ret
 
-def blacklist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E501
+def analyze_batch_post(body):  # noqa: E501
+    """request Fake-Score analysis results of multiple sites
+
+    returns the Fake-Score Analysis of multiple sites within one request, either mal2_ai prediction or Whitelist/Blacklist entry per site # noqa: E501
+
+    :param body: list of sites on which to run analysis on
+    :type body: list | bytes
+
+    :rtype: List[SiteAnalysisResult]
+    """
+
+    #init empty return object
+    ret = []
+
+    if connexion.request.is_json:
+        #params passed in JSON structure
+        try:
+            body = [Site.from_dict(d) for d in connexion.request.get_json()]  # noqa: E501
+        except ValueError as e:
+            log.mal2_rest_log.info("analyze_batch_post invalid parameter request: "+str(e))
+            res_body ='{"detail": "'+str(e)+'","status": 400, "title": "Bad Request","type": "about:blank"}'
+            return Response(res_body,status=400,)
+
+        #for re-analysis use expert_controller REST endpoint
+        for site in body:
+            site.re_process=False
+
+        #forward to mal2_controller
+        try:
+            ret = mal2_controller.analyze_batch_post(body)
+        except admission.AdmissionRejected as e:
+            log.mal2_rest_log.info("analyze_batch_post rejected: "+str(e))
+            return admission.rejected_response(e)
+        except Exception as e:
+            log.mal2_rest_log.exception("analyze_batch_post exception: "+str(e))
+            res_body ='{"detail": "'+str(e)+'","status": 400, "title": "analyze error","type": "about:blank"}'
+            return Response(res_body,status=400,)
+        finally:
+            #remove db session (and auto-create new Session)
+            log.mal2_rest_log.debug("removing db session %s",db.Session)
+            db.Session.remove()
+
+    log.mal2_rest_log.info("returning analyze_batch_post results for %s sites",len(ret))
+    return ret
+
+def analyze_job_id_get(job_id, wait=None, client_id=None):  # noqa: E501
+    """returns the status and result of an asynchronous analysis job
+
+    returns the status and - once completed - the Fake-Score analysis result of an analysis job as returned by /analyze with respond_async # noqa: E501
+
+    :param job_id: requested job_id as returned by /analyze
+    :type job_id: str
+    :param wait: long polling - max seconds to wait for the job to complete
+    :type wait: int
+    :param client_id: client ID for debugging purposes on server
+    :type client_id: str
+
+    :rtype: AnalysisJob
+    """
+    #init empty return object
+    ret = AnalysisJob()
+    try:
+        ret = mal2_controller.analyze_job_id_get(job_id, wait, client_id)
+    except LookupError as e:
+        log.mal2_rest_log.info("analyze_job_id_get unknown job: "+str(job_id))
+        res_body ='{"detail": "'+str(e)+'","status": 404, "title": "Not Found","type": "about:blank"}'
+        return Response(res_body,status=404,)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("analyze_job_id_get rejected: "+str(e))
+        return admission.rejected_response(e)
+    except Exception as e:
+        log.mal2_rest_log.exception("analyze_job_id_get exception: "+str(e))
+        res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
+        return Response(res_body,status=400,)
+    finally:
+        #remove db session (and auto-create new Session)
+        log.mal2_rest_log.debug("removing db session %s",db.Session)
+        db.Session.remove()
+    return ret
+
+def blacklist_get(limit=None, offset=None, all=None, client_id=None, cursor=None):  # noqa: E501
     """returns all blacklisted shops
 
     Returns a list of all blacklisted and confirmed fake-shops # noqa: E501
@@ -79,6 +174,8 @@ def blacklist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E
     :type all: bool
     :param client_id: client ID for debugging purposes on server
     :type client_id: str
+    :param cursor: opaque token of the next page as returned in the Link header - continues after the last entry of the previous page
+    :type cursor: str
 
     :rtype: List[BlackListEntry]
     """
@@ -86,7 +183,10 @@ def blacklist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E
     ret = []
     
     try:
-        ret = mal2_controller.blacklist_get(limit,offset,all,client_id)
+        ret = mal2_controller.blacklist_get(limit,offset,all,client_id,cursor)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("blacklist_get rejected: "+str(e))
+        return admission.rejected_response(e)
     except Exception as e:
         log.mal2_rest_log.exception("blacklist_get exception: "+str(e))
         res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
@@ -114,6 +214,9 @@ def blacklist_site_id_get(site_id, client_id=None):  # noqa: E501
     ret = BlackListEntry()
     try:
         ret = mal2_controller.blacklist_site_id_get(site_id, client_id)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("blacklist_site_id_get rejected: "+str(e))
+        return admission.rejected_response(e)
     except Exception as e:
         log.mal2_rest_log.exception("blacklist_site_id_get exception: "+str(e))
         res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
@@ -124,8 +227,39 @@ def blacklist_site_id_get(site_id, client_id=None):  # noqa: E501
         db.Session.remove()
     return ret
 
+def blacklist_changes_get(since, limit=None, client_id=None):  # noqa: E501
+    """returns the blacklist changes since a version
+
+    Returns the blacklist entries added or changed and the site_ids removed since the given version - allows clients to keep a local copy of the blacklist in sync without re-downloading all entries # noqa: E501
 
-def greylist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E501
+    :param since: list version the client is at as returned in the X-List-Version header of the full list or the version of the previous changes
+    :type since: int
+    :param limit: Limits the number of changed sites returned - has_more is set if further changes are available
+    :type limit: int
+    :param client_id: client ID for debugging purposes on server
+    :type client_id: str
+
+    :rtype: ListChanges
+    """
+    #init empty return object
+    ret = ListChanges()
+    try:
+        ret = mal2_controller.blacklist_changes_get(since, limit, client_id)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("blacklist_changes_get rejected: "+str(e))
+        return admission.rejected_response(e)
+    except Exception as e:
+        log.mal2_rest_log.exception("blacklist_changes_get exception: "+str(e))
+        res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
+        return Response(res_body,status=400,)
+    finally:
+        #remove db session (and auto-create new Session)
+        log.mal2_rest_log.debug("removing db session %s",db.Session)
+        db.Session.remove()
+    return ret
+
+
+def greylist_get(limit=None, offset=None, all=None, client_id=None, cursor=None):  # noqa: E501
     """returns all greylisted shops
 
     Returns a list of all greylisted fake-shops # noqa: E501
@@ -138,6 +272,8 @@ def greylist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E5
     :type all: bool
     :param client_id: client ID for debugging purposes on server
     :type client_id: str
+    :param cursor: opaque token of the next page as returned in the Link header - continues after the last entry of the previous page
+    :type cursor: str
 
     :rtype: List[GreyListEntry]
     """
@@ -145,7 +281,10 @@ def greylist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E5
     ret = []
     
     try:
-        ret = mal2_controller.greylist_get(limit,offset,all,client_id)
+        ret = mal2_controller.greylist_get(limit,offset,all,client_id,cursor)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("greylist_get rejected: "+str(e))
+        return admission.rejected_response(e)
     except Exception as e:
         log.mal2_rest_log.exception("greylist_get exception: "+str(e))
         res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
@@ -173,6 +312,9 @@ def greylist_site_id_get(site_id, client_id=None):  # noqa: E501
     ret = GreyListEntry()
     try:
         ret = mal2_controller.greylist_site_id_get(site_id, client_id)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("greylist_site_id_get rejected: "+str(e))
+        return admission.rejected_response(e)
     except Exception as e:
         log.mal2_rest_log.exception("greylist_site_id_get exception: "+str(e))
         res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
@@ -183,8 +325,39 @@ def greylist_site_id_get(site_id, client_id=None):  # noqa: E501
         db.Session.remove()
     return ret
 
+def greylist_changes_get(since, limit=None, client_id=None):  # noqa: E501
+    """returns the greylist changes since a version
+
+    Returns the greylist entries added or changed and the site_ids removed since the given version - allows clients to keep a local copy of the greylist in sync without re-downloading all entries # noqa: E501
 
-def ignorelist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E501
+    :param since: list version the client is at as returned in the X-List-Version header of the full list or the version of the previous changes
+    :type since: int
+    :param limit: Limits the number of changed sites returned - has_more is set if further changes are available
+    :type limit: int
+    :param client_id: client ID for debugging purposes on server
+    :type client_id: str
+
+    :rtype: ListChanges
+    """
+    #init empty return object
+    ret = ListChanges()
+    try:
+        ret = mal2_controller.greylist_changes_get(since, limit, client_id)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("greylist_changes_get rejected: "+str(e))
+        return admission.rejected_response(e)
+    except Exception as e:
+        log.mal2_rest_log.exception("greylist_changes_get exception: "+str(e))
+        res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
+        return Response(res_body,status=400,)
+    finally:
+        #remove db session (and auto-create new Session)
+        log.mal2_rest_log.debug("removing db session %s",db.Session)
+        db.Session.remove()
+    return ret
+
+
+def ignorelist_get(limit=None, offset=None, all=None, client_id=None, cursor=None):  # noqa: E501
     """returns all ignorelisted shops
 
     Returns a list of all websites on the ignorelist on which the MAL2 Plugin won&#x27;t operated upon as they are no online shops such as news outlets as orf.at or falter.at # noqa: E501
@@ -197,6 +370,8 @@ def ignorelist_get(limit=None, offset=None, all=None, client_id=None):  # noqa:
     :type all: bool
     :param client_id: client ID for debugging purposes on server
     :type client_id: str
+    :param cursor: opaque token of the next page as returned in the Link header - continues after the last entry of the previous page
+    :type cursor: str
 
     :rtype: List[IgnoreListEntry]
     """
@@ -204,7 +379,10 @@ def ignorelist_get(limit=None, offset=None, all=None, client_id=None):  # noqa:
     ret = []
     
     try:
-        ret = mal2_controller.ignorelist_get(limit,offset,all,client_id)
+        ret = mal2_controller.ignorelist_get(limit,offset,all,client_id,cursor)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("ignorelist_get rejected: "+str(e))
+        return admission.rejected_response(e)
     except Exception as e:
         log.mal2_rest_log.exception("ignorelist_get exception: "+str(e))
         res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
@@ -232,6 +410,9 @@ def ignorelist_site_id_get(site_id, client_id=None):  # noqa: E501
     ret = IgnoreListEntry()
     try:
         ret = mal2_controller.ignorelist_site_id_get(site_id, client_id)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("ignorelist_site_id_get rejected: "+str(e))
+        return admission.rejected_response(e)
     except Exception as e:
         log.mal2_rest_log.exception("ignorelist_site_id_get exception: "+str(e))
         res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
@@ -242,8 +423,39 @@ def ignorelist_site_id_get(site_id, client_id=None):  # noqa: E501
         db.Session.remove()
     return ret
 
+def ignorelist_changes_get(since, limit=None, client_id=None):  # noqa: E501
+    """returns the ignorelist changes since a version
+
+    Returns the ignorelist entries added or changed and the site_ids removed since the given version - allows clients to keep a local copy of the ignorelist in sync without re-downloading all entries # noqa: E501
+
+    :param since: list version the client is at as returned in the X-List-Version header of the full list or the version of the previous changes
+    :type since: int
+    :param limit: Limits the number of changed sites returned - has_more is set if further changes are available
+    :type limit: int
+    :param client_id: client ID for debugging purposes on server
+    :type client_id: str
+
+    :rtype: ListChanges
+    """
+    #init empty return object
+    ret = ListChanges()
+    try:
+        ret = mal2_controller.ignorelist_changes_get(since, limit, client_id)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("ignorelist_changes_get rejected: "+str(e))
+        return admission.rejected_response(e)
+    except Exception as e:
+        log.mal2_rest_log.exception("ignorelist_changes_get exception: "+str(e))
+        res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
+        return Response(res_body,status=400,)
+    finally:
+        #remove db session (and auto-create new Session)
+        log.mal2_rest_log.debug("removing db session %s",db.Session)
+        db.Session.remove()
+    return ret
+
 
-def whitelist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E501
+def whitelist_get(limit=None, offset=None, all=None, client_id=None, cursor=None):  # noqa: E501
     """returns all whitelisted shops
 
     Returns a list of all whitelisted shops # noqa: E501
@@ -256,6 +468,8 @@ def whitelist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E
     :type all: bool
     :param client_id: client ID for debugging purposes on server
     :type client_id: str
+    :param cursor: opaque token of the next page as returned in the Link header - continues after the last entry of the previous page
+    :type cursor: str
 
     :rtype: List[WhiteListEntry]
     """
@@ -263,7 +477,10 @@ def whitelist_get(limit=None, offset=None, all=None, client_id=None):  # noqa: E
     ret = []
     
     try:
-        ret = mal2_controller.whitelist_get(limit,offset,all,client_id)
+        ret = mal2_controller.whitelist_get(limit,offset,all,client_id,cursor)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("whitelist_get rejected: "+str(e))
+        return admission.rejected_response(e)
     except Exception as e:
         log.mal2_rest_log.exception("whitelist_get exception: "+str(e))
         res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
@@ -291,6 +508,9 @@ def whitelist_site_id_get(site_id, client_id=None):  # noqa: E501
     ret = WhiteListEntry()
     try:
         ret = mal2_controller.whitelist_site_id_get(site_id, client_id)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("whitelist_site_id_get rejected: "+str(e))
+        return admission.rejected_response(e)
     except Exception as e:
         log.mal2_rest_log.exception("whitelist_site_id_get exception: "+str(e))
         res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
@@ -300,3 +520,56 @@ def whitelist_site_id_get(site_id, client_id=None):  # noqa: E501
         log.mal2_rest_log.debug("removing db session %s",db.Session)
         db.Session.remove()
     return ret
+
+def whitelist_changes_get(since, limit=None, client_id=None):  # noqa: E501
+    """returns the whitelist changes since a version
+
+    Returns the whitelist entries added or changed and the site_ids removed since the given version - allows clients to keep a local copy of the whitelist in sync without re-downloading all entries # noqa: E501
+
+    :param since: list version the client is at as returned in the X-List-Version header of the full list or the version of the previous changes
+    :type since: int
+    :param limit: Limits the number of changed sites returned - has_more is set if further changes are available
+    :type limit: int
+    :param client_id: client ID for debugging purposes on server
+    :type client_id: str
+
+    :rtype: ListChanges
+    """
+    #init empty return object
+    ret = ListChanges()
+    try:
+        ret = mal2_controller.whitelist_changes_get(since, limit, client_id)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("whitelist_changes_get rejected: "+str(e))
+        return admission.rejected_response(e)
+    except Exception as e:
+        log.mal2_rest_log.exception("whitelist_changes_get exception: "+str(e))
+        res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
+        return Response(res_body,status=400,)
+    finally:
+        #remove db session (and auto-create new Session)
+        log.mal2_rest_log.debug("removing db session %s",db.Session)
+        db.Session.remove()
+    return ret
+
+
+def domainset_get(client_id=None):  # noqa: E501
+    """returns the compact domain set of all listed sites
+
+    Returns the white-, black-, grey- and ignorelisted domains as sorted 64-bit hashes in a versioned binary format - allows clients to classify known sites locally and only call /analyze for unknown sites # noqa: E501
+
+    :param client_id: client ID for debugging purposes on server
+    :type client_id: str
+
+    :rtype: str
+    """
+    try:
+        ret = mal2_controller.domainset_get(client_id)
+    except admission.AdmissionRejected as e:
+        log.mal2_rest_log.info("domainset_get unavailable: "+str(e))
+        return admission.rejected_response(e)
+    except Exception as e:
+        log.mal2_rest_log.exception("domainset_get exception: "+str(e))
+        res_body ='{"detail": "'+str(e)+'","status": 400, "title": "server error","type": "about:blank"}'
+        return Response(res_body,status=400,)
+    return ret
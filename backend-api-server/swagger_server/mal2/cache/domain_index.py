@@ -0,0 +1,62 @@
+from collections import namedtuple
+import swagger_server.mal2.db.handler.db_handler as db
+import swagger_server.mal2.db.model.db_model as db_model
+from swagger_server import logger_config as log
+
+#best list entry of a site as required for building its SiteAnalysisResult
+DomainIndexEntry = namedtuple("DomainIndexEntry", ["site_id", "url", "status", "timestamp"])
+
+#url -> DomainIndexEntry for all white-, black-, grey- and ignorelisted sites
+#the dict is never modified after it was built - rebuild() swaps in a new dict so readers don't require a lock
+__index = {}
+
+
+def get(url:str) -> DomainIndexEntry:
+    """looks up the best list entry of a site without any db round trip
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+
+    Returns:
+        DomainIndexEntry -- site_id, url, site status and list entry timestamp or None if the site is in no list
+    """
+    return __index.get(url)
+
+def size() -> int:
+    return len(__index)
+
+def entries() -> list:
+    """returns all indexed sites e.g. for exporting them
+
+    Returns:
+        list -- DomainIndexEntry of all white-, black-, grey- and ignorelisted sites
+    """
+    return list(__index.values())
+
+def rebuild():
+    """re-builds the index from the best white-, black-, grey- and ignorelist db entries and swaps it in atomically. The previous index
+    is kept if building fails e.g. due to db issues
+    """
+    global __index
+    #same list per site status as get_site_verdict_db_entries_by_url
+    list_queries = [
+        (db_model.EnumSiteStatus.whitelist, db.get_all_best_whitelist_db_entries),
+        (db_model.EnumSiteStatus.ignore, db.get_all_best_ignorelist_db_entries),
+        (db_model.EnumSiteStatus.blacklist, db.get_all_best_blacklist_db_entries),
+        (db_model.EnumSiteStatus.greylist, db.get_all_best_greylist_db_entries)
+    ]
+    try:
+        index = {}
+        for status, get_all_best_db_entries in list_queries:
+            for list_db in get_all_best_db_entries():
+                site_db = list_db.site
+                #only the list matching the site's status is relevant for its verdict
+                if site_db.status == status:
+                    index[site_db.url] = DomainIndexEntry(site_db.id, site_db.url, status, list_db.timestamp)
+    except Exception as e:
+        log.mal2_rest_log.warn("failed to rebuild domain index - keeping %s previous entries: %s",len(__index),e)
+        return
+    finally:
+        db.Session.remove()
+    __index = index
+    log.mal2_rest_log.info("rebuilt domain index with %s entries",len(index))
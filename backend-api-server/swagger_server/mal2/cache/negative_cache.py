@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from swagger_server import logger_config as log
+try:
+    import redis
+except ImportError:
+    redis = None
+
+#negative outcomes of analyzing a site and the message that's forwarded to the ui
+OFFLINE = "offline"
+FAILED = "failed"
+PROCESSING = "processing"
+messages = {
+    OFFLINE: "website is offline",
+    FAILED: "skipping analyze as prediction previously failed on that site.",
+    PROCESSING: "skipping analyze as prediction is currently beeing processed on that site."
+}
+
+#maximum number of negative outcomes kept in memory
+max_entries = 10000
+#optional shared backend e.g. redis://localhost:6379/0 - shares negative outcomes across all processes
+redis_url = os.environ.get("MAL2_NEGATIVE_CACHE_REDIS_URL")
+redis_key_prefix = "mal2:negative:"
+
+#url -> (expiry timestamp, outcome)
+__cache = {}
+__cache_lock = threading.Lock()
+__redis = None
+if redis_url:
+    if redis == None:
+        log.mal2_rest_log.warning("MAL2_NEGATIVE_CACHE_REDIS_URL is set but redis is not installed - using in-process negative cache only")
+    else:
+        __redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+def get(url:str) -> str:
+    """fetches a recorded negative outcome for the site. The shared backend (if configured) is authoritative - an outcome invalidated by a
+    different process is dropped from the in-process cache as well. The in-process cache is used if the shared backend is unavailable
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+
+    Returns:
+        str -- OFFLINE, FAILED, PROCESSING or None if no (unexpired) negative outcome was recorded
+    """
+    if __redis != None:
+        try:
+            outcome = __redis.get(redis_key_prefix+url)
+            if outcome != None:
+                return outcome.decode("utf-8")
+            with __cache_lock:
+                __cache.pop(url, None)
+            return None
+        except Exception as e:
+            log.mal2_rest_log.warning("negative cache redis get failed: %s",e)
+    with __cache_lock:
+        entry = __cache.get(url)
+        if entry != None:
+            expires_at, outcome = entry
+            if expires_at >= time.monotonic():
+                return outcome
+            del __cache[url]
+    return None
+
+def put(url:str, outcome:str, ttl:float):
+    """records a negative outcome for the site
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+        outcome {str} -- OFFLINE, FAILED or PROCESSING
+        ttl {float} -- seconds the outcome is valid
+    """
+    if ttl <= 0:
+        return
+    with __cache_lock:
+        __cache[url] = (time.monotonic() + ttl, outcome)
+        #evict oldest outcomes
+        while len(__cache) > max_entries:
+            del __cache[next(iter(__cache))]
+    if __redis != None:
+        try:
+            __redis.set(redis_key_prefix+url, outcome, px=int(ttl*1000))
+        except Exception as e:
+            log.mal2_rest_log.warning("negative cache redis set failed: %s",e)
+
+def invalidate(url:str):
+    """removes a recorded negative outcome e.g. after a prediction on the site completed
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+    """
+    with __cache_lock:
+        __cache.pop(url, None)
+    if __redis != None:
+        try:
+            __redis.delete(redis_key_prefix+url)
+        except Exception as e:
+            log.mal2_rest_log.warning("negative cache redis delete failed: %s",e)
@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import Future
+from swagger_server import logger_config as log
+
+#key -> Future of the call currently in flight for that key
+__in_flight = {}
+__in_flight_lock = threading.Lock()
+
+
+def do(key:str, fn, on_wait=None, timeout:float=None):
+    """executes fn for the given key at most once at a time within this process. Concurrent callers of the same key
+    don't execute fn themselves but wait for the result (or exception) of the call that's already in flight
+
+    Arguments:
+        key {str} -- key to coalesce calls upon e.g. the normalized base url google.at
+        fn {callable} -- function without arguments to execute
+        on_wait {callable} -- optional callback invoked before a caller starts waiting e.g. to release its db session
+        timeout {float} -- max seconds a caller waits for the call in flight - raises concurrent.futures.TimeoutError (default: {None} waits forever)
+
+    Returns:
+        result of fn - raises fn's exception for the owner and all waiting callers
+    """
+    with __in_flight_lock:
+        future = __in_flight.get(key)
+        is_owner = future == None
+        if is_owner:
+            future = Future()
+            __in_flight[key] = future
+
+    if not is_owner:
+        log.mal2_rest_log.info("single flight: waiting for in flight call on %s",key)
+        if on_wait:
+            on_wait()
+        return future.result(timeout)
+
+    try:
+        result = fn()
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with __in_flight_lock:
+            del __in_flight[key]
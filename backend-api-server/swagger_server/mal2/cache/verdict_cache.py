@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from swagger_server import logger_config as log
+
+#maximum number of SiteAnalysisResults kept in memory (least recently used ones are evicted first)
+max_entries = 10000
+#time to live in seconds per verdict type (SiteAnalysisResult.processor)
+#list verdicts only change during the list imports (which invalidate the cache) - predictions may be re-processed at any time
+ttl_per_processor = {
+    "whitelist": 6*60*60,
+    "ignorelist": 6*60*60,
+    "blacklist": 60*60,
+    "greylist": 60*60,
+    "mal2_ai": 60*60
+}
+default_ttl = 10*60
+
+#url -> (expiry timestamp, SiteAnalysisResult)
+__cache = OrderedDict()
+__cache_lock = threading.Lock()
+
+
+def get(url:str):
+    """fetches a finished SiteAnalysisResult from the in-process cache
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+
+    Returns:
+        SiteAnalysisResult -- cached swagger model SiteAnalysisResult or None if not cached or expired
+    """
+    with __cache_lock:
+        entry = __cache.get(url)
+        if entry == None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            #expired - drop entry
+            del __cache[url]
+            return None
+        #mark as most recently used
+        __cache.move_to_end(url)
+        return result
+
+def put(url:str, result):
+    """adds a finished SiteAnalysisResult to the in-process cache. TTL is selected by the result's processor
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+        result {SiteAnalysisResult} -- swagger model SiteAnalysisResult to cache
+    """
+    if result == None:
+        return
+    ttl = ttl_per_processor.get(result.processor, default_ttl)
+    with __cache_lock:
+        __cache[url] = (time.monotonic() + ttl, result)
+        __cache.move_to_end(url)
+        #evict least recently used entries
+        while len(__cache) > max_entries:
+            __cache.popitem(last=False)
+
+def invalidate(url:str):
+    """removes the cached SiteAnalysisResult for a given url e.g. after new predictions were written
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+    """
+    with __cache_lock:
+        __cache.pop(url, None)
+
+def invalidate_all():
+    """removes all cached SiteAnalysisResults e.g. after a white-, black-, grey- or ignorelist import finished
+    """
+    with __cache_lock:
+        count = len(__cache)
+        __cache.clear()
+    log.mal2_rest_log.info("verdict cache invalidated. removed %s entries",count)
@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response
+import swagger_server.mal2.db.handler.db_engine as db_engine
+from swagger_server import logger_config as log
+
+#classes of work with separate concurrency budgets - cold predictions must never starve answering known sites
+LOOKUP = "lookup"
+LIST = "list"
+PREDICTION = "prediction"
+#titles of the rejected responses
+rejected_titles = {429: "Too Many Requests", 503: "Service Unavailable"}
+
+
+class AdmissionRejected(Exception):
+    """raised if a request is not admitted - forwarded to the client with its http status and Retry-After header
+    """
+    def __init__(self, message:str, status:int, retry_after:int):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class Budget:
+    """concurrency budget of a class of work with a short bounded wait queue
+    """
+    def __init__(self, work_class:str, concurrency:int, queue_size:int, queue_timeout:float, retry_after:int, max_per_client:int=0):
+        self.work_class = work_class
+        #max concurrently admitted requests
+        self.concurrency = concurrency
+        #max requests waiting for a slot - further requests are rejected immediately
+        self.queue_size = queue_size
+        #seconds a request waits for a slot
+        self.queue_timeout = queue_timeout
+        #seconds the client is asked to wait before retrying
+        self.retry_after = retry_after
+        #max concurrently admitted requests per client (0 disables)
+        self.max_per_client = max_per_client
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        #client_id -> number of admitted requests
+        self.clients = {}
+        self.condition = threading.Condition()
+
+    def acquire(self, client_id:str=None):
+        with self.condition:
+            if self.max_per_client > 0 and client_id and self.clients.get(client_id, 0) >= self.max_per_client:
+                self.rejected += 1
+                raise AdmissionRejected("too many concurrent %s requests of this client. Please try again later."%self.work_class, 429, self.retry_after)
+            if self.active >= self.concurrency:
+                if self.waiting >= self.queue_size:
+                    self.rejected += 1
+                    raise AdmissionRejected("we're experiencing a high number requests. Please try again later.", 503, self.retry_after)
+                self.waiting += 1
+                try:
+                    deadline = time.monotonic() + self.queue_timeout
+                    while self.active >= self.concurrency:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected += 1
+                            raise AdmissionRejected("we're experiencing a high number requests. Please try again later.", 503, self.retry_after)
+                        self.condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+            if client_id:
+                self.clients[client_id] = self.clients.get(client_id, 0) + 1
+
+    def release(self, client_id:str=None):
+        with self.condition:
+            self.active -= 1
+            if client_id:
+                count = self.clients.pop(client_id, 0) - 1
+                if count > 0:
+                    self.clients[client_id] = count
+            self.condition.notify()
+
+
+class Ticket:
+    """admission of a single request - released when leaving admit() unless it was handed over to a streamed response
+    """
+    def __init__(self, budget:Budget, client_id:str=None):
+        self.budget = budget
+        self.client_id = client_id
+        self.released = False
+        self.deferred = False
+        self.lock = threading.Lock()
+
+    def release(self):
+        with self.lock:
+            if self.released:
+                return
+            self.released = True
+        self.budget.release(self.client_id)
+
+    def release_on_close(self, response):
+        """keeps the admission until a streamed response was sent completely - it keeps working (e.g. reading from the db) after
+        the controller returned
+
+        Arguments:
+            response -- the controller's return value, only streamed flask responses are considered
+        """
+        if getattr(response, "is_streamed", False):
+            self.deferred = True
+            response.call_on_close(self.release)
+
+
+def __env(work_class:str, key:str, default):
+    return type(default)(os.environ.get("MAL2_ADMISSION_%s_%s"%(work_class.upper(), key.upper()), default))
+
+def __budget(work_class:str, concurrency:int, queue_size:int, queue_timeout:float, retry_after:int, max_per_client:int=0) -> Budget:
+    #e.g. MAL2_ADMISSION_PREDICTION_CONCURRENCY=8 - budgets should leave db connections for imports and the analysis job workers
+    return Budget(work_class,
+        __env(work_class, "concurrency", concurrency),
+        __env(work_class, "queue_size", queue_size),
+        __env(work_class, "queue_timeout", queue_timeout),
+        __env(work_class, "retry_after", retry_after),
+        __env(work_class, "max_per_client", max_per_client))
+
+#budgets per class of work - per process
+budgets = {
+    #known site answers, single list entries and job status - milliseconds each
+    LOOKUP: __budget(LOOKUP, 12, 24, 0.5, 1),
+    #list pages and full list downloads - seconds each when streamed from the db
+    LIST: __budget(LIST, 4, 8, 2.0, 5),
+    #cold predictions - scraping and scoring a site takes seconds
+    PREDICTION: __budget(PREDICTION, 6, 6, 1.0, 30, max_per_client=2)
+}
+
+
+def acquire(work_class:str, client_id:str=None) -> Ticket:
+    """admits a request of the class of work - waits at most queue_timeout for a free slot
+
+    Arguments:
+        work_class {str} -- LOOKUP, LIST or PREDICTION
+
+    Keyword Arguments:
+        client_id {str} -- requesting client, limits concurrent requests per client if configured (default: {None})
+
+    Returns:
+        Ticket -- the admission, release it once the work is done - raises AdmissionRejected if the request is not admitted
+    """
+    budget = budgets[work_class]
+    try:
+        budget.acquire(client_id)
+    except AdmissionRejected as e:
+        log.mal2_rest_log.warning("rejected %s request (status %s): active %s, waiting %s, rejected %s. Engine pool: %s",work_class,e.status,budget.active,budget.waiting,budget.rejected,db_engine.get_pool_status())
+        raise e
+    return Ticket(budget, client_id)
+
+@contextmanager
+def admit(work_class:str, client_id:str=None):
+    """admits a request of the class of work for the duration of the with block (see acquire)
+
+    Arguments:
+        work_class {str} -- LOOKUP, LIST or PREDICTION
+
+    Keyword Arguments:
+        client_id {str} -- requesting client (default: {None})
+    """
+    ticket = acquire(work_class, client_id)
+    try:
+        yield ticket
+    finally:
+        if not ticket.deferred:
+            ticket.release()
+
+def get_status() -> dict:
+    """returns the admission statistics of the current process
+
+    Returns:
+        dict -- class of work -> active, waiting and rejected requests and the concurrency
+    """
+    return {work_class: {"active": budget.active, "waiting": budget.waiting, "rejected": budget.rejected, "concurrency": budget.concurrency}
+        for work_class, budget in budgets.items()}
+
+def rejected_response(e:AdmissionRejected) -> Response:
+    """builds the response of a rejected request - the service is overloaded (503) or the client sends too many concurrent
+    requests (429). Not an authorization issue
+
+    Arguments:
+        e {AdmissionRejected} -- the rejection
+
+    Returns:
+        Response -- flask response with Retry-After header
+    """
+    res_body ='{"detail": "'+str(e)+'","status": '+str(e.status)+', "title": "'+rejected_titles.get(e.status, "Service Unavailable")+'","type": "about:blank"}'
+    return Response(res_body,status=e.status,headers={"Retry-After": str(e.retry_after)})
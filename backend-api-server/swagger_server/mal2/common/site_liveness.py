@@ -0,0 +1,116 @@
+import threading
+import time
+import requests
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from requests.adapters import HTTPAdapter
+import swagger_server.mal2.cache.single_flight as single_flight
+from swagger_server import logger_config as log
+
+#strict (connect, read) timeouts in seconds - a hanging shop must not block a worker
+probe_timeout = (3, 5)
+#max seconds a request waits for the probe of the same site that's in flight - a HEAD and the fallback GET, both following redirects
+probe_wait_timeout = 30
+#seconds a probe result is cached - dead sites are re-probed earlier than online ones
+online_ttl = 10*60
+offline_ttl = 5*60
+#max cached probe results
+max_entries = 10000
+#http status codes of a HEAD request that are re-checked with a GET as some servers don't support HEAD properly
+head_fallback_status = [403, 404, 405, 501]
+
+#pooled and keep-alive connections shared by all probes
+__session = requests.Session()
+__session.headers.update({'User-Agent': 'Mozilla/5.0'})
+__session.mount("http://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
+__session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
+
+#url -> (expiry timestamp, online, error)
+__cache = {}
+__cache_lock = threading.Lock()
+
+
+class ProbeBusy(Exception):
+    """raised if the liveness of a website is unknown as its probe in flight didn't finish in time - the site is not offline
+    """
+    pass
+
+
+def check_site_is_online(url:str):
+    """
+    probes if a website is online (http status < 400) otherwise raises exception. Probe results are cached
+    Args:
+        url (str): baseurl e.g. malzwei.at to probe
+    Returns:
+        None - raises Exception if the site is offline, ProbeBusy if its liveness is unknown
+    """
+    online, err = probe(url)
+    if not online:
+        log.mal2_rest_log.info("don't call analyze, as site %s is down with err: %s"%(url,err))
+        #exception forwarded to ui
+        raise Exception("website is offline")
+
+def probe(url:str):
+    """
+    returns the cached liveness of a website or probes it via HEAD (with fallback to a streamed GET). Concurrent requests for the same
+    site share the result of the probe in flight
+    Args:
+        url (str): baseurl e.g. malzwei.at to probe
+    Returns:
+        bool, str - True if online, the error if offline - raises ProbeBusy if the probe in flight doesn't finish within probe_wait_timeout
+    """
+    cached = __get_cached(url)
+    if cached:
+        return cached
+    try:
+        #own key space - the analysis of the same url may be in flight in this thread
+        return single_flight.do("liveness:"+url, lambda: __probe_and_cache(url), timeout=probe_wait_timeout)
+    except FutureTimeoutError:
+        log.mal2_rest_log.info("liveness probe of site %s still in flight after %ss",url,probe_wait_timeout)
+        raise ProbeBusy("website is currently being probed. Please try again later.")
+
+def invalidate(url:str):
+    """removes the cached liveness of a website
+
+    Arguments:
+        url {str} -- baseurl e.g. malzwei.at
+    """
+    with __cache_lock:
+        __cache.pop(url, None)
+
+def __get_cached(url:str):
+    with __cache_lock:
+        entry = __cache.get(url)
+        if entry == None:
+            return None
+        expires_at, online, err = entry
+        if expires_at < time.monotonic():
+            del __cache[url]
+            return None
+        return online, err
+
+def __probe_and_cache(url:str):
+    #re-check - a different probe may have finished meanwhile
+    cached = __get_cached(url)
+    if cached:
+        return cached
+    online, err = __probe(url)
+    ttl = online_ttl if online else offline_ttl
+    with __cache_lock:
+        __cache[url] = (time.monotonic() + ttl, online, err)
+        #evict oldest probe results
+        while len(__cache) > max_entries:
+            del __cache[next(iter(__cache))]
+    return online, err
+
+def __probe(url:str):
+    try:
+        resp = __session.head("http://"+url, allow_redirects=True, verify=False, timeout=probe_timeout)
+        if resp.status_code in head_fallback_status:
+            #don't download the body - only the status line and headers
+            with __session.get("http://"+url, allow_redirects=True, verify=False, timeout=probe_timeout, stream=True) as resp:
+                resp.raise_for_status()
+        else:
+            resp.raise_for_status()
+        return True, None
+    except Exception as err:
+        return False, str(err)
@@ -4,18 +4,53 @@ import swagger_server.mal2.db.handler.db_handler as db
 import swagger_server.mal2.db.model.db_model as db_model
 import swagger_server.mal2.sources.fakeshopdb.fake_shop_db as mal2_fakeshopdb
 import swagger_server.mal2.sources.waybackmachine.internet_archive as waybackmachine
+import swagger_server.mal2.cache.verdict_cache as verdict_cache
+import swagger_server.mal2.cache.single_flight as single_flight
+import swagger_server.mal2.cache.domain_index as domain_index
+import swagger_server.mal2.cache.negative_cache as negative_cache
+import swagger_server.mal2.common.site_liveness as site_liveness
+import swagger_server.mal2.common.admission as admission
+import swagger_server.mal2.jobs.analysis_job_queue as analysis_job_queue
+import swagger_server.mal2.export.list_snapshot as list_snapshot
+import swagger_server.mal2.export.domain_set as domain_set
 from swagger_server import logger_config as log
 import numpy as np
+import functools
+import base64
+import json
+import connexion
+from flask import Response
+from swagger_server import encoder
 import datetime as dt
 from typing import List
 from w3lib.url import url_query_cleaner
 from url_normalize import url_normalize
 from w3lib.url import url_query_cleaner
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlencode
 #import urllib.request
-import requests
-import random
-from time import sleep
+from time import sleep, monotonic
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import nullcontext
+
+#requests waiting on a different process predicting the same url poll the db processing status in this interval (seconds)
+processing_poll_interval = 0.5
+#and give up after
+processing_wait_timeout = 180
+#predicting on a site is retried after it failed
+failed_retry_after = dt.timedelta(days=7)
+#a site's processing status is considered abandoned after
+processing_expires_after = dt.timedelta(days=1)
+#max seconds a site that failed or is being processed by a different request is rejected from the negative cache without re-checking the
+#db - a different process may have predicted it meanwhile. The db's prediction status keeps rejecting failed sites for failed_retry_after
+negative_recheck_after = 5*60
+#max seconds a client may long poll for an analysis job
+max_job_wait = 30
+#max sites per batch analysis request
+max_batch_size = 50
+#max unknown sites of a batch analysis request that are processed in parallel
+max_batch_workers = 4
+#list entries per page if a cursor is passed without limit
+default_page_size = 100
 
 def extract_base_url(url):
     """validity of http url is checked by swagger - extracts the netloc from the url, removes trailing path or www
@@ -32,28 +67,106 @@ def extract_base_url(url):
         url = url[:-1]
     return url
 
-def check_db_load_ok():
-    #https://stackoverflow.com/questions/34775501/how-could-i-check-the-number-of-active-sqlalchemy-connections-in-a-pool-at-any-g
-    #make sure at least minimum of 10 connections remain in the pool for other functions of the app to use 
-    if db.engine.pool.checkedout() > (db.dbpool_size+db.dbmax_overflow)- 10:
-        log.mal2_rest_log.warning("check_db_load_is_ok? False. Checkedout engine pool: %s. Rejecting incoming service request by returning 401"%db.engine.pool.checkedout())
-        return False, "we're experiencing a high number requests. Please try again later."
+def __admitted(work_class:str):
+    #admits the public controller method within the concurrency budget of its class of work - raises admission.AdmissionRejected
+    #which is forwarded as 503/429 with Retry-After
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with admission.admit(work_class) as ticket:
+                ret = func(*args, **kwargs)
+                #a streamed list keeps reading from the db after returning
+                ticket.release_on_close(ret)
+                return ret
+        return wrapper
+    return decorator
+
+def translate_model_score(model_score:float):
+    #translates score to fake-shop db risk_types very low, low, below average, above average, high, very high, unknown
+    #https://db-dev.malzwei.at/admin/mal2_db/websiteriskscore/
+    #risk_score: rest-api allowed_values = ["very low", "low", "below average", "above average", "high", "very high", "unknown"]
+    range_low = np.arange(0, 100, 0.01)
+    score = model_score * 100
+    if np.logical_and(score >= 0, score < 10):
+        return "very low"
+    elif np.logical_and(score >= 10, score < 25):
+        return "low"
+    elif np.logical_and(score >= 25, score < 50):
+        return "below average"
+    elif np.logical_and(score >= 50, score < 80):
+        return "above average"
+    elif np.logical_and(score >= 80, score < 90):
+        return "high"
+    elif np.logical_and(score >= 90, score <=100):
+        return "very high"
     else:
-        log.mal2_rest_log.info("check_db_load_is_ok? True. Checkedout engine pool: %s."%db.engine.pool.checkedout())
-        return True, "glad to take on more"
+        return "unknown"
 
-def analyze_post(site:api.Site)->api.SiteAnalysisResult:
+#processor and model score per listed site status
+__list_processors = {
+    db_model.EnumSiteStatus.ignore: ("ignorelist", -1),
+    db_model.EnumSiteStatus.greylist: ("greylist", -1),
+    db_model.EnumSiteStatus.blacklist: ("blacklist", 1),
+    db_model.EnumSiteStatus.whitelist: ("whitelist", 0)
+}
+
+def __build_list_SiteAnalysisResult(site_db:db_model.Site, list_db)->api.SiteAnalysisResult:
+    """checks and builds a SiteAnalysisResult for elements in white, black grey and ignore lists for this site or None if site in no list
+
+    Arguments:
+        site_db {db_model.Site} -- site or None
+        list_db -- best db_model.Blacklist, db_model.Greylist, db_model.Whitelist or db_model.Ignorelist entry for the site's status or None
+
+    Returns:
+        [SiteAnalysisResult] -- swagger model SiteAnalysisResult return object or None
+    """
+    #allowed processors values are ['whitelist', 'blacklist', 'greylist', 'ignorelist', 'mal2_ai']
+    if site_db and site_db.status in __list_processors:
+        processor, score = __list_processors[site_db.status]
+        #respond with the list entry
+        if not list_db:
+            log.mal2_rest_log.warn("build get_SiteAnalysisResult failed to get %s entry for url: %s",processor,site_db.url)
+            raise Exception("database error") 
+        log.mal2_rest_log.info("respond with %s SiteAnalysisResult for %s and status: %s",processor,site_db.url,site_db.status)
+        return api.SiteAnalysisResult(site_id=site_db.id,site_url=site_db.url,analyzed_date_time=list_db.timestamp,processor=processor,risk_score=translate_model_score(score))
+    return None
+
+def __build_indexed_SiteAnalysisResult(index_entry:domain_index.DomainIndexEntry)->api.SiteAnalysisResult:
+    processor, score = __list_processors[index_entry.status]
+    return api.SiteAnalysisResult(site_id=index_entry.site_id,site_url=index_entry.url,analyzed_date_time=index_entry.timestamp,processor=processor,risk_score=translate_model_score(score))
+
+def __build_mal2_ai_SiteAnalysisResult(site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db)->api.SiteAnalysisResult:
+    #create and return swagger_server return object
+    aggr_fake_score = (xg_prediction_db.prediction + rf_prediction_db.prediction + nn_prediction_db.prediction) / 3
+    return api.SiteAnalysisResult(site_id=site_db.id,site_url=site_db.url,analyzed_date_time=xg_prediction_db.timestamp,processor="mal2_ai",risk_score=translate_model_score(aggr_fake_score))
+
+def analyze_post(site:api.Site, respond_async=False, check_load=True)->api.SiteAnalysisResult:
     #input
     url = extract_base_url(site._site_base_url)
     clientID = site._client_id
     reprocess = site._re_process
-    log.mal2_rest_log.info("analyze_post for url %s, clientId %s reprocess %s",url,clientID,reprocess)
-    
-    #sanity check for all public controller methods on service load
-    load_ok, feedback = check_db_load_ok()
-    if load_ok == False:
-        #return 401 which client can specifically target
-        return feedback, 401
+    log.mal2_rest_log.info("analyze_post for url %s, clientId %s reprocess %s respond_async %s",url,clientID,reprocess,respond_async)
+
+    #answer known sites from the in-process verdict cache without any db round trip
+    if reprocess != True:
+        cached_result = verdict_cache.get(url)
+        if cached_result:
+            log.mal2_rest_log.info("respond with cached %s SiteAnalysisResult for %s",cached_result.processor,url)
+            return cached_result
+
+    #answer white-, black-, grey- and ignorelisted sites from the in-memory domain index (list verdicts apply regardless of reprocess)
+    index_entry = domain_index.get(url)
+    if index_entry:
+        ret = __build_indexed_SiteAnalysisResult(index_entry)
+        log.mal2_rest_log.info("respond with indexed %s SiteAnalysisResult for %s",ret.processor,url)
+        return ret
+
+    #reject sites that recently were offline, failed or are still being processed without any db or network work
+    negative_outcome = negative_cache.get(url)
+    if negative_outcome:
+        log.mal2_rest_log.info("skipping analyze, as site %s has cached negative outcome: %s",url,negative_outcome)
+        #exception forwarded to ui
+        raise Exception(negative_cache.messages[negative_outcome])
     
     #ret
     ret = api.SiteAnalysisResult()
@@ -111,34 +224,39 @@ def analyze_post(site:api.Site)->api.SiteAnalysisResult:
             else:
                 log.mal2_rest_log.info("skipping submission to waybackmachine. Risk-Score below threshold.")
 
-        def update_processing_db_status(url:str, status:db_model.EnumPredictionProcessingStatus):
+        def get_processing_db_status(url:str, status:db_model.EnumPredictionProcessingStatus):
             pred_status_db = db.get_predictionstatus_db_entry_by_url(url)
             if pred_status_db == None:
                 pred_status_db = db_model.PredictionStatus(url=url)
             pred_status_db.status = status
             log.mal2_rest_log.info("setting db processing status: %s for site: %s",status,url)
-            db.commit_db_etnries(pred_status_db)
+            return pred_status_db
+
+        def update_processing_db_status(url:str, status:db_model.EnumPredictionProcessingStatus):
+            db.commit_db_etnries(get_processing_db_status(url,status))
 
 
         log.mal2_rest_log.info("handle_reporcess for %s",url)
         #raises 400 exception (forwareded to ui) if url is offline
         check_site_is_online(url)
 
-        #raises 400 exception (forwarded to ui) if url either being processed right now (by a different request) or was previously processing but predicting failed 
-        check_site_is_processing(url)
-
-        #set status to prediction processing in db
-        update_processing_db_status(url,db_model.EnumPredictionProcessingStatus.processing)
+        #claim sets status to prediction processing in db - if a different request owns the url wait for its result
+        #raises 400 exception (forwarded to ui) if predicting was previously failing or doesn't finish in time
+        if not claim_site_processing(url):
+            return wait_for_site_processing(url)
 
         log.mal2_rest_log.info("repredicting url %s",url)
         #call the mal2-model's verify to get fake-score prediction
         try:
-            xg_fake_score, xg_htmlhash, xg_model_name, xg_model_version = mal2_verify.get_model_prediction(url,"xgboost",use_cache=False, keep_cache=True)
-            rf_fake_score, rf_htmlhash, rf_model_name, rf_model_version = mal2_verify.get_model_prediction(url,"random_forest",use_cache=True, keep_cache=True)
-            nn_fake_score, nn_htmlhash, nn_model_name, nn_model_version = mal2_verify.get_model_prediction(url,"neural_net",use_cache=True, keep_cache=False)
+            #scrape, vectorize and hash once - score all models
+            predictions = mal2_verify.get_ensemble_prediction(url,["xgboost","random_forest","neural_net"],use_cache=False, keep_cache=False)
+            xg_fake_score, xg_htmlhash, xg_model_name, xg_model_version = predictions["xgboost"]
+            rf_fake_score, rf_htmlhash, rf_model_name, rf_model_version = predictions["random_forest"]
+            nn_fake_score, nn_htmlhash, nn_model_name, nn_model_version = predictions["neural_net"]
         except Exception as e:
             #set status to prediction processing failed in db
             update_processing_db_status(url,db_model.EnumPredictionProcessingStatus.failed)
+            record_negative_outcome(negative_cache.FAILED, failed_retry_after.total_seconds())
             #forward exception
             raise e
 
@@ -158,176 +276,134 @@ def analyze_post(site:api.Site)->api.SiteAnalysisResult:
             rf_prediction_db = db_model.Prediction(site=site_db, html_hash = rf_htmlhash, prediction=float(rf_fake_score), algorithm=rf_model_name, model_version=rf_model_version)
             nn_prediction_db = db_model.Prediction(site=site_db, html_hash = nn_htmlhash, prediction=float(nn_fake_score), algorithm=nn_model_name, model_version=nn_model_version)
             
-            #set status to prediction processing completed in db
-            update_processing_db_status(url,db_model.EnumPredictionProcessingStatus.completed)
-            
-            #submit results to db
-            db.commit_db_etnries(site_db,xg_prediction_db,rf_prediction_db,nn_prediction_db)
+            #submit results to db and set status to prediction processing completed within the same commit
+            #(waiting requests read the predictions as soon as they see the status completed)
+            pred_status_db = get_processing_db_status(url,db_model.EnumPredictionProcessingStatus.completed)
+            db.commit_db_etnries(pred_status_db,site_db,xg_prediction_db,rf_prediction_db,nn_prediction_db)
+            #drop the outdated verdict and negative outcomes for this site
+            verdict_cache.invalidate(url)
+            negative_cache.invalidate(url)
             site_db = db.get_site_db_entry_by_url(url)
 
             #check if we need to report object to central db for manual inspection
             submit_prediction_to_mal2_db_for_inspection(url,xg_prediction_db,rf_prediction_db, nn_prediction_db)
+        else:
+            #release the claim - no prediction available
+            update_processing_db_status(url,db_model.EnumPredictionProcessingStatus.failed)
+            record_negative_outcome(negative_cache.FAILED, failed_retry_after.total_seconds())
+            raise Exception("skipping analyze as prediction failed on that site.")
         return site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db
     
 
-    def handle_noreprocess(url):
+    def handle_noreprocess(url, site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db)->api.SiteAnalysisResult:
         log.mal2_rest_log.info("handle_noreprocess: checking for existing entry for url %s",url)
-        site_db = db.get_site_db_entry_by_url(url)
-        xg_prediction_db = None
-        rf_prediction_db = None
-        nn_prediction_db = None
         #check site known
         if site_db == None:
             # unknown site - re-process
             log.mal2_rest_log.info("unknown site - process url %s",url)
-            site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db = handle_reprocess(url)
-        else:
-            #check on an existing prediction
-            xg_prediction_db = db.get_prediction_db_entry_by_site(site_db,"xgboost")
-            rf_prediction_db = db.get_prediction_db_entry_by_site(site_db,"random_forest")
-            nn_prediction_db = db.get_prediction_db_entry_by_site(site_db,"neural_net")
-            if xg_prediction_db == None or rf_prediction_db==None or nn_prediction_db==None:
-                #no prediction - re-process
-                log.mal2_rest_log.info("no existing aggregated prediction possible - reprocess url %s",url)
-                site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db = handle_reprocess(url)
-            else:
-                log.mal2_rest_log.info("returning existing predictions %s and %s and %s for url %s",xg_prediction_db.__repr__,rf_prediction_db.__repr__, nn_prediction_db.__repr__, url)
+            #None hands the site over to the analysis job queue (async mode) or to predicting within the prediction budget below
+            return None
+        #check on an existing prediction
+        if xg_prediction_db == None or rf_prediction_db==None or nn_prediction_db==None:
+            #no prediction - re-process
+            log.mal2_rest_log.info("no existing aggregated prediction possible - reprocess url %s",url)
+            return None
+        log.mal2_rest_log.info("returning existing predictions %s and %s and %s for url %s",xg_prediction_db.__repr__,rf_prediction_db.__repr__, nn_prediction_db.__repr__, url)
+        return __build_mal2_ai_SiteAnalysisResult(site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db)
+
+    def reprocess_SiteAnalysisResult()->api.SiteAnalysisResult:
+        def reprocess():
+            #read-your-writes - the claim, the committed predictions and the results of other processes are read from the primary
+            with db.primary_reads():
+                return __build_mal2_ai_SiteAnalysisResult(*handle_reprocess(url))
+        #coalesce concurrent analyses of the same url within this process - waiting requests release their db session and share the owner's result
+        try:
+            return single_flight.do(url, reprocess, on_wait=db.Session.remove, timeout=processing_wait_timeout)
+        except FutureTimeoutError:
+            log.mal2_rest_log.info("skipping analyze, as getting prediction on site %s is being currently processed by different request"%(url))
+            raise Exception("skipping analyze as prediction is currently beeing processed on that site.")
 
-        return site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db
-    
-    def translate_model_score(model_score:float):
-        #translates score to fake-shop db risk_types very low, low, below average, above average, high, very high, unknown
-        #https://db-dev.malzwei.at/admin/mal2_db/websiteriskscore/
-        #risk_score: rest-api allowed_values = ["very low", "low", "below average", "above average", "high", "very high", "unknown"]
-        range_low = np.arange(0, 100, 0.01)
-        score = model_score * 100
-        if np.logical_and(score >= 0, score < 10):
-            return "very low"
-        elif np.logical_and(score >= 10, score < 25):
-            return "low"
-        elif np.logical_and(score >= 25, score < 50):
-            return "below average"
-        elif np.logical_and(score >= 50, score < 80):
-            return "above average"
-        elif np.logical_and(score >= 80, score < 90):
-            return "high"
-        elif np.logical_and(score >= 90, score <=100):
-            return "very high"
-        else:
-            return "unknown"
-    
     def check_site_is_online(url:str):
         """
-        probes if a website returns status 200 otherwise raises exception
+        probes if a website is online otherwise raises exception. Uses a pooled, cached liveness probe with strict timeouts
         Args:
             url (str): baseurl e.g. malzwei.at to probe
         Returns:
-            None - raises Exception if status != 200
+            None - raises Exception if site is offline, site_liveness.ProbeBusy if its liveness is unknown
         """
         try:
-            resp = requests.get("http://"+url, headers={'User-Agent': 'Mozilla/5.0'}, verify=False)
-            resp.raise_for_status()
-        except Exception as err:
-            log.mal2_rest_log.info("don't call analyze, as site %s is down with err: %s"%(url,err))
-            #exception forwarded to ui
-            raise Exception("website is offline") 
-
-    def check_site_is_processing(url:str):
+            site_liveness.check_site_is_online(url)
+        except site_liveness.ProbeBusy:
+            #liveness unknown - not recorded as offline
+            raise
+        except Exception as e:
+            record_negative_outcome(negative_cache.OFFLINE, site_liveness.offline_ttl)
+            raise e
+
+    def record_negative_outcome(outcome:str, ttl:float):
+        #re-processing sites that have a verdict must not block answering it to other requests
+        if reprocess != True:
+            #the in-process cache isn't invalidated by predictions of other processes - re-check the db after negative_recheck_after at the latest
+            negative_cache.put(url, outcome, min(ttl, negative_recheck_after))
+
+    def claim_site_processing(url:str):
         """
-        gate-keeper function, checks the db processingstatus db table to either determine if a different request is currently processing/predicting on that 
-        url or if predicting on that url has previously failed if so raises exception
+        gate-keeper function, atomically claims predicting on that url across all processes via the processingstatus db table. The claim is refused 
+        if a different request is currently processing/predicting on that url (or completed within the last day unless re-processing) or if predicting
+        on that url has failed within the last 7 days
         Args:
-            url (str): baseurl e.g. malzwei.at to check on status
+            url (str): baseurl e.g. malzwei.at to claim
         Returns:
-            None - raises Exception if processing should be skipped
+            bool - True if this request owns predicting on that url
         """
-        #check prediction previously failed - raises immediately?
-        check_site_has_failed_processing(url)
-
-        #FIXME plugin fires 3-5 analyze requests within few milli-seconds, to avoid bypassing before db processing status was set define random sleep
-        #introducing thread sleep for a random period between 0 and 10 seconds and re-check db before returning status which allows one thread to win race
-        sleep(random.uniform(0, 12)) #output random.uniform is float
-        log.mal2_rest_log.debug("gatekeeper after sleep for %s"%(url))
-
-        #re-check failed
-        check_site_has_failed_processing(url)
-        #check currently processing?
-        pred_status_db = db.get_predictionstatus_db_entry_by_url(url)
-
-        if pred_status_db != None and (
-            pred_status_db.status == db_model.EnumPredictionProcessingStatus.processing or
-            pred_status_db.status == db_model.EnumPredictionProcessingStatus.completed):
-            # if occurred within last day raise 'site is processing'
-            d = dt.datetime.today() - dt.timedelta(days=1)
-            if pred_status_db.timestamp > d:
-                log.mal2_rest_log.info("skipping analyze, as getting prediction on site %s is being currently processed by different request"%(url))
-                raise Exception("skipping analyze as prediction is currently beeing processed on that site.")
-
-
-    def check_site_has_failed_processing(url:str):
+        processing_since = dt.datetime.today() - processing_expires_after
+        failed_since = dt.datetime.today() - failed_retry_after
+        claimed, pred_status_db = db.claim_predictionstatus_db_entry(url, processing_since, failed_since, reprocess=reprocess == True)
+        if not claimed:
+            log.mal2_rest_log.info("not claiming analyze on site %s, prediction status is %s"%(url,pred_status_db.status))
+        return claimed
+
+    def wait_for_site_processing(url:str):
         """
-        checks the db processingstatus db table to determine if predicting on that url has previously failed if so raises exception
+        waits for the request that owns predicting on that url (see claim_site_processing) and fetches its predictions from db as soon as they were 
+        committed. Polls the processingstatus db table and releases the db session in between
         Args:
-            url (str): baseurl e.g. malzwei.at to check on status
+            url (str): baseurl e.g. malzwei.at to wait for
         Returns:
-            None - raises Exception if processing has previously failed and i.e. should be skipped
+            db_model.Site, db_model.Prediction - site and the xgboost, random_forest and neural_net predictions - raises Exception if processing 
+            failed or did not finish in time
         """
-        #check prediction previously failed?
-        pred_status_db = db.get_predictionstatus_db_entry_by_url(url, db_model.EnumPredictionProcessingStatus.failed)
-        if pred_status_db != None:
-            # if occurred within last 7 days ago raise 'failed to get prediction' - else retry
-            d = dt.datetime.today() - dt.timedelta(days=7)
-            if pred_status_db.timestamp > d:
+        wait_until = monotonic() + processing_wait_timeout
+        while True:
+            pred_status_db = db.get_predictionstatus_db_entry_by_url(url)
+            status = pred_status_db.status if pred_status_db else None
+            if status == db_model.EnumPredictionProcessingStatus.completed:
+                site_db, list_db, xg_prediction_db, rf_prediction_db, nn_prediction_db = db.get_site_verdict_db_entries_by_url(url)
+                if site_db == None or xg_prediction_db == None or rf_prediction_db == None or nn_prediction_db == None:
+                    log.mal2_rest_log.warn("prediction processing completed but failed to get predictions for url: %s",url)
+                    raise Exception("database error")
+                log.mal2_rest_log.info("returning predictions of different request for url %s",url)
+                return site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db
+            if status == db_model.EnumPredictionProcessingStatus.failed:
                 log.mal2_rest_log.info("skipping analyze, as getting prediction on site %s has previously failed"%(url))
+                record_negative_outcome(negative_cache.FAILED, (pred_status_db.timestamp + failed_retry_after - dt.datetime.today()).total_seconds())
                 raise Exception("skipping analyze as prediction previously failed on that site.")
+            if monotonic() > wait_until:
+                log.mal2_rest_log.info("skipping analyze, as getting prediction on site %s is being currently processed by different request"%(url))
+                #processing may complete in a different process any time - re-checked after negative_recheck_after at the latest
+                if pred_status_db != None:
+                    record_negative_outcome(negative_cache.PROCESSING, (pred_status_db.timestamp + processing_expires_after - dt.datetime.today()).total_seconds())
+                raise Exception("skipping analyze as prediction is currently beeing processed on that site.")
+            #don't hold a db connection while waiting
+            db.Session.remove()
+            sleep(processing_poll_interval)
         
 
     def get_SiteAnalysisResult()->api.SiteAnalysisResult:
+        #resolve the site, its best list entry and the latest predictions within one db round trip
+        site_db, list_db, xg_prediction_db, rf_prediction_db, nn_prediction_db = db.get_site_verdict_db_entries_by_url(url)
         
-        def get_bwgi_list_SiteAnalysisResult()->api.SiteAnalysisResult:
-            """chekcs and fetches a SiteAnalysisResult for elements in white, black grey and ignore lists for this site or None if site in no list
-
-            Returns:
-                [SiteAnalysisResult] -- swagger model SiteAnalysisResult return object or None
-            """
-            #allowed processors values are ['whitelist', 'blacklist', 'greylist', 'ignorelist', 'mal2_ai']
-            site_db = db.get_site_db_entry_by_url(url)
-            if site_db:
-                if site_db.status == db_model.EnumSiteStatus.ignore:
-                    #respond with ignorelist
-                    ignorelist_db = db.get_best_ignorelist_db_entry_by_url(url)
-                    if not ignorelist_db:
-                        log.mal2_rest_log.warn("build get_SiteAnalysisResult failed to get ignorelist entry for url: %s",url)
-                        raise Exception("database error") 
-                    log.mal2_rest_log.info("respond with ignorelist SiteAnalysisResult for %s and status: %s",url,site_db.status)
-                    return api.SiteAnalysisResult(site_id=site_db.id,site_url=site_db.url,analyzed_date_time=ignorelist_db.timestamp,processor="ignorelist",risk_score=translate_model_score(-1))
-                elif site_db.status == db_model.EnumSiteStatus.greylist:
-                    #respond with greylist
-                    greylist_db = db.get_best_greylist_db_entry_by_url(url)
-                    if not greylist_db:
-                        log.mal2_rest_log.warn("build get_SiteAnalysisResult failed to get greylist entry for url: %s",url)
-                        raise Exception("database error") 
-                    log.mal2_rest_log.info("respond with greylist SiteAnalysisResult for %s and status: %s",url,site_db.status)
-                    return api.SiteAnalysisResult(site_id=site_db.id,site_url=site_db.url,analyzed_date_time=greylist_db.timestamp,processor="greylist",risk_score=translate_model_score(-1))
-                elif site_db.status == db_model.EnumSiteStatus.blacklist:
-                    #respond with blacklist
-                    blacklist_db = db.get_best_blacklist_db_entry_by_url(url)
-                    if not blacklist_db:
-                        log.mal2_rest_log.warn("build get_SiteAnalysisResult failed to get blacklist entry for url: %s",url)
-                        raise Exception("database error") 
-                    log.mal2_rest_log.info("respond with blacklist SiteAnalysisResult for %s and status: %s",url,site_db.status)
-                    return api.SiteAnalysisResult(site_id=site_db.id,site_url=site_db.url,analyzed_date_time=blacklist_db.timestamp,processor="blacklist",risk_score=translate_model_score(1))
-                elif site_db.status == db_model.EnumSiteStatus.whitelist:
-                    #respond with whitelist
-                    whitelist_db = db.get_best_whitelist_db_entry_by_url(url)
-                    if not whitelist_db:
-                        log.mal2_rest_log.warn("build get_SiteAnalysisResult failed to get whitelist entry for url: %s",url)
-                        raise Exception("database error") 
-                    log.mal2_rest_log.info("respond with whitelist SiteAnalysisResult for %s and status: %s",url,site_db.status)
-                    return api.SiteAnalysisResult(site_id=site_db.id,site_url=site_db.url,analyzed_date_time=whitelist_db.timestamp,processor="whitelist",risk_score=translate_model_score(0))
-            return None
-
-        bwi_list_result = get_bwgi_list_SiteAnalysisResult()
+        bwi_list_result = __build_list_SiteAnalysisResult(site_db, list_db)
 
         if bwi_list_result:
             #return swagger_server blacklist, whitelist or ignorelist return object
@@ -337,22 +413,149 @@ def analyze_post(site:api.Site)->api.SiteAnalysisResult:
             log.mal2_rest_log.info("respond with mal2_ai SiteAnalysisResult for %s",url)
             
             if reprocess==True:
-                #obey reprocess flag
-                site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db = handle_reprocess(url)
+                #obey reprocess flag - predicted as unknown sites are
+                return None
             else:
                 #reply with existing prediction from db (if available) or process unknown site
-                site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db = handle_noreprocess(url)
-            
-            #create and return swagger_server return object
-            aggr_fake_score = (xg_prediction_db.prediction + rf_prediction_db.prediction + nn_prediction_db.prediction) / 3
-            return api.SiteAnalysisResult(site_id=site_db.id,site_url=site_db.url,analyzed_date_time=xg_prediction_db.timestamp,processor="mal2_ai",risk_score=translate_model_score(aggr_fake_score))
+                return handle_noreprocess(url, site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db)
         
-    ret = get_SiteAnalysisResult()
+    #known sites and cold predictions are admitted within separate budgets (analysis jobs are bounded by their worker pool)
+    #i.e. cold predictions never starve answering known sites - raises admission.AdmissionRejected
+    with admission.admit(admission.LOOKUP) if check_load else nullcontext():
+        ret = get_SiteAnalysisResult()
+    if ret == None and respond_async != True:
+        #don't hold a db connection while waiting for a prediction slot
+        db.Session.remove()
+        with admission.admit(admission.PREDICTION, clientID) if check_load else nullcontext():
+            ret = reprocess_SiteAnalysisResult()
+    if ret == None:
+        #async mode - enqueue the prediction as analysis job and respond with 202 Accepted
+        job_db = analysis_job_queue.enqueue(url, clientID)
+        ret = __build_AnalysisJob(job_db)
+        log.mal2_rest_log.debug("removing db session %s",db.Session)
+        db.Session.remove()
+        return ret, 202
+    verdict_cache.put(url, ret)
     #remove db session (and auto-create new Session)
     log.mal2_rest_log.debug("removing db session %s",db.Session)
     db.Session.remove()
     return ret
 
+def analyze_batch_post(sites:List[api.Site])->List[api.SiteAnalysisResult]:
+    log.mal2_rest_log.info("analyze_batch_post for %s sites",len(sites))
+
+    if len(sites) > max_batch_size:
+        raise ValueError("max %s sites per batch request"%max_batch_size)
+
+    #normalize and dedupe - keeps the order of the first occurrence
+    urls = []
+    client_ids = {}
+    for site in sites:
+        url = extract_base_url(site._site_base_url)
+        if url not in client_ids:
+            urls.append(url)
+            client_ids[url] = site._client_id
+
+    results = {}
+    #the lookups are admitted as one - the unknown sites are admitted as one within the prediction budget
+    with admission.admit(admission.LOOKUP):
+        #answer known sites from the in-process verdict cache and the domain index
+        for url in urls:
+            cached_result = verdict_cache.get(url)
+            if cached_result:
+                results[url] = cached_result
+                continue
+            index_entry = domain_index.get(url)
+            if index_entry:
+                results[url] = __build_indexed_SiteAnalysisResult(index_entry)
+
+        #resolve all other known sites within one db round trip
+        verdicts = db.get_site_verdict_db_entries_by_urls([url for url in urls if url not in results])
+        for url, (site_db, list_db, xg_prediction_db, rf_prediction_db, nn_prediction_db) in verdicts.items():
+            try:
+                result = __build_list_SiteAnalysisResult(site_db, list_db)
+                if result == None and xg_prediction_db != None and rf_prediction_db != None and nn_prediction_db != None:
+                    result = __build_mal2_ai_SiteAnalysisResult(site_db, xg_prediction_db, rf_prediction_db, nn_prediction_db)
+            except Exception as e:
+                log.mal2_rest_log.warn("analyze_batch_post failed to build result for %s: %s",url,e)
+                continue
+            if result:
+                verdict_cache.put(url, result)
+                results[url] = result
+        #don't hold a db connection while processing unknown sites
+        db.Session.remove()
+
+    def process_unknown(url):
+        try:
+            #admitted per site within the prediction budget of its own client - a rejected site doesn't reject the batch
+            result = analyze_post(api.Site(site_base_url="http://"+url, re_process=False, client_id=client_ids[url]))
+        except Exception as e:
+            log.mal2_rest_log.info("analyze_batch_post failed to analyze %s: %s",url,e)
+            #no verdict - reported per site instead of a made up mal2_ai result
+            result = api.SiteAnalysisResult(site_url=url, risk_score="unknown", error=str(e))
+        finally:
+            db.Session.remove()
+        return result
+
+    #process unknown sites with bounded parallelism - a client's own sites beyond its prediction budget would be rejected right away
+    unknown_urls = [url for url in urls if url not in results]
+    if unknown_urls:
+        log.mal2_rest_log.info("analyze_batch_post processing %s unknown sites",len(unknown_urls))
+        workers = min(max_batch_workers, len(unknown_urls))
+        if admission.budgets[admission.PREDICTION].max_per_client > 0:
+            workers = min(workers, admission.budgets[admission.PREDICTION].max_per_client*len(set(client_ids[url] for url in unknown_urls)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for url, result in zip(unknown_urls, executor.map(process_unknown, unknown_urls)):
+                results[url] = result
+
+    return [results[url] for url in urls]
+
+def process_analysis_job(url:str, client_id:str=None)->api.SiteAnalysisResult:
+    """runs the (synchronous) analysis of an enqueued analysis job - called by the analysis job queue workers
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+        client_id {str} -- client ID of the requesting client
+
+    Returns:
+        SiteAnalysisResult -- swagger model SiteAnalysisResult - raises Exception if the analysis failed
+    """
+    #the worker pool is bounded itself - no load check required
+    return analyze_post(api.Site(site_base_url="http://"+url, re_process=False, client_id=client_id), check_load=False)
+
+def __build_AnalysisJob(job_db:db_model.AnalysisJob)->api.AnalysisJob:
+    ret = api.AnalysisJob(
+        job_id=job_db.job_id,
+        site_url=job_db.url,
+        status=job_db.status.value,
+        created_date_time=job_db.created,
+        error=job_db.error
+    )
+    if job_db.status == db_model.EnumAnalysisJobStatus.completed:
+        ret.result = api.SiteAnalysisResult(site_id=job_db.site_id,site_url=job_db.url,analyzed_date_time=job_db.analyzed_date_time,processor=job_db.processor,risk_score=job_db.risk_score)
+    return ret
+
+def analyze_job_id_get(job_id, wait=None, clientID=None)->api.AnalysisJob:
+    log.mal2_rest_log.info("analyze_job_id_get job_id %s, wait %s, clientId %s",job_id,wait,clientID)
+
+    if wait:
+        try:
+            wait = int(wait)
+        except:
+            raise ValueError("wait not a valid integer")
+        if wait < 0 or wait > max_job_wait:
+            raise ValueError("wait between 0 and %s seconds required"%max_job_wait)
+        #long polling - doesn't hold a db connection (nor a lookup slot) while waiting
+        job_db = analysis_job_queue.wait_for_job(job_id, wait)
+    else:
+        with admission.admit(admission.LOOKUP):
+            job_db = db.get_analysisjob_db_entry_by_job_id(job_id)
+    if not job_db:
+        raise LookupError("unknown analysis job")
+
+    ret = __build_AnalysisJob(job_db)
+    return ret
+
 def __validate_inputs(limit,offset):
     if offset:
         try:
@@ -381,14 +584,167 @@ def __init_limit_and_offset_params(limit,offset):
         query_limit = 0
     return query_limit, query_offset
 
-def __build_BlacklistEntry(blacklist_db:db_model.Blacklist)->api.BlackListEntry:
+def __encode_cursor(site_id:int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"site_id": site_id}).encode("utf-8")).decode("ascii")
+
+def __decode_cursor(cursor:str) -> int:
+    try:
+        site_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))["site_id"]
+    except:
+        raise ValueError("cursor not valid")
+    if not isinstance(site_id, int):
+        raise ValueError("cursor not valid")
+    return site_id
+
+def __is_all_list_entries_request(limit, offset, all, cursor) -> bool:
+    return not cursor and ((all == True) or (not offset and not limit))
+
+def __get_list_mimetype() -> str:
+    return connexion.request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"]) or "application/json"
+
+def __send_all_list_entries(list_name:str, view_model, build_entry):
+    """sends all entries of a list - the pre-rendered snapshot if available, otherwise streamed from the db
+
+    Arguments:
+        list_name {str} -- e.g. blacklist
+        view_model -- db_model.BestBlacklist, db_model.BestGreylist, db_model.BestWhitelist or db_model.BestIgnorelist
+        build_entry {function} -- builds the swagger model of a db list entry e.g. __build_BlacklistEntry
+
+    Returns:
+        Response -- flask response
+    """
+    snapshot = list_snapshot.get(list_name)
+    #snapshots are rendered as json array only
+    if snapshot and __get_list_mimetype() == "application/json":
+        return list_snapshot.send(snapshot, connexion.request)
+    #read before streaming - the streamed entries contain at least the changes up to this version. Both are read from the primary,
+    #a replica may lag behind the version i.e. miss changes the client would never fetch again
+    version = db.get_list_version(list_name)
+    return __stream_list_entries(db.stream_all_best_list_db_entries(view_model, replica=False), build_entry, version)
+
+def __stream_list_entries(entries_db, build_entry, version:int=None):
+    """streams all list entries as json array - or newline delimited json if requested via the Accept header - straight into the response
+    instead of building and serializing the full list in memory
+
+    Arguments:
+        entries_db {Iterator} -- lazily fetched db list entries e.g. db.stream_all_best_list_db_entries
+        build_entry {function} -- builds the swagger model of a db list entry e.g. __build_BlacklistEntry
+
+    Keyword Arguments:
+        version {int} -- published list change log version sent as X-List-Version header (default: {None})
+
+    Returns:
+        Response -- streamed flask response
+    """
+    mimetype = __get_list_mimetype()
+
+    def generate():
+        count = 0
+        try:
+            if mimetype == "application/x-ndjson":
+                for entry_db in entries_db:
+                    yield json.dumps(build_entry(entry_db), cls=encoder.JSONEncoder)+"\n"
+                    count += 1
+            else:
+                yield "["
+                for entry_db in entries_db:
+                    yield ("," if count > 0 else "")+json.dumps(build_entry(entry_db), cls=encoder.JSONEncoder)
+                    count += 1
+                yield "]"
+            log.mal2_rest_log.info("streamed %s list entries",count)
+        except Exception as e:
+            #the status is already sent - the truncated body is invalid json which the client detects
+            log.mal2_rest_log.exception("streaming list entries failed after %s entries: %s",count,e)
+        finally:
+            #the request's session was already removed - streaming runs on its own session
+            db.Session.remove()
+
+    response = Response(generate(), mimetype=mimetype)
+    if version != None:
+        response.headers["X-List-Version"] = str(version)
+    return response
+
+def __get_all_best_list_db_entries(get_all_best_db_entries, limit, offset, all, cursor):
+    """fetches the requested page of best list entries - either the page after the cursor (keyset pagination)
+    or the page with the given offset (legacy page number)
+
+    Arguments:
+        get_all_best_db_entries {function} -- db handler e.g. db.get_all_best_blacklist_db_entries
+
+    Returns:
+        list -- the db list entries ordered by site_id
+        int -- the pagesize
+    """
+    if cursor:
+        #the cursor takes precedence - a client that follows the next link is paging
+        __validate_inputs(limit,None)
+        pagesize = limit if limit else default_page_size
+        return get_all_best_db_entries(pagesize=pagesize, after_site_id=__decode_cursor(cursor)), pagesize
+    pagesize, page = __init_limit_and_offset_params(limit,offset)
+    return get_all_best_db_entries(pagesize=pagesize,page=page), pagesize
+
+def __build_list_page(entries, entries_db, pagesize):
+    #a full page - further entries may follow after its last site
+    if pagesize and len(entries_db) == pagesize:
+        next_page = urlencode({"limit": pagesize, "cursor": __encode_cursor(entries_db[-1].site_id)})
+        #relative to the request url (RFC 8288) - the absolute url of the api process differs from the public one behind the proxy
+        return entries, 200, {"Link": '<?%s>; rel="next"'%next_page}
+    return entries
+
+def __get_list_changes(list_name:str, view_model, build_entry, since, limit):
+    """fetches the changes of a list since the version the client is at - sites added or changed are returned with their current
+    best list entry, sites removed from the list with their site_id only
+
+    Arguments:
+        list_name {str} -- e.g. blacklist
+        view_model -- db_model.BestBlacklist, db_model.BestGreylist, db_model.BestWhitelist or db_model.BestIgnorelist
+        build_entry {function} -- builds the swagger model of a db list entry e.g. __build_BlacklistEntry
+        since {int} -- version the client is at e.g. X-List-Version of the full list or version of the previous changes
+        limit {int} -- max number of changed sites returned
+
+    Returns:
+        api.ListChanges -- the changes or a 410 response if the client has to re-download the full list
+    """
+    try:
+        since = int(since)
+    except:
+        raise ValueError("since not a valid integer")
+    if since < 0:
+        raise ValueError("since larger or equal zero required")
+    __validate_inputs(limit,None)
+    pagesize = int(limit) if limit else default_page_size
+
+    #only changes contained in the refreshed best list entries are published
+    min_version, version = db.get_list_change_range(list_name)
+    if since > version or since < min_version:
+        #e.g. the db was re-initialized or the changes since the client's version were removed from the log - see db.list_change_retention
+        detail = "unknown %s version %s - re-download all entries"%(list_name,since)
+        return {"detail": detail, "status": 410, "title": "Gone", "type": "about:blank"}, 410
+
+    #fetch one more to detect further changes
+    changes_db = db.get_list_changes_db_entries(view_model, since, version, pagesize+1)
+    has_more = len(changes_db) > pagesize
+    if has_more:
+        changes_db = changes_db[:pagesize]
+        version = changes_db[-1].version
+
+    upserted = []
+    deleted = []
+    for site_id, _, entry_db in changes_db:
+        if entry_db != None:
+            upserted.append(build_entry(entry_db))
+        else:
+            deleted.append(site_id)
+    return api.ListChanges(version=version, has_more=has_more, upserted=upserted, deleted=deleted)
+
+def __build_BlacklistEntry(blacklist_db:db_model.BestBlacklist)->api.BlackListEntry:
     ret = api.BlackListEntry(
         site_id=blacklist_db.site.id,
         site_base_url=blacklist_db.site.url,
-        blacklist_name=blacklist_db.blacklist_source.name.value,
-        blacklist_description=blacklist_db.blacklist_source.description,
-        blacklist_logo= blacklist_db.blacklist_source.logo_url,
-        blacklist_url = blacklist_db.blacklist_source.url,
+        blacklist_name=blacklist_db.source_name.value,
+        blacklist_description=blacklist_db.source_description,
+        blacklist_logo= blacklist_db.source_logo_url,
+        blacklist_url = blacklist_db.source_url,
         site_added_date=blacklist_db.timestamp,
         site_type=blacklist_db.type.value,
         site_screenshot=blacklist_db.screenshot_link,
@@ -396,38 +752,26 @@ def __build_BlacklistEntry(blacklist_db:db_model.Blacklist)->api.BlackListEntry:
     )
     return ret
 
-def blacklist_get(limit=None, offset=None, all=None, clientID=None)->List[api.BlackListEntry]:
-    log.mal2_rest_log.info("blacklist_get limit %s, offset %s, all %s, clientId %s",limit,offset,all,clientID)
+@__admitted(admission.LIST)
+def blacklist_get(limit=None, offset=None, all=None, clientID=None, cursor=None)->List[api.BlackListEntry]:
+    log.mal2_rest_log.info("blacklist_get limit %s, offset %s, all %s, cursor %s, clientId %s",limit,offset,all,cursor,clientID)
 
-    #sanity check for all public controller methods on service load
-    load_ok, feedback = check_db_load_ok()
-    if load_ok == False:
-        #return 401 which client can specifically target
-        return feedback, 401
+    if __is_all_list_entries_request(limit,offset,all,cursor):
+        return __send_all_list_entries("blacklist", db_model.BestBlacklist, __build_BlacklistEntry)
 
     ret = []
-    if (all == True) or (not offset and not limit):
-        # return all blacklists (note most current one per site if multiple from different bl sources exist per site)
-        #get all sites
-        bl_entries_db = db.get_all_best_blacklist_db_entries()
-    else:
-        pagesize, page = __init_limit_and_offset_params(limit,offset)
-        bl_entries_db = db.get_all_best_blacklist_db_entries(pagesize=pagesize,page=page)
+    #most current entry per site if multiple from different sources exist per site
+    bl_entries_db, pagesize = __get_all_best_list_db_entries(db.get_all_best_blacklist_db_entries,limit,offset,all,cursor)
     
     for blacklist_db in bl_entries_db:
         entry = __build_BlacklistEntry(blacklist_db)
         ret.append(entry)
-    return ret
+    return __build_list_page(ret, bl_entries_db, pagesize)
 
+@__admitted(admission.LOOKUP)
 def blacklist_site_id_get(site_id, clientID=None)->api.BlackListEntry: 
     log.mal2_rest_log.info("blacklist_site_id_get site_id %s, clientId %s",site_id,clientID)
 
-    #sanity check for all public controller methods on service load
-    load_ok, feedback = check_db_load_ok()
-    if load_ok == False:
-        #return 401 which client can specifically target
-        return feedback, 401
-
     try:
         site_id = int(site_id)
     except:
@@ -441,14 +785,20 @@ def blacklist_site_id_get(site_id, clientID=None)->api.BlackListEntry:
     ret = __build_BlacklistEntry(blacklist_db)
     return ret
 
-def __build_GreylistEntry(greylist_db:db_model.Greylist)->api.GreyListEntry:
+@__admitted(admission.LIST)
+def blacklist_changes_get(since, limit=None, clientID=None)->api.ListChanges:
+    log.mal2_rest_log.info("blacklist_changes_get since %s, limit %s, clientId %s",since,limit,clientID)
+
+    return __get_list_changes("blacklist", db_model.BestBlacklist, __build_BlacklistEntry, since, limit)
+
+def __build_GreylistEntry(greylist_db:db_model.BestGreylist)->api.GreyListEntry:
     ret = api.GreyListEntry(
         site_id=greylist_db.site.id,
         site_base_url=greylist_db.site.url,
-        greylist_name=greylist_db.greylist_source.name.value,
-        greylist_description=greylist_db.greylist_source.description,
-        greylist_logo= greylist_db.greylist_source.logo_url,
-        greylist_url = greylist_db.greylist_source.url,
+        greylist_name=greylist_db.source_name.value,
+        greylist_description=greylist_db.source_description,
+        greylist_logo= greylist_db.source_logo_url,
+        greylist_url = greylist_db.source_url,
         site_added_date=greylist_db.timestamp,
         site_type=greylist_db.type.value,
         site_screenshot=greylist_db.screenshot_link,
@@ -456,38 +806,26 @@ def __build_GreylistEntry(greylist_db:db_model.Greylist)->api.GreyListEntry:
     )
     return ret
 
-def greylist_get(limit=None, offset=None, all=None, clientID=None)->List[api.GreyListEntry]:
-    log.mal2_rest_log.info("greylist_get limit %s, offset %s, all %s, clientId %s",limit,offset,all,clientID)
+@__admitted(admission.LIST)
+def greylist_get(limit=None, offset=None, all=None, clientID=None, cursor=None)->List[api.GreyListEntry]:
+    log.mal2_rest_log.info("greylist_get limit %s, offset %s, all %s, cursor %s, clientId %s",limit,offset,all,cursor,clientID)
 
-    #sanity check for all public controller methods on service load
-    load_ok, feedback = check_db_load_ok()
-    if load_ok == False:
-        #return 401 which client can specifically target
-        return feedback, 401
+    if __is_all_list_entries_request(limit,offset,all,cursor):
+        return __send_all_list_entries("greylist", db_model.BestGreylist, __build_GreylistEntry)
 
     ret = []
-    if (all == True) or (not offset and not limit):
-        # return all greylists (note most current one per site if multiple from different bl sources exist per site)
-        #get all sites
-        gl_entries_db = db.get_all_best_greylist_db_entries()
-    else:
-        pagesize, page = __init_limit_and_offset_params(limit,offset)
-        gl_entries_db = db.get_all_best_greylist_db_entries(pagesize=pagesize,page=page)
+    #most current entry per site if multiple from different sources exist per site
+    gl_entries_db, pagesize = __get_all_best_list_db_entries(db.get_all_best_greylist_db_entries,limit,offset,all,cursor)
     
     for greylist_db in gl_entries_db:
         entry = __build_GreylistEntry(greylist_db)
         ret.append(entry)
-    return ret
+    return __build_list_page(ret, gl_entries_db, pagesize)
 
+@__admitted(admission.LOOKUP)
 def greylist_site_id_get(site_id, clientID=None)->api.GreyListEntry: 
     log.mal2_rest_log.info("greylist_site_id_get site_id %s, clientId %s",site_id,clientID)
 
-    #sanity check for all public controller methods on service load
-    load_ok, feedback = check_db_load_ok()
-    if load_ok == False:
-        #return 401 which client can specifically target
-        return feedback, 401
-
     try:
         site_id = int(site_id)
     except:
@@ -501,59 +839,53 @@ def greylist_site_id_get(site_id, clientID=None)->api.GreyListEntry:
     ret = __build_GreylistEntry(greylist_db)
     return ret
 
-def __build_WhitelistEntry(whitelist_db:db_model.Whitelist)->api.WhiteListEntry:
+@__admitted(admission.LIST)
+def greylist_changes_get(since, limit=None, clientID=None)->api.ListChanges:
+    log.mal2_rest_log.info("greylist_changes_get since %s, limit %s, clientId %s",since,limit,clientID)
+
+    return __get_list_changes("greylist", db_model.BestGreylist, __build_GreylistEntry, since, limit)
+
+def __build_WhitelistEntry(whitelist_db:db_model.BestWhitelist)->api.WhiteListEntry:
     ret = api.WhiteListEntry(
         site_id=whitelist_db.site.id,
         site_base_url=whitelist_db.site.url,
-        whitelist_name=whitelist_db.whitelist_source.name.value,
-        whitelist_description=whitelist_db.whitelist_source.description,
-        whitelist_logo= whitelist_db.whitelist_source.logo_url,
-        whitelist_url = whitelist_db.whitelist_source.url,
+        whitelist_name=whitelist_db.source_name.value,
+        whitelist_description=whitelist_db.source_description,
+        whitelist_logo= whitelist_db.source_logo_url,
+        whitelist_url = whitelist_db.source_url,
         site_added_date=whitelist_db.timestamp,
         site_information_link=whitelist_db.information_link,
         whitelist_type=whitelist_db.type.value,
         #add the company details that are exposed through the api
-        company_name=whitelist_db.company.name,
-        company_street=whitelist_db.company.street,
-        company_zipcode=whitelist_db.company.zip_code,
-        company_country=whitelist_db.company.country,
-        company_city = whitelist_db.company.city,
-        company_logo = whitelist_db.company.logo_url
+        company_name=whitelist_db.company_name,
+        company_street=whitelist_db.company_street,
+        company_zipcode=whitelist_db.company_zip_code,
+        company_country=whitelist_db.company_country,
+        company_city = whitelist_db.company_city,
+        company_logo = whitelist_db.company_logo_url
     )
     return ret
 
-def whitelist_get(limit=None, offset=None, all=None, clientID=None)->List[api.WhiteListEntry]:
-    log.mal2_rest_log.info("whitelist_get limit %s, offset %s, all %s, clientId %s",limit,offset,all,clientID)
+@__admitted(admission.LIST)
+def whitelist_get(limit=None, offset=None, all=None, clientID=None, cursor=None)->List[api.WhiteListEntry]:
+    log.mal2_rest_log.info("whitelist_get limit %s, offset %s, all %s, cursor %s, clientId %s",limit,offset,all,cursor,clientID)
 
-    #sanity check for all public controller methods on service load
-    load_ok, feedback = check_db_load_ok()
-    if load_ok == False:
-        #return 401 which client can specifically target
-        return feedback, 401
+    if __is_all_list_entries_request(limit,offset,all,cursor):
+        return __send_all_list_entries("whitelist", db_model.BestWhitelist, __build_WhitelistEntry)
 
     ret = []
-    if (all == True) or (not offset and not limit):
-        # return all whitelists (note most current one per site if multiple from different bl sources exist per site)
-        #get all sites
-        wl_entries_db = db.get_all_best_whitelist_db_entries()
-    else:
-        pagesize, page = __init_limit_and_offset_params(limit,offset)
-        wl_entries_db = db.get_all_best_whitelist_db_entries(pagesize=pagesize,page=page)
+    #most current entry per site if multiple from different sources exist per site
+    wl_entries_db, pagesize = __get_all_best_list_db_entries(db.get_all_best_whitelist_db_entries,limit,offset,all,cursor)
     
     for whitelist_db in wl_entries_db:
         entry = __build_WhitelistEntry(whitelist_db)
         ret.append(entry)
-    return ret
+    return __build_list_page(ret, wl_entries_db, pagesize)
 
+@__admitted(admission.LOOKUP)
 def whitelist_site_id_get(site_id, clientID=None)->api.WhiteListEntry: 
     log.mal2_rest_log.info("whitelist_site_id_get site_id %s, clientId %s",site_id,clientID)
 
-    #sanity check for all public controller methods on service load
-    load_ok, feedback = check_db_load_ok()
-    if load_ok == False:
-        #return 401 which client can specifically target
-        return feedback, 401
-
     try:
         site_id = int(site_id)
     except:
@@ -567,50 +899,45 @@ def whitelist_site_id_get(site_id, clientID=None)->api.WhiteListEntry:
     ret = __build_WhitelistEntry(whitelist_db)
     return ret
 
-def __build_IgnorelistEntry(ignorelist_db:db_model.Ignorelist)->api.IgnoreListEntry:
+@__admitted(admission.LIST)
+def whitelist_changes_get(since, limit=None, clientID=None)->api.ListChanges:
+    log.mal2_rest_log.info("whitelist_changes_get since %s, limit %s, clientId %s",since,limit,clientID)
+
+    return __get_list_changes("whitelist", db_model.BestWhitelist, __build_WhitelistEntry, since, limit)
+
+def __build_IgnorelistEntry(ignorelist_db:db_model.BestIgnorelist)->api.IgnoreListEntry:
     ret = api.IgnoreListEntry(
         site_id=ignorelist_db.site.id,
         site_base_url=ignorelist_db.site.url,
-        ignorelist_name=ignorelist_db.ignorelist_source.name.value,
-        ignorelist_description=ignorelist_db.ignorelist_source.description,
-        ignorelist_logo= ignorelist_db.ignorelist_source.logo_url,
-        ignorelist_url = ignorelist_db.ignorelist_source.url,
+        ignorelist_name=ignorelist_db.source_name.value,
+        ignorelist_description=ignorelist_db.source_description,
+        ignorelist_logo= ignorelist_db.source_logo_url,
+        ignorelist_url = ignorelist_db.source_url,
         site_added_date=ignorelist_db.timestamp,
         site_type=ignorelist_db.category.value,
     )
     return ret
 
-def ignorelist_get(limit=None, offset=None, all=None, clientID=None)->List[api.IgnoreListEntry]:
-    log.mal2_rest_log.info("ignorelist_get limit %s, offset %s, all %s, clientId %s",limit,offset,all,clientID)
+@__admitted(admission.LIST)
+def ignorelist_get(limit=None, offset=None, all=None, clientID=None, cursor=None)->List[api.IgnoreListEntry]:
+    log.mal2_rest_log.info("ignorelist_get limit %s, offset %s, all %s, cursor %s, clientId %s",limit,offset,all,cursor,clientID)
 
-    #sanity check for all public controller methods on service load
-    load_ok, feedback = check_db_load_ok()
-    if load_ok == False:
-        #return 401 which client can specifically target
-        return feedback, 401
+    if __is_all_list_entries_request(limit,offset,all,cursor):
+        return __send_all_list_entries("ignorelist", db_model.BestIgnorelist, __build_IgnorelistEntry)
 
     ret = []
-    if (all == True) or (not offset and not limit):
-        # return all ignorelists sites 
-        il_entries_db = db.get_all_best_ignorelist_db_entries()
-    else:
-        pagesize, page = __init_limit_and_offset_params(limit,offset)
-        il_entries_db = db.get_all_best_ignorelist_db_entries(pagesize=pagesize,page=page)
+    #most current entry per site if multiple from different sources exist per site
+    il_entries_db, pagesize = __get_all_best_list_db_entries(db.get_all_best_ignorelist_db_entries,limit,offset,all,cursor)
     
     for ignorelist_db in il_entries_db:
         entry = __build_IgnorelistEntry(ignorelist_db)
         ret.append(entry)
-    return ret
+    return __build_list_page(ret, il_entries_db, pagesize)
 
+@__admitted(admission.LOOKUP)
 def ignorelist_site_id_get(site_id, clientID=None)->api.IgnoreListEntry: 
     log.mal2_rest_log.info("ignorelist_site_id_get site_id %s, clientId %s",site_id,clientID)
 
-    #sanity check for all public controller methods on service load
-    load_ok, feedback = check_db_load_ok()
-    if load_ok == False: 
-        #return 401 'unauthorized' which client can specifically target
-        return feedback, 401
-
     try:
         site_id = int(site_id)
     except:
@@ -622,4 +949,51 @@ def ignorelist_site_id_get(site_id, clientID=None)->api.IgnoreListEntry:
         raise Exception("site is not ignorelisted")
     
     ret = __build_IgnorelistEntry(ignorelist_db)
-    return ret
\ No newline at end of file
+    return ret
+
+@__admitted(admission.LIST)
+def ignorelist_changes_get(since, limit=None, clientID=None)->api.ListChanges:
+    log.mal2_rest_log.info("ignorelist_changes_get since %s, limit %s, clientId %s",since,limit,clientID)
+
+    return __get_list_changes("ignorelist", db_model.BestIgnorelist, __build_IgnorelistEntry, since, limit)
+
+def render_list_snapshots():
+    """renders the full white-, black-, grey- and ignorelists to versioned snapshot files that are sent on all entries requests
+    e.g. after importing list entries. A list keeps its previous snapshot if rendering fails
+    """
+    lists = [
+        ("blacklist", db_model.BestBlacklist, __build_BlacklistEntry),
+        ("greylist", db_model.BestGreylist, __build_GreylistEntry),
+        ("whitelist", db_model.BestWhitelist, __build_WhitelistEntry),
+        ("ignorelist", db_model.BestIgnorelist, __build_IgnorelistEntry)
+    ]
+    for list_name, view_model, build_entry in lists:
+        try:
+            version = db.get_list_version(list_name)
+            list_snapshot.render(list_name, (build_entry(entry_db) for entry_db in db.stream_all_best_list_db_entries(view_model)), version)
+        except Exception as e:
+            log.mal2_rest_log.warn("failed to render %s snapshot - keeping previous snapshot: %s",list_name,e)
+        finally:
+            db.Session.remove()
+
+def render_domain_set():
+    """renders the compact domain set of all listed sites from the domain index - requires a rebuilt domain_index. The previous
+    domain set is kept if rendering fails
+    """
+    sections = {processor: [] for processor, _ in __list_processors.values()}
+    for index_entry in domain_index.entries():
+        processor, _ = __list_processors[index_entry.status]
+        sections[processor].append(index_entry.url)
+    try:
+        domain_set.render(sections)
+    except Exception as e:
+        log.mal2_rest_log.warn("failed to render domain set - keeping previous domain set: %s",e)
+
+def domainset_get(clientID=None):
+    log.mal2_rest_log.info("domainset_get clientId %s",clientID)
+
+    snapshot = domain_set.get()
+    if not snapshot:
+        #temporarily unavailable - forwarded as 503 with Retry-After like a rejected admission
+        raise admission.AdmissionRejected("domain set is not available yet. Please try again later.", 503, domain_set.unavailable_retry_after)
+    return list_snapshot.send(snapshot, connexion.request, domain_set.mimetype)
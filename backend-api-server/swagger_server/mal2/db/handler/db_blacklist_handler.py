@@ -4,10 +4,15 @@ import swagger_server.mal2.sources.fakeshopdb.fake_shop_db_utils as fakeshopdb_u
 import swagger_server.mal2.sources.watchlistinternet.watchlist_internet as watchlistinternet
 import swagger_server.mal2.sources.waybackmachine.internet_archive as waybackmachine
 import swagger_server.mal2.db.handler.db_handler as db_handler
+import swagger_server.mal2.db.handler.db_bulk_import as db_bulk_import
+import swagger_server.mal2.sources.source_fetch as source_fetch
+import swagger_server.mal2.cache.verdict_cache as verdict_cache
 from swagger_server import logger_config as log
 from datetime import datetime
 
 last_import = None   
+#max imported entries per source (-1 imports all) - note: limit removed through sed in docker build
+import_limit = 10
 
 def check_reimport_required()->bool:
     """checks if a given timespan has passed since last import
@@ -40,26 +45,63 @@ def check_reimport_required()->bool:
         return False
 
 
-def import_blacklists():
-    """imports all blacklists - ignores the ones already existing in the local db
+def get_sources() -> list:
+    """returns the blacklist sources in import order
+
+    Returns:
+        list -- source_fetch.Source per blacklist source
+    """
+    return [
+        #watchlist-internet website csv blacklists
+        source_fetch.Source("watchlist_internet_blacklists", watchlistinternet.get_all_blacklist_entries, import_watchlist_internet_blacklists, import_limit=import_limit),
+        #mal2 fakeshop-db blacklists
+        source_fetch.Source("mal2_fake_shop_db_blacklists", lambda: fakeshopdb.get_all_blacklist_entries(import_limit), import_mal2_fake_shop_db_blacklists, import_limit=import_limit)
+    ]
+
+def fetch_blacklists(force:bool=False) -> dict:
+    """fetches all blacklist sources concurrently without db access (see source_fetch.fetch)
+
+    Keyword Arguments:
+        force {bool} -- fetch remote sources even if unchanged since the last import (default: {False})
+
+    Returns:
+        dict -- source name -> source_fetch.FetchResult
+    """
+    return source_fetch.fetch(get_sources(), force=force)
+
+def import_blacklists(fetched:dict=None, force:bool=False):
+    """imports all blacklists - only new, changed and removed entries are written to the local db
+
+    Keyword Arguments:
+        fetched {dict} -- the fetched blacklist sources (see fetch_blacklists) - fetched now if not given (default: {None})
+        force {bool} -- re-import sources fetched now even if unchanged since the last import (default: {False})
+
+    Returns:
+        bool -- True if the imported entries were published, False if refreshing the best entries failed
     """
     #set it to now - just to avoid thread issues
     global last_import 
     last_import = datetime.now()
     log.mal2_rest_log.info("import_blacklists")
-    #import watchlist-internet website csv blacklists
-    import_watchlist_internet_blacklists(limit_imported_items=10)
-    #import mal2 fakeshop-db blacklists
-    import_mal2_fake_shop_db_blacklists(limit_imported_items=10) 
+    if fetched == None:
+        fetched = fetch_blacklists(force=force)
+    for source in get_sources():
+        source_fetch.write(source, fetched)
+    #re-compute the best entry per site from the imported entries
+    refreshed = db_handler.refresh_best_list_db_entries(db_model.BestBlacklist)
+    #cached verdicts may be outdated by new blacklist entries
+    verdict_cache.invalidate_all()
+    if not refreshed:
+        #retried on the next import check
+        last_import = None
+    return refreshed
     
 
-def import_watchlist_internet_blacklists(limit_imported_items:int=-1):
+def import_watchlist_internet_blacklists(df_bl_blacklist, limit_imported_items:int=-1):
     """imports watchlist internet blacklist from watchlist internet csv sources
     """
     try:
         log.mal2_rest_log.info("import watchlist internet csv blacklists")
-        #query watchlist website csv endpoints
-        df_bl_blacklist = watchlistinternet.get_all_blacklist_entries()
         #create blacklist source if not exists
         db_bl_source_entry = db_handler.get_blacklistsource_db_entry_by_name(db_model.EnumBlacklistSources.watchlist_internet_listing)
         if not db_bl_source_entry:
@@ -82,15 +124,14 @@ def import_watchlist_internet_blacklists(limit_imported_items:int=-1):
             limit_imported_items= limit_imported_items)
     except Exception as e:
         log.mal2_rest_log.exception("failed import blacklist %s",e)
+        raise
 
 
-def import_mal2_fake_shop_db_blacklists(limit_imported_items:int=-1):
+def import_mal2_fake_shop_db_blacklists(df_fsdb_blacklist, limit_imported_items:int=-1):
     """imports watchlist internet blacklist from fake-shop db
     """
     try:
         log.mal2_rest_log.info("import mal2_fake_shop_db_blacklists")
-        #query mal2 fake-shop db for fake-shops listings
-        df_fsdb_blacklist = fakeshopdb.get_all_blacklist_entries(limit_imported_items)
         #create blacklist source if not exists
         db_bl_source_entry = db_handler.get_blacklistsource_db_entry_by_name(db_model.EnumBlacklistSources.mal2_fake_shop_db)
         if not db_bl_source_entry:
@@ -114,83 +155,42 @@ def import_mal2_fake_shop_db_blacklists(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import blacklist %s",e)
+        raise
 
 
 def __import_blacklist_data(db_bl_source_entry:db_model.BlacklistSource, source:db_model.EnumBlacklistSources, dataframe, limit_imported_items:int=-1):
     """common importer for blacklist entries via pandas dataframe that contain ['url'] and 
-    optional [website_type], ['created_at]
+    optional [website_type], ['created_at], ['screenshot_link']
     """
 
-    def check_df_data_exists(entry,key):
-        ret = True
-        try:
-            if entry[key] == None or len(str(entry[key])) <=0:
-                ret = False
-        except:
-            #in that case the column did not exist
-            return False
-        return ret
-
-  
     log.mal2_rest_log.info("start blacklist import for %s",source.value)
-    imported_count = 0
-    processed_count = 0
-    #import ignorelist entries into local db
-    for index, entry in dataframe.iterrows():
-        
-        #limit number of imports
-        if  limit_imported_items > 0 and processed_count >= limit_imported_items:
-                break
-        try:
-            processed_count += 1
-            #mandatory items
-            if not check_df_data_exists(entry,'url'):
-                raise Exception("url does not exist in imported pandas dataframe")
-
-            db_bl_entry =  db_handler.get_blacklist_db_entry_by_url_and_name(entry['url'],source)
-            #check if existing entry
-            if not db_bl_entry:
-                #check if site exists
-                db_site = db_handler.get_site_db_entry_by_url(entry['url'])
-                if not db_site:
-                    #create site or update site
-                    db_site = db_model.Site(url=entry['url'], status=db_model.EnumSiteStatus.blacklist)
-                else:
-                    db_site.status = db_model.EnumSiteStatus.blacklist
-
-                log.mal2_rest_log.info("import_blacklists adding new blacklist entry to db")
-
-                #FIXME need to include information_link in dataframe
-                db_bl_entry = db_model.Blacklist(
-                    site=db_site,
-                    blacklist_source=db_bl_source_entry,
-                    information_link= "https://www.watchlist-internet.at/search/?tx_kesearch_pi1[sword]={}".format(entry['url']),
-                )
-                if check_df_data_exists(entry,'created_at'):
-                    db_bl_entry.timestamp = entry['created_at']
-
-                if check_df_data_exists(entry,'screenshot_link'):
-                    db_bl_entry.screenshot_link = entry['screenshot_link']
-                else:
-                    #arch_date, arch_link = waybackmachine.get_entry_from_wayback_machine(entry['url'],retry=1)
-                    #screenshot_link= arch_link,
-                    screenshot_link= ""
-
-                if check_df_data_exists(entry,'website_type'):
-                    #expecting EnumblacklistType object from data import
-                    if isinstance(entry['website_type'], db_model.EnumBlacklistType):
-                        db_bl_entry.type = entry['website_type']
-                    else:
-                        db_bl_entry.type = db_model.EnumBlacklistType.other
-
-                #commit ignorelist entry to db
-                db_handler.commit_db_etnries(db_site, db_bl_entry)
-                imported_count += 1
-            else:
-                log.mal2_rest_log.debug("import_blacklist skipping known entry %s",db_bl_entry.__repr__)
-        except:
-            log.mal2_rest_log.exception("import_blacklist failed - unsupported pandas import data format for %s",entry.to_string)
+    #limit number of imports
+    if limit_imported_items > 0:
+        dataframe = dataframe.head(limit_imported_items)
+    entries = []
+    for entry in dataframe.to_dict("records"):
+        #mandatory items
+        url = db_bulk_import.get_value(entry,'url')
+        if url == None:
+            log.mal2_rest_log.warning("import_blacklist skipping entry - url does not exist in imported pandas dataframe: %s",entry)
+            continue
+        website_type = db_bulk_import.get_value(entry,'website_type')
+        #bad values would abort the import of the whole source
+        valid_entry = db_bulk_import.validate_entry(db_model.Blacklist, {
+            "url": url,
+            #FIXME need to include information_link in dataframe
+            "information_link": "https://www.watchlist-internet.at/search/?tx_kesearch_pi1[sword]={}".format(url),
+            "timestamp": db_bulk_import.get_value(entry,'created_at'),
+            "screenshot_link": db_bulk_import.get_value(entry,'screenshot_link'),
+            #expecting EnumblacklistType object from data import
+            "type": (website_type if isinstance(website_type, db_model.EnumBlacklistType) else db_model.EnumBlacklistType.other).name
+        })
+        if valid_entry:
+            entries.append(valid_entry)
+
+    #only new, changed and removed entries are written - removed entries are only known if the source was imported completely
+    diff = db_bulk_import.import_list_entries(db_model.Blacklist, db_bl_source_entry, entries, complete=limit_imported_items <= 0)
 
     global last_import 
     last_import= datetime.now()
-    log.mal2_rest_log.info("Completed import_blacklist items %s of %s for %s",imported_count,processed_count, source)
\ No newline at end of file
+    log.mal2_rest_log.info("Completed import_blacklist items %s new, %s changed, %s removed of %s for %s",len(diff.inserted),len(diff.updated),len(diff.deleted),len(dataframe), source)
@@ -0,0 +1,315 @@
+import io
+import csv
+import math
+from collections import namedtuple
+from datetime import datetime
+import sqlalchemy as sql
+import pandas as pd
+import swagger_server.mal2.db.model.db_model as db_model
+import swagger_server.mal2.db.handler.db_engine as db_engine
+from swagger_server import logger_config as log
+
+#set based import of list entries - a source's entries are diffed against its existing entries within a single query and a pandas merge,
+#then only the new, changed and removed entries are written with a few set based statements within a single transaction
+
+#list table -> column referencing the source, type/category column, site status of its sites, further columns copied from the staging table
+#and the columns compared by the diff (see entry_columns)
+ListTable = namedtuple("ListTable", ["source_column", "type_column", "site_status", "columns", "diff_columns"])
+list_tables = {
+    db_model.Blacklist: ListTable("blacklist_source_id", "type", db_model.EnumSiteStatus.blacklist, ["information_link", "screenshot_link"],
+        ["type", "information_link", "screenshot_link"]),
+    db_model.Greylist: ListTable("greylist_source_id", "type", db_model.EnumSiteStatus.greylist, ["information_link", "screenshot_link"],
+        ["type", "information_link", "screenshot_link"]),
+    db_model.Whitelist: ListTable("whitelist_source_id", "type", db_model.EnumSiteStatus.whitelist, ["information_link", "company_id"],
+        ["type", "information_link", "company_name", "company_street", "company_zip_code", "company_city", "company_country", "company_logo_url"]),
+    db_model.Ignorelist: ListTable("ignorelist_source_id", "category", db_model.EnumSiteStatus.ignore, [],
+        ["type"]),
+}
+
+#lists in order of their site status priority - the lists are imported ignorelist, greylist, blacklist, whitelist i.e. a site on several
+#lists has the status of the last imported one
+status_priority = [db_model.Whitelist, db_model.Blacklist, db_model.Greylist, db_model.Ignorelist]
+
+#columns of an imported entry - see import_list_entries
+entry_columns = ["url", "type", "timestamp", "information_link", "screenshot_link",
+    "company_name", "company_street", "company_zip_code", "company_city", "company_country", "company_logo_url"]
+company_columns = ["street", "zip_code", "city", "country", "logo_url"]
+#varchar lengths of the entry columns in the staging and list tables - longer texts are truncated, longer links and zip codes are dropped
+#as a truncated value would be wrong (see validate_entry)
+entry_column_lengths = {"url": 256, "information_link": 256, "screenshot_link": 256, "company_name": 256, "company_street": 256,
+    "company_zip_code": 10, "company_city": 256, "company_country": 128, "company_logo_url": 256}
+truncated_columns = ["company_name", "company_street", "company_city", "company_country"]
+#removed entries are kept if a source suddenly lacks more than this share of its entries - most likely a partial download
+max_deleted_ratio = 0.5
+
+#entries of a source to write - new and changed entries as imported, site_ids of the entries the source no longer contains
+ListDiff = namedtuple("ListDiff", ["inserted", "updated", "deleted"])
+
+__staging_table = "import_staging"
+__staging_ddl = """CREATE TEMPORARY TABLE {table} (
+    entry_index integer NOT NULL,
+    updated boolean NOT NULL,
+    url varchar(256) NOT NULL,
+    type text,
+    timestamp timestamp,
+    information_link varchar(256),
+    screenshot_link varchar(256),
+    company_name varchar(256),
+    company_street varchar(256),
+    company_zip_code varchar(10),
+    company_city varchar(256),
+    company_country varchar(128),
+    company_logo_url varchar(256),
+    site_id bigint,
+    company_id bigint
+) ON COMMIT DROP""".format(table=__staging_table)
+
+
+def get_value(entry:dict, key:str):
+    """returns the value of an imported entry e.g. a dataframe row as dict - empty strings, NaN and NaT count as missing
+
+    Arguments:
+        entry {dict} -- imported entry
+        key {str} -- column name
+
+    Returns:
+        the value or None if the column doesn't exist or is empty
+    """
+    value = entry.get(key)
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "to_pydatetime"):
+        #pandas timestamp - NaT is the missing timestamp
+        return None if value != value else value.to_pydatetime()
+    if len(str(value)) <= 0 or str(value) in ["NaN", "NaT"]:
+        return None
+    return value
+
+def validate_entry(list_model, entry:dict) -> dict:
+    """validates an imported entry before it's written - a single bad value would otherwise abort the COPY and the transaction of the
+    whole source. Texts exceeding their column are truncated, links and zip codes exceeding their column, unknown types and unparseable
+    timestamps are dropped (the columns keep their defaults). Entries with a missing or too long url are skipped. Each change is logged
+
+    Arguments:
+        list_model -- db_model.Blacklist, db_model.Greylist, db_model.Whitelist or db_model.Ignorelist
+        entry {dict} -- 'url' and optional columns of entry_columns
+
+    Returns:
+        dict -- the valid entry or None if it is skipped
+    """
+    table = list_model.__table__.name
+    entry = {column: value for column, value in entry.items() if value is not None}
+    for column, value in list(entry.items()):
+        if isinstance(value, str):
+            #NUL characters can't be stored in postgres texts
+            entry[column] = value = value.replace("\0", "").strip()
+            if len(value) <= 0:
+                del entry[column]
+    url = entry.get("url")
+    if not isinstance(url, str) or len(url) > entry_column_lengths["url"]:
+        log.mal2_rest_log.warning("%s import skipping entry - invalid url: %s",table,entry)
+        return None
+    for column, length in entry_column_lengths.items():
+        value = entry.get(column)
+        if value == None:
+            continue
+        if not isinstance(value, str):
+            entry[column] = value = str(value)
+        if len(value) > length:
+            if column in truncated_columns:
+                log.mal2_rest_log.warning("%s import truncating %s of %s to %s characters: %s",table,column,url,length,value)
+                entry[column] = value[:length]
+            else:
+                log.mal2_rest_log.warning("%s import dropping %s of %s exceeding %s characters: %s",table,column,url,length,value)
+                del entry[column]
+    type_enum = list_model.__table__.c[list_tables[list_model].type_column].type.enum_class
+    if "type" in entry and entry["type"] not in type_enum.__members__:
+        log.mal2_rest_log.warning("%s import dropping unknown type of %s: %s",table,url,entry["type"])
+        del entry["type"]
+    timestamp = entry.get("timestamp")
+    if timestamp != None and not isinstance(timestamp, datetime):
+        try:
+            entry["timestamp"] = datetime.fromisoformat(str(timestamp))
+        except ValueError:
+            log.mal2_rest_log.warning("%s import dropping unparseable timestamp of %s: %s",table,url,timestamp)
+            del entry["timestamp"]
+    return entry
+
+def load_list_entries(list_model, source_entry) -> pd.DataFrame:
+    """loads the existing entries of a list source with the attributes compared by diff_list_entries within a single query
+
+    Arguments:
+        list_model -- db_model.Blacklist, db_model.Greylist, db_model.Whitelist or db_model.Ignorelist
+        source_entry -- the committed list source e.g. db_model.BlacklistSource
+
+    Returns:
+        pd.DataFrame -- site_id, url and the diff columns of the list per entry
+    """
+    list_table = list_tables[list_model]
+    columns = {column: "l."+column for column in list_table.diff_columns}
+    #enum names as imported
+    columns["type"] = "CAST(l.{type_column} AS text)".format(type_column=list_table.type_column)
+    joins = ""
+    if "company_id" in list_table.columns:
+        columns.update({"company_"+column: "c."+column for column in ["name"]+company_columns})
+        joins = "LEFT JOIN company c ON c.id = l.company_id"
+    query = "SELECT l.site_id, s.url, {columns} FROM {table} l JOIN site s ON s.id = l.site_id {joins} WHERE l.{source_column} = :source_id".format(
+        columns=", ".join("{expression} AS {column}".format(expression=columns[column], column=column) for column in list_table.diff_columns),
+        table=list_model.__table__.name,
+        joins=joins,
+        source_column=list_table.source_column)
+    with db_engine.get_engine().connect() as connection:
+        return pd.read_sql(sql.text(query), connection, params={"source_id": source_entry.id})
+
+def diff_list_entries(list_model, source_entry, entries:list, complete:bool=False) -> ListDiff:
+    """compares the imported entries of a list source with its existing entries (matched by url) via a pandas merge. Missing attributes of
+    an imported entry keep the existing ones i.e. don't count as change
+
+    Arguments:
+        list_model -- db_model.Blacklist, db_model.Greylist, db_model.Whitelist or db_model.Ignorelist
+        source_entry -- the committed list source e.g. db_model.BlacklistSource
+        entries {list} -- dicts with 'url' and optional columns of entry_columns, unique per url
+
+    Keyword Arguments:
+        complete {bool} -- the entries are the complete source i.e. existing entries that are not imported were removed from the source (default: {False})
+
+    Returns:
+        ListDiff -- new and changed entries and the site_ids of removed entries
+    """
+    list_table = list_tables[list_model]
+    incoming = pd.DataFrame.from_records(entries, columns=entry_columns)
+    incoming["entry_index"] = range(len(incoming))
+    existing = load_list_entries(list_model, source_entry)
+    merged = incoming[["entry_index", "url"]+list_table.diff_columns].merge(existing, on="url", how="outer", suffixes=("", "_existing"), indicator=True)
+
+    known = merged[merged["_merge"] == "both"]
+    changed = pd.Series(False, index=known.index)
+    for column in list_table.diff_columns:
+        changed |= known[column].notna() & (known[column] != known[column+"_existing"])
+
+    deleted = []
+    if complete:
+        deleted = merged.loc[merged["_merge"] == "right_only", "site_id"].astype(int).tolist()
+        if len(existing) > 0 and len(deleted) > max_deleted_ratio*len(existing):
+            log.mal2_rest_log.warning("%s of %s lacks %s of %s existing entries - keeping them",list_model.__table__.name,source_entry.name,len(deleted),len(existing))
+            deleted = []
+    return ListDiff(
+        [entries[i] for i in merged.loc[merged["_merge"] == "left_only", "entry_index"].astype(int)],
+        [entries[i] for i in known.loc[changed, "entry_index"].astype(int)],
+        deleted)
+
+def __copy_entries(connection, diff:ListDiff):
+    #COPY is the fastest way to load rows into postgres - None is written as unquoted empty field i.e. NULL
+    data = io.StringIO()
+    writer = csv.writer(data)
+    for index, (updated, entry) in enumerate([(False, entry) for entry in diff.inserted] + [(True, entry) for entry in diff.updated]):
+        writer.writerow([index, updated] + [entry.get(column) for column in entry_columns])
+    data.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert("COPY {table} (entry_index, updated, {columns}) FROM STDIN WITH (FORMAT csv)".format(
+            table=__staging_table, columns=", ".join(entry_columns)), data)
+    finally:
+        cursor.close()
+
+def import_list_entries(list_model, source_entry, entries:list, complete:bool=False) -> ListDiff:
+    """imports the entries of a list source. The entries are diffed against the existing ones first (see diff_list_entries) - new, changed
+    and removed entries are written within a single transaction, an unchanged source costs a single query. Sites are created or get the list's
+    status, companies (whitelist only) are created or updated with the given details
+
+    Arguments:
+        list_model -- db_model.Blacklist, db_model.Greylist, db_model.Whitelist or db_model.Ignorelist
+        source_entry -- the committed list source e.g. db_model.BlacklistSource
+        entries {list} -- dicts with 'url' and optional columns of entry_columns - type is the enum name of the list's type/category column,
+            the first entry per url is imported
+
+    Keyword Arguments:
+        complete {bool} -- the entries are the complete source - entries the source no longer contains are removed (default: {False})
+
+    Returns:
+        ListDiff -- the written entries
+    """
+    list_table = list_tables[list_model]
+    table = list_model.__table__.name
+    #native postgres enum types of the columns
+    site_status_type = db_model.Site.__table__.c.status.type.name
+    list_type_type = list_model.__table__.c[list_table.type_column].type.name
+    params = {
+        "source_id": source_entry.id,
+        "site_status": list_table.site_status.name,
+        #column default of entries without type/category
+        "type_default": list_model.__table__.c[list_table.type_column].default.arg.name,
+        "now": datetime.now()
+    }
+
+    unique_entries = []
+    urls = set()
+    for entry in entries:
+        if entry["url"] not in urls:
+            urls.add(entry["url"])
+            unique_entries.append(entry)
+    diff = diff_list_entries(list_model, source_entry, unique_entries, complete=complete)
+    log.mal2_rest_log.info("%s of %s: %s new, %s changed and %s removed of %s imported entries",table,source_entry.name,
+        len(diff.inserted),len(diff.updated),len(diff.deleted),len(unique_entries))
+    if not diff.inserted and not diff.updated and not diff.deleted:
+        return diff
+
+    with db_engine.get_engine().begin() as connection:
+        connection.execute(sql.text(__staging_ddl))
+        __copy_entries(connection, diff)
+        connection.execute(sql.text("ANALYZE "+__staging_table))
+        #create missing sites with the list's status
+        connection.execute(sql.text(
+            "INSERT INTO site (url, status) SELECT url, CAST(:site_status AS {status_type}) FROM {staging} WHERE NOT updated ORDER BY entry_index "
+            "ON CONFLICT (url) DO NOTHING".format(status_type=site_status_type, staging=__staging_table)), params)
+        connection.execute(sql.text("UPDATE {staging} s SET site_id = site.id FROM site WHERE site.url = s.url".format(staging=__staging_table)))
+        #existing sites get the status of the list they're added to
+        connection.execute(sql.text(
+            "UPDATE site SET status = CAST(:site_status AS {status_type}) FROM {staging} s WHERE site.id = s.site_id AND NOT s.updated "
+            "AND site.status <> CAST(:site_status AS {status_type})".format(status_type=site_status_type, staging=__staging_table)), params)
+        if "company_id" in list_table.columns:
+            #the last entry of a company updates its details - missing details keep the existing ones
+            connection.execute(sql.text(
+                "INSERT INTO company (name, {columns}) SELECT DISTINCT ON (company_name) company_name, {staging_columns} FROM {staging} "
+                "WHERE company_name IS NOT NULL ORDER BY company_name, entry_index DESC ON CONFLICT (name) DO UPDATE SET {updates}".format(
+                    columns=", ".join(company_columns),
+                    staging_columns=", ".join("company_"+column for column in company_columns),
+                    staging=__staging_table,
+                    updates=", ".join("{column} = COALESCE(EXCLUDED.{column}, company.{column})".format(column=column) for column in company_columns))))
+            connection.execute(sql.text("UPDATE {staging} s SET company_id = company.id FROM company WHERE company.name = s.company_name".format(staging=__staging_table)))
+        connection.execute(sql.text(
+            "INSERT INTO {table} (site_id, {source_column}, {type_column}, timestamp{columns}) "
+            "SELECT site_id, :source_id, CAST(COALESCE(type, :type_default) AS {type_type}), COALESCE(timestamp, :now){staging_columns} "
+            "FROM {staging} s WHERE NOT updated ORDER BY entry_index ON CONFLICT (site_id, {source_column}) DO NOTHING".format(
+                table=table,
+                source_column=list_table.source_column,
+                type_column=list_table.type_column,
+                columns="".join(", "+column for column in list_table.columns),
+                type_type=list_type_type,
+                staging_columns="".join(", s."+column for column in list_table.columns),
+                staging=__staging_table)), params)
+        if diff.updated:
+            #missing attributes keep the existing ones
+            connection.execute(sql.text(
+                "UPDATE {table} l SET {type_column} = COALESCE(CAST(s.type AS {type_type}), l.{type_column}){updates} FROM {staging} s "
+                "WHERE s.updated AND l.site_id = s.site_id AND l.{source_column} = :source_id".format(
+                    table=table,
+                    type_column=list_table.type_column,
+                    type_type=list_type_type,
+                    updates="".join(", {column} = COALESCE(s.{column}, l.{column})".format(column=column) for column in list_table.columns),
+                    staging=__staging_table,
+                    source_column=list_table.source_column)), params)
+        if diff.deleted:
+            params["site_ids"] = diff.deleted
+            connection.execute(sql.text("DELETE FROM {table} WHERE {source_column} = :source_id AND site_id = ANY(:site_ids)".format(
+                table=table, source_column=list_table.source_column)), params)
+            #sites no longer listed by any source of the list get the status of the next list containing them or are unknown again
+            connection.execute(sql.text(
+                "UPDATE site SET status = CAST(CASE {cases} ELSE 'unknown' END AS {status_type}) "
+                "WHERE id = ANY(:site_ids) AND status = CAST(:site_status AS {status_type})".format(
+                    cases=" ".join("WHEN EXISTS (SELECT 1 FROM {table} l WHERE l.site_id = site.id) THEN '{status}'".format(
+                        table=model.__table__.name, status=list_tables[model].site_status.name) for model in status_priority),
+                    status_type=site_status_type)), params)
+    return diff
@@ -3,10 +3,15 @@ import swagger_server.mal2.sources.fakeshopdb.fake_shop_db as fakeshopdb
 import swagger_server.mal2.sources.fakeshopdb.fake_shop_db_utils as fakeshopdb_utils
 import swagger_server.mal2.sources.localdata.local_csv_sources as localcsvsrc
 import swagger_server.mal2.db.handler.db_handler as db_handler
+import swagger_server.mal2.db.handler.db_bulk_import as db_bulk_import
+import swagger_server.mal2.sources.source_fetch as source_fetch
+import swagger_server.mal2.cache.verdict_cache as verdict_cache
 from swagger_server import logger_config as log
 from datetime import datetime
 
 last_import = None   
+#max imported entries per source (-1 imports all) - note: limit removed through sed in docker build
+import_limit = 10
 
 def check_reimport_required()->bool:
     """checks if a given timespan has passed since last import
@@ -39,26 +44,63 @@ def check_reimport_required()->bool:
         return False
 
 
-def import_ignorelists():
-    """imports all ignored domains - ignores the ones already existing in the local db
+def get_sources() -> list:
+    """returns the ignorelist sources in import order
+
+    Returns:
+        list -- source_fetch.Source per ignorelist source
+    """
+    return [
+        #most visited websites DACH (from local excel)
+        source_fetch.Source("most_visited_domains_ignorelist", localcsvsrc.get_most_visited_domains_ignorelist_entries, import_most_visited_domains_ignorelist, import_limit=import_limit),
+        #watchlist-internet fake-shop (from no_verification_required)
+        source_fetch.Source("mal2_fake_shop_db_ignorelist", lambda: fakeshopdb.get_all_ignored_entries(import_limit), import_mal2_fake_shop_db_ignorelist, import_limit=import_limit)
+    ]
+
+def fetch_ignorelists(force:bool=False) -> dict:
+    """fetches all ignorelist sources concurrently without db access (see source_fetch.fetch)
+
+    Keyword Arguments:
+        force {bool} -- fetch remote sources even if unchanged since the last import (default: {False})
+
+    Returns:
+        dict -- source name -> source_fetch.FetchResult
+    """
+    return source_fetch.fetch(get_sources(), force=force)
+
+def import_ignorelists(fetched:dict=None, force:bool=False):
+    """imports all ignored domains - only new, changed and removed entries are written to the local db
+
+    Keyword Arguments:
+        fetched {dict} -- the fetched ignorelist sources (see fetch_ignorelists) - fetched now if not given (default: {None})
+        force {bool} -- re-import sources fetched now even if unchanged since the last import (default: {False})
+
+    Returns:
+        bool -- True if the imported entries were published, False if refreshing the best entries failed
     """
     #set it to now - just to avoid thread issues
     global last_import 
     last_import = datetime.now()
     log.mal2_rest_log.info("import_ignorelists")
-    #import most visited websites DACH (from local excel)
-    import_most_visited_domains_ignorelist(limit_imported_items=10)
-    #import watchlist-internet fake-shop (from no_verification_required)
-    import_mal2_fake_shop_db_ignorelist(limit_imported_items=10) 
+    if fetched == None:
+        fetched = fetch_ignorelists(force=force)
+    for source in get_sources():
+        source_fetch.write(source, fetched)
+    #re-compute the best entry per site from the imported entries
+    refreshed = db_handler.refresh_best_list_db_entries(db_model.BestIgnorelist)
+    #cached verdicts may be outdated by new ignorelist entries
+    verdict_cache.invalidate_all()
+    if not refreshed:
+        #retried on the next import check
+        last_import = None
+    return refreshed
     
 
-def import_mal2_fake_shop_db_ignorelist(limit_imported_items:int=-1):
+def import_mal2_fake_shop_db_ignorelist(df_fsdb_ignorelist, limit_imported_items:int=-1):
     """imports watchlist internet ignorelist from fake-shop db
     """
     try:
         log.mal2_rest_log.info("import_mal2_fake_shop_db_ignorelist")
-        #query mal2 fake-shop db for fake-shops listings
-        df_fsdb_ignorelist = fakeshopdb.get_all_ignored_entries(limit_imported_items)
         #create ignorelist source if not exists
         db_il_source_entry = db_handler.get_ignorelistsource_db_entry_by_name(db_model.EnumIgnorelistSources.mal2_fake_shop_db)
         if not db_il_source_entry:
@@ -83,15 +125,14 @@ def import_mal2_fake_shop_db_ignorelist(limit_imported_items:int=-1):
             )
     except Exception as e:
         log.mal2_rest_log.exception("failed import ignorelist %s",e)
+        raise
 
 
-def import_most_visited_domains_ignorelist(limit_imported_items:int=-1):
+def import_most_visited_domains_ignorelist(df_mvd_ignorelist, limit_imported_items:int=-1):
     """imports most_visited_domains ignorelist
     """
     try:
         log.mal2_rest_log.info("import most_visited_domains_ignorelist")
-        #import local entries from excel sheet
-        df_mvd_ignorelist = localcsvsrc.get_most_visited_domains_ignorelist_entries()
 
         #create ignorelist source if not exists
         db_il_source_entry = db_handler.get_ignorelistsource_db_entry_by_name(db_model.EnumIgnorelistSources.most_visited_domains)
@@ -117,6 +158,7 @@ def import_most_visited_domains_ignorelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
 def __import_ignorelist_data(db_il_source_entry:db_model.IgnorelistSource, source:db_model.EnumIgnorelistSources, dataframe, limit_imported_items:int=-1):
@@ -124,69 +166,31 @@ def __import_ignorelist_data(db_il_source_entry:db_model.IgnorelistSource, sourc
     optional [company_type], ['created_at]
     """
 
-    def check_df_data_exists(entry,key):
-        ret = True
-        try:
-            if entry[key] == None or len(str(entry[key])) <=0:
-                ret = False
-        except:
-            #in that case the column did not exist
-            return False
-        return ret
-
-  
     log.mal2_rest_log.info("start import_ignorelists for %s",source.value)
-    imported_count = 0
-    processed_count = 0
-    #import ignorelist entries into local db
-    for index, entry in dataframe.iterrows():
-        
-        #limit number of imports
-        if  limit_imported_items > 0 and processed_count >= limit_imported_items:
-                break
-        try:
-            processed_count += 1
-            #mandatory items
-            if not check_df_data_exists(entry,'url'):
-                raise Exception("url does not exist in imported pandas dataframe")
-
-            db_il_entry =  db_handler.get_ignorelist_db_entry_by_url_and_name(entry['url'],source)
-            #check if existing entry
-            if not db_il_entry:
-                #check if site exists
-                db_site = db_handler.get_site_db_entry_by_url(entry['url'])
-                if not db_site:
-                    #create site or update site
-                    db_site = db_model.Site(url=entry['url'], status=db_model.EnumSiteStatus.ignore)
-                else:
-                    db_site.status = db_model.EnumSiteStatus.ignore
-
-                log.mal2_rest_log.info("import_ignorelist adding new ignorelist entry to db")
-
-                db_il_entry = db_model.Ignorelist(
-                    site=db_site,
-                    ignorelist_source=db_il_source_entry,
-                    category=db_model.EnumIgnoreListCategory.unknown
-                )
-
-                if check_df_data_exists(entry,'created_at'):
-                    db_il_entry.timestamp = entry['created_at']
-                
-                if check_df_data_exists(entry,'company_type'):
-                    #check if value in allowed mal2 categories
-                    if entry['company_type'] in db_model.EnumIgnoreListCategory.__members__:
-                        db_il_entry.category = entry['company_type']
-                    else:
-                        db_il_entry.category = db_model.EnumIgnoreListCategory.unknown
-
-                #commit ignorelist entry to db
-                db_handler.commit_db_etnries(db_site, db_il_entry)
-                imported_count += 1
-            else:
-                log.mal2_rest_log.debug("import_ignorelist skipping known entry %s",db_il_entry.__repr__)
-        except:
-            log.mal2_rest_log.exception("import_ignorelist failed - unsupported pandas import data format for %s",entry.to_string)
+    #limit number of imports
+    if limit_imported_items > 0:
+        dataframe = dataframe.head(limit_imported_items)
+    entries = []
+    for entry in dataframe.to_dict("records"):
+        #mandatory items
+        url = db_bulk_import.get_value(entry,'url')
+        if url == None:
+            log.mal2_rest_log.warning("import_ignorelist skipping entry - url does not exist in imported pandas dataframe: %s",entry)
+            continue
+        company_type = db_bulk_import.get_value(entry,'company_type')
+        #bad values would abort the import of the whole source
+        valid_entry = db_bulk_import.validate_entry(db_model.Ignorelist, {
+            "url": url,
+            "timestamp": db_bulk_import.get_value(entry,'created_at'),
+            #check if value in allowed mal2 categories
+            "type": company_type if company_type in db_model.EnumIgnoreListCategory.__members__ else db_model.EnumIgnoreListCategory.unknown.name
+        })
+        if valid_entry:
+            entries.append(valid_entry)
+
+    #only new, changed and removed entries are written - removed entries are only known if the source was imported completely
+    diff = db_bulk_import.import_list_entries(db_model.Ignorelist, db_il_source_entry, entries, complete=limit_imported_items <= 0)
 
     global last_import 
     last_import= datetime.now()
-    log.mal2_rest_log.info("Completed import_ignorelist items %s of %s for %s",imported_count,processed_count, source)
\ No newline at end of file
+    log.mal2_rest_log.info("Completed import_ignorelist items %s new, %s changed, %s removed of %s for %s",len(diff.inserted),len(diff.updated),len(diff.deleted),len(dataframe), source)
@@ -5,10 +5,15 @@ import swagger_server.mal2.sources.api_sources.schweizer_guetesiegel as guetezei
 import swagger_server.mal2.sources.api_sources.buchhandel_at_securelisting as buchhandel_at
 import swagger_server.mal2.sources.localdata.local_csv_sources as localcsvsrc
 import swagger_server.mal2.db.handler.db_handler as db_handler
+import swagger_server.mal2.db.handler.db_bulk_import as db_bulk_import
+import swagger_server.mal2.sources.source_fetch as source_fetch
+import swagger_server.mal2.cache.verdict_cache as verdict_cache
 from swagger_server import logger_config as log
 from datetime import datetime
 
 last_import = None   
+#max imported entries per source (-1 imports all) - note: limit removed through sed in docker build
+import_limit = 10
 
 def check_reimport_required()->bool:
     """checks if a given timespan has passed since last import
@@ -41,42 +46,77 @@ def check_reimport_required()->bool:
         return False
 
 
-def import_whitelists():
-    """imports all whitelists - ignores the ones already existing in the local db
+def get_sources() -> list:
+    """returns the whitelist sources in import order - trustmark before secure listings (fifo)
+
+    Returns:
+        list -- source_fetch.Source per whitelist source
+    """
+    return [
+        #trustmark whitelists
+        source_fetch.Source("ecommerce_guetezeichen_whitelist", guetezeichen_at.get_all_whitelist_entries, import_ecommerce_guetezeichen_whitelist, import_limit=import_limit),
+        source_fetch.Source("versandapotheken_at_listing_whitelist", localcsvsrc.get_versandapotheken_at_whitelist_entries, import_versandapotheken_at_listing_whitelist, import_limit=import_limit),
+        source_fetch.Source("versandapotheken_de_listing_whitelist", localcsvsrc.get_versandapotheken_de_whitelist_entries, import_versandapotheken_de_listing_whitelist, import_limit=import_limit),
+        source_fetch.Source("schweizer_guetezeichen_whitelist", guetezeichen_ch.get_all_whitelist_entries, import_schweizer_guetezeichen_whitelist, import_limit=import_limit),
+        source_fetch.Source("ehi_trustmark_whitelist", localcsvsrc.get_ehi_trustmark_whitelist_entries, import_ehi_trustmark_whitelist, import_limit=import_limit),
+        source_fetch.Source("trustedshops_certified_whitelist", lambda: localcsvsrc.get_trustedshops_whitelist_entries(valid_trustmark_only=True), import_trustedshops_certified_whitelist, import_limit=import_limit),
+        #secure listing whitelists
+        source_fetch.Source("buchhandel_at_listing_whitelist", buchhandel_at.get_all_whitelist_entries, import_buchhandel_at_listing_whitelist, import_limit=import_limit),
+        source_fetch.Source("trustedshops_listing_whitelist", lambda: localcsvsrc.get_trustedshops_whitelist_entries(secure_listing_only=True), import_trustedshops_listing_whitelist, import_limit=import_limit),
+        source_fetch.Source("handelsverband_listing_whitelist", localcsvsrc.get_handelsverband_whitelist_entries, import_handelsverband_listing_whitelist, import_limit=import_limit),
+        source_fetch.Source("largest_dach_ecommerce_whitelist", localcsvsrc.get_largest_ecommerce_domains_whitelist_entries, import_largest_dach_ecommerce_whitelist, import_limit=import_limit),
+        source_fetch.Source("geizhals_whitelist", localcsvsrc.get_geizhals_whitelist_entries, import_geizhals_whitelist, import_limit=import_limit),
+        source_fetch.Source("falter_listing_whitelist", localcsvsrc.get_falter_csv_whitelist_entries, import_falter_listing_whitelist, import_limit=import_limit),
+        source_fetch.Source("nunukaller_csv_ignorelist", localcsvsrc.get_nunukaller_csv_whitelist_entries, import_nunukaller_csv_ignorelist, import_limit=import_limit),
+        source_fetch.Source("kaufhausoesterreich_listing_whitelist", localcsvsrc.get_kaufhausoesterreich_whitelist_entries, import_kaufhausoesterreich_listing_whitelist, import_limit=import_limit),
+        source_fetch.Source("mal2_fake_shop_db_whitelist", lambda: fakeshopdb.get_all_whitelist_entries(import_limit), import_mal2_fake_shop_db_whitelist, import_limit=import_limit)
+    ]
+
+def fetch_whitelists(force:bool=False) -> dict:
+    """fetches all whitelist sources concurrently without db access (see source_fetch.fetch)
+
+    Keyword Arguments:
+        force {bool} -- fetch remote sources even if unchanged since the last import (default: {False})
+
+    Returns:
+        dict -- source name -> source_fetch.FetchResult
+    """
+    return source_fetch.fetch(get_sources(), force=force)
+
+def import_whitelists(fetched:dict=None, force:bool=False):
+    """imports all whitelists - only new, changed and removed entries are written to the local db
+
+    Keyword Arguments:
+        fetched {dict} -- the fetched whitelist sources (see fetch_whitelists) - fetched now if not given (default: {None})
+        force {bool} -- re-import sources fetched now even if unchanged since the last import (default: {False})
+
+    Returns:
+        bool -- True if the imported entries were published, False if refreshing the best entries failed
     """
     #set it to now - just to avoid thread issues
     global last_import 
     last_import = datetime.now()
     log.mal2_rest_log.info("import_whitelists")
-
-    #note: limits removed through sed in docker build
-    #trustmark before secure listings (fifo)
-    import_ecommerce_guetezeichen_whitelist(limit_imported_items=10)
-    import_versandapotheken_at_listing_whitelist(limit_imported_items=10)
-    import_versandapotheken_de_listing_whitelist(limit_imported_items=10)
-    import_schweizer_guetezeichen_whitelist(limit_imported_items=10)
-    import_ehi_trustmark_whitelist(limit_imported_items=10)
-    import_trustedshops_certified_whitelist(limit_imported_items=10)
-    
-    #secure listing whitelists
-    import_buchhandel_at_listing_whitelist(limit_imported_items=10)
-    import_trustedshops_listing_whitelist(limit_imported_items=10)
-    import_handelsverband_listing_whitelist(limit_imported_items=10)
-    import_largest_dach_ecommerce_whitelist(limit_imported_items=10)
-    import_geizhals_whitelist(limit_imported_items=10)
-    import_falter_listing_whitelist(limit_imported_items=10)
-    import_nunukaller_csv_ignorelist(limit_imported_items=10)
-    import_kaufhausoesterreich_listing_whitelist(limit_imported_items=10)
-    import_mal2_fake_shop_db_whitelist(limit_imported_items=10)
-
-
-def import_ecommerce_guetezeichen_whitelist(limit_imported_items:int=-1):
+    if fetched == None:
+        fetched = fetch_whitelists(force=force)
+    #one source at a time in import order
+    for source in get_sources():
+        source_fetch.write(source, fetched)
+    #re-compute the best entry per site from the imported entries
+    refreshed = db_handler.refresh_best_list_db_entries(db_model.BestWhitelist)
+    #cached verdicts may be outdated by new whitelist entries
+    verdict_cache.invalidate_all()
+    if not refreshed:
+        #retried on the next import check
+        last_import = None
+    return refreshed
+
+
+def import_ecommerce_guetezeichen_whitelist(df_gz_whitelist, limit_imported_items:int=-1):
     """imports ecommerce guetezeichen whitelist
     """
     try:
         log.mal2_rest_log.info("import ecommerce_guetezeichen_whitelist")
-        #query watchlist website csv endpoints
-        df_gz_whitelist = guetezeichen_at.get_all_whitelist_entries()
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.ecommerce_guetezeichen_at)
@@ -104,15 +144,14 @@ def import_ecommerce_guetezeichen_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_schweizer_guetezeichen_whitelist(limit_imported_items:int=-1):
+def import_schweizer_guetezeichen_whitelist(df_gz_whitelist, limit_imported_items:int=-1):
     """imports schweizer guetezeichen whitelist
     """
     try:
         log.mal2_rest_log.info("import schweizer_guetezeichen_whitelist")
-        #query watchlist website csv endpoints
-        df_gz_whitelist = guetezeichen_ch.get_all_whitelist_entries()
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.schweizer_guetezeichen_ch)
@@ -140,15 +179,14 @@ def import_schweizer_guetezeichen_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_geizhals_whitelist(limit_imported_items:int=-1):
+def import_geizhals_whitelist(df_gh_whitelist, limit_imported_items:int=-1):
     """imports geizhals whitelist
     """
     try:
         log.mal2_rest_log.info("import geizhals_whitelist")
-        #query watchlist website csv endpoints
-        df_gh_whitelist = localcsvsrc.get_geizhals_whitelist_entries()
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.geizhals_onlineshop_listing)
@@ -176,15 +214,14 @@ def import_geizhals_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_largest_dach_ecommerce_whitelist(limit_imported_items:int=-1):
+def import_largest_dach_ecommerce_whitelist(df_dach_whitelist, limit_imported_items:int=-1):
     """imports largest ecommerce shops in DACH region 2018 whitelist
     """
     try:
         log.mal2_rest_log.info("import largest_dach_ecommerce_whitelist")
-        #import local entries from excel sheet
-        df_dach_whitelist = localcsvsrc.get_largest_ecommerce_domains_whitelist_entries()
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.largest_dach_ecommerce)
@@ -211,15 +248,14 @@ def import_largest_dach_ecommerce_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_mal2_fake_shop_db_whitelist(limit_imported_items:int=-1):
+def import_mal2_fake_shop_db_whitelist(df_fsdb_whitelist, limit_imported_items:int=-1):
     """imports mal2 fakeshop db whitelist entries
     """
     try:
         log.mal2_rest_log.info("import_mal2_fake_shop_db_whitelist")
-        #query mal2 fake-shop db for online-shop whitelistings
-        df_fsdb_whitelist = fakeshopdb.get_all_whitelist_entries(limit_imported_items)
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.mal2_fake_shop_db)
@@ -247,15 +283,14 @@ def import_mal2_fake_shop_db_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_trustedshops_certified_whitelist(limit_imported_items:int=-1):
+def import_trustedshops_certified_whitelist(df_trustedshops_certified_whitelist, limit_imported_items:int=-1):
     """imports trustedshops_de certified shops whitelist entries
     """
     try:
         log.mal2_rest_log.info("import_trustedshops_certified_whitelist")
-        #get trustedshops_de certified only shops from csv file for whitelistings
-        df_trustedshops_certified_whitelist = localcsvsrc.get_trustedshops_whitelist_entries(valid_trustmark_only=True)
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.trustedshops_certified)
@@ -283,15 +318,14 @@ def import_trustedshops_certified_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_trustedshops_listing_whitelist(limit_imported_items:int=-1):
+def import_trustedshops_listing_whitelist(df_trustedshops_listing_whitelist, limit_imported_items:int=-1):
     """imports trustedshops_de no trustmark but secure listed shops whitelist entries
     """
     try:
         log.mal2_rest_log.info("import_trustedshops_listing_whitelist")
-        #get trustedshops_de no currently valid but once had a trustmark shops from csv file for whitelistings
-        df_trustedshops_listing_whitelist = localcsvsrc.get_trustedshops_whitelist_entries(secure_listing_only=True)
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.trustedshops_listing)
@@ -319,15 +353,14 @@ def import_trustedshops_listing_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_kaufhausoesterreich_listing_whitelist(limit_imported_items:int=-1):
+def import_kaufhausoesterreich_listing_whitelist(df_kaufhausoesterreich_listing_whitelist, limit_imported_items:int=-1):
     """imports kaufhaus oesterreich secure listed shops whitelist entries
     """
     try:
         log.mal2_rest_log.info("import_kaufhausoesterreich_listing_whitelist")
-        #get kaufhaus-oesterreich listed shops from csv file for whitelistings
-        df_kaufhausoesterreich_listing_whitelist = localcsvsrc.get_kaufhausoesterreich_whitelist_entries()
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.kaufhausoesterreich_listing)
@@ -355,15 +388,14 @@ def import_kaufhausoesterreich_listing_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_ehi_trustmark_whitelist(limit_imported_items:int=-1):
+def import_ehi_trustmark_whitelist(df_ehi_trustmark_whitelist, limit_imported_items:int=-1):
     """imports ehi-siegel.de trustmark shops whitelist entries
     """
     try:
         log.mal2_rest_log.info("import_ehi_trustmark_whitelist")
-        #get ehi trustmark certified shops from csv file for whitelistings
-        df_ehi_trustmark_whitelist = localcsvsrc.get_ehi_trustmark_whitelist_entries()
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.ehisiegel_certified)
@@ -391,15 +423,14 @@ def import_ehi_trustmark_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_handelsverband_listing_whitelist(limit_imported_items:int=-1):
+def import_handelsverband_listing_whitelist(df_handelsverband_listing_whitelist, limit_imported_items:int=-1):
     """imports handelsverband retail.at secure listed shops whitelist entries
     """
     try:
         log.mal2_rest_log.info("import_handelsverband_listing_whitelist")
-        #get handelsverband retail.at listed shops from csv file for whitelistings
-        df_handelsverband_listing_whitelist = localcsvsrc.get_handelsverband_whitelist_entries()
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.handelsverband_listing)
@@ -427,14 +458,13 @@ def import_handelsverband_listing_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
-def import_versandapotheken_at_listing_whitelist(limit_imported_items:int=-1):
+def import_versandapotheken_at_listing_whitelist(df_versandapotheken_at_listing_whitelist, limit_imported_items:int=-1):
     """imports versandapotheken-at from versandhandelsregister as whitelist entries with trustmark
     """
     try:
         log.mal2_rest_log.info("import_versandapotheken_at_listing_whitelist")
-        #get handelsverband retail.at listed shops from csv file for whitelistings
-        df_versandapotheken_at_listing_whitelist = localcsvsrc.get_versandapotheken_at_whitelist_entries()
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.versandapotheken_listing_at)
@@ -462,15 +492,14 @@ def import_versandapotheken_at_listing_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_versandapotheken_de_listing_whitelist(limit_imported_items:int=-1):
+def import_versandapotheken_de_listing_whitelist(df_versandapotheken_de_listing_whitelist, limit_imported_items:int=-1):
     """imports versandapotheken-de from versandhandelsregister as whitelist entries with trustmark
     """
     try:
         log.mal2_rest_log.info("import_versandapotheken_de_listing_whitelist")
-        #get handelsverband retail.at listed shops from csv file for whitelistings
-        df_versandapotheken_de_listing_whitelist = localcsvsrc.get_versandapotheken_de_whitelist_entries()
 
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.versandapotheken_listing_de)
@@ -498,14 +527,13 @@ def import_versandapotheken_de_listing_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
-def import_falter_listing_whitelist(limit_imported_items:int=-1):
+def import_falter_listing_whitelist(falter_whitelist_df, limit_imported_items:int=-1):
     """imports falter listing of austrian small online shops as whitelist from csv
     """
     try:
         log.mal2_rest_log.info("import_falter_listing_whitelist")
-        #fetch the data from csv
-        falter_whitelist_df = localcsvsrc.get_falter_csv_whitelist_entries()
         #create whitelist source if not exists
         db_wl_source_entry = db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.falter_onlineshop_listing)
         if not db_wl_source_entry:
@@ -529,15 +557,14 @@ def import_falter_listing_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_nunukaller_csv_ignorelist(limit_imported_items:int=-1):
+def import_nunukaller_csv_ignorelist(nunukaller_whitelist_df, limit_imported_items:int=-1):
     """imports nunukaller listing of austrian small online shops as whitelist from csv
     """
     try:
         log.mal2_rest_log.info("import_nunukaller_csv_ignorelist")
-        #fetch the data from csv
-        nunukaller_whitelist_df = localcsvsrc.get_nunukaller_csv_whitelist_entries()
         #create whitelist source if not exists
         db_wl_source_entry =db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.nunukaller_onlineshop_listing)
         if not db_wl_source_entry:
@@ -561,15 +588,14 @@ def import_nunukaller_csv_ignorelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
-def import_buchhandel_at_listing_whitelist(limit_imported_items:int=-1):
+def import_buchhandel_at_listing_whitelist(buchhandel_at_whitelist_df, limit_imported_items:int=-1):
     """imports Hauptverband des österreichischen Buchhandels merchants as whitelist (secure listing) from api-endpoint
     """
     try:
         log.mal2_rest_log.info("import_buchhandel_at_listing_whitelist")
-        #fetch the data from csv
-        buchhandel_at_whitelist_df = buchhandel_at.get_all_whitelist_entries()
         #create whitelist source if not exists
         db_wl_source_entry =db_handler.get_whitelistsource_db_entry_by_name(db_model.EnumWhitelistSources.buchhandel_listing_at)
         if not db_wl_source_entry:
@@ -593,93 +619,48 @@ def import_buchhandel_at_listing_whitelist(limit_imported_items:int=-1):
 
     except Exception as e:
         log.mal2_rest_log.exception("failed import whitelist %s",e)
+        raise
 
 
 def __import_whitelist_data(db_wl_source_entry:db_model.WhitelistSource, source:db_model.EnumWhitelistSources, wl_type:db_model.EnumWhitelistType,dataframe, limit_imported_items:int=-1):
     """common importer for whitelist entries via pandas dataframe that contain ['url'] and ['company_name]
     """
 
-    def check_df_data_exists(entry,key):
-        ret = True
-        try:
-            if entry[key] == None or len(str(entry[key])) <=0 or str(entry[key])=='NaN':
-                ret = False
-        except:
-            #in that case the column did not exist
-            return False
-        return ret
-
-  
     log.mal2_rest_log.info("start import_whitelists for %s",source.value)
-    imported_count = 0
-    processed_count = 0
-    #import whitelist entries into local db
-    for index, entry in dataframe.iterrows():
-        
-        #limit number of imports
-        if  limit_imported_items > 0 and processed_count >= limit_imported_items:
-                break
-        try:
-            processed_count += 1
-            #mandatory items
-            if not check_df_data_exists(entry,'url'):
-                raise Exception("url does not exist in imported pandas dataframe")
-            if not check_df_data_exists(entry,'company_name'):
-                raise Exception("name does not exist in imported pandas dataframe")
-
-            db_wl_entry =  db_handler.get_whitelist_db_entry_by_url_and_name(entry['url'],source)
-            #check if existing entry
-            if not db_wl_entry:
-                #check if site exists
-                db_site = db_handler.get_site_db_entry_by_url(entry['url'])
-                if not db_site:
-                    #create site or update site
-                    db_site = db_model.Site(url=entry['url'], status=db_model.EnumSiteStatus.whitelist)
-                else:
-                    db_site.status = db_model.EnumSiteStatus.whitelist
-                
-                log.mal2_rest_log.info("import_whitelists adding new whitelist entry to db")
-
-                #fetch existing company entry from db or create new one
-                db_company = db_handler.get_company_db_entry_by_name(entry['company_name'])
-                if not db_company:
-                    db_company = db_model.Company(
-                        name = entry['company_name'],
-                    )
-                #update record with details
-                if check_df_data_exists(entry,'company_street'):
-                    db_company.street = entry['company_street']
-                if check_df_data_exists(entry,'company_zip_code'):
-                    db_company.zip_code = entry['company_zip_code']
-                if check_df_data_exists(entry,'company_city'):
-                    db_company.city =  entry['company_city']
-                if check_df_data_exists(entry,'company_country'):
-                    db_company.country = entry['company_country']
-                if check_df_data_exists(entry,'company_logo_url'):
-                    db_company.logo_url =  entry['company_logo_url']
-
-                #build the whitelist db entry
-                db_wl_entry = db_model.Whitelist(
-                    site=db_site,
-                    whitelist_source=db_wl_source_entry,
-                    type=wl_type,
-                    company=db_company
-                )
-                if check_df_data_exists(entry,'created_at'):
-                    db_wl_entry.timestamp = entry['created_at']
-
-                if check_df_data_exists(entry,'certificate_url'):
-                    db_wl_entry.information_link =  entry['certificate_url']
-
-                #commit whitelist entry to db
-                db_handler.commit_db_etnries(db_site, db_company, db_wl_entry)
-                imported_count += 1
-            else:
-                log.mal2_rest_log.debug("import_whitelists skipping known entry %s",db_wl_entry.__repr__)
-        except:
-            log.mal2_rest_log.exception("import_whitelists failed - unsupported pandas import data format for %s",entry.to_string)
+    #limit number of imports
+    if limit_imported_items > 0:
+        dataframe = dataframe.head(limit_imported_items)
+    entries = []
+    for entry in dataframe.to_dict("records"):
+        #mandatory items
+        url = db_bulk_import.get_value(entry,'url')
+        if url == None:
+            log.mal2_rest_log.warning("import_whitelists skipping entry - url does not exist in imported pandas dataframe: %s",entry)
+            continue
+        company_name = db_bulk_import.get_value(entry,'company_name')
+        if company_name == None:
+            log.mal2_rest_log.warning("import_whitelists skipping entry - name does not exist in imported pandas dataframe: %s",entry)
+            continue
+        #bad values would abort the import of the whole source
+        valid_entry = db_bulk_import.validate_entry(db_model.Whitelist, {
+            "url": url,
+            "type": wl_type.name,
+            "timestamp": db_bulk_import.get_value(entry,'created_at'),
+            "information_link": db_bulk_import.get_value(entry,'certificate_url'),
+            #existing company entries are updated with the details
+            "company_name": company_name,
+            "company_street": db_bulk_import.get_value(entry,'company_street'),
+            "company_zip_code": db_bulk_import.get_value(entry,'company_zip_code'),
+            "company_city": db_bulk_import.get_value(entry,'company_city'),
+            "company_country": db_bulk_import.get_value(entry,'company_country'),
+            "company_logo_url": db_bulk_import.get_value(entry,'company_logo_url')
+        })
+        if valid_entry:
+            entries.append(valid_entry)
+
+    #only new, changed and removed entries are written - removed entries are only known if the source was imported completely
+    diff = db_bulk_import.import_list_entries(db_model.Whitelist, db_wl_source_entry, entries, complete=limit_imported_items <= 0)
 
     global last_import 
     last_import= datetime.now()
-    log.mal2_rest_log.info("Completed import_whitelists items %s of %s for %s",imported_count,processed_count, source)
-
+    log.mal2_rest_log.info("Completed import_whitelists items %s new, %s changed, %s removed of %s for %s",len(diff.inserted),len(diff.updated),len(diff.deleted),len(dataframe), source)
@@ -0,0 +1,188 @@
+import argparse
+import sqlalchemy as sql
+from datetime import datetime
+import swagger_server.mal2.db.model.db_model as db_model
+from swagger_server import logger_config as log
+
+#serializes migrations of all processes/containers sharing the db
+migration_lock_key = "mal2:schema_migration"
+
+
+def __merge_duplicates(table:str, key:str, references:list) -> list:
+    #re-points all references of duplicate rows (same key) to the lowest id and removes the duplicates
+    statements = [
+        "UPDATE {ref_table} r SET {ref_column} = d.keep_id FROM (SELECT id, min(id) OVER (PARTITION BY {key}) AS keep_id FROM {table}) d "
+        "WHERE r.{ref_column} = d.id AND d.id <> d.keep_id".format(ref_table=ref_table, ref_column=ref_column, key=key, table=table)
+        for ref_table, ref_column in references
+    ]
+    statements.append("DELETE FROM {table} t USING {table} k WHERE t.{key} = k.{key} AND t.id > k.id".format(table=table, key=key))
+    return statements
+
+def __delete_duplicates(table:str, key:str, order_by:str) -> str:
+    #keeps the first row per key in the given order
+    return ("DELETE FROM {table} WHERE id IN (SELECT id FROM (SELECT id, row_number() OVER (PARTITION BY {key} ORDER BY {order_by}) AS rn "
+        "FROM {table}) d WHERE d.rn > 1)").format(table=table, key=key, order_by=order_by)
+
+#ordered schema migrations (version, description, sql statements or functions called with the connection) - never modify a released
+#migration, append a new one instead. Migrations spell out their ddl instead of creating tables from db_model, which always reflects
+#the latest version i.e. only databases created via create_all are stamped with it
+migrations = [
+    (1, "unique constraints and composite indexes for best list entry and latest prediction lookups",
+        __merge_duplicates("blacklist_source", "name", [("blacklist", "blacklist_source_id")]) +
+        __merge_duplicates("greylist_source", "name", [("greylist", "greylist_source_id")]) +
+        __merge_duplicates("whitelist_source", "name", [("whitelist", "whitelist_source_id")]) +
+        __merge_duplicates("ignorelist_source", "name", [("ignorelist", "ignorelist_source_id")]) +
+        __merge_duplicates("company", "name", [("whitelist", "company_id")]) +
+        __merge_duplicates("site", "url", [("prediction", "site_id"), ("blacklist", "site_id"), ("greylist", "site_id"), ("whitelist", "site_id"), ("ignorelist", "site_id")]) +
+        [
+            __delete_duplicates("blacklist", "site_id, blacklist_source_id", "timestamp DESC, id DESC"),
+            __delete_duplicates("greylist", "site_id, greylist_source_id", "timestamp DESC, id DESC"),
+            __delete_duplicates("whitelist", "site_id, whitelist_source_id", "type ASC, timestamp DESC, id DESC"),
+            __delete_duplicates("ignorelist", "site_id, ignorelist_source_id", "timestamp DESC, id DESC"),
+            __delete_duplicates("predictionstatus", "url", "timestamp DESC, id DESC"),
+            "ALTER TABLE site ADD CONSTRAINT uq_site_url UNIQUE (url)",
+            "ALTER TABLE predictionstatus ADD CONSTRAINT uq_predictionstatus_url UNIQUE (url)",
+            "ALTER TABLE blacklist_source ADD CONSTRAINT uq_blacklist_source_name UNIQUE (name)",
+            "ALTER TABLE greylist_source ADD CONSTRAINT uq_greylist_source_name UNIQUE (name)",
+            "ALTER TABLE whitelist_source ADD CONSTRAINT uq_whitelist_source_name UNIQUE (name)",
+            "ALTER TABLE ignorelist_source ADD CONSTRAINT uq_ignorelist_source_name UNIQUE (name)",
+            "ALTER TABLE company ADD CONSTRAINT uq_company_name UNIQUE (name)",
+            "ALTER TABLE blacklist ADD CONSTRAINT uq_blacklist_site_id_blacklist_source_id UNIQUE (site_id, blacklist_source_id)",
+            "ALTER TABLE greylist ADD CONSTRAINT uq_greylist_site_id_greylist_source_id UNIQUE (site_id, greylist_source_id)",
+            "ALTER TABLE whitelist ADD CONSTRAINT uq_whitelist_site_id_whitelist_source_id UNIQUE (site_id, whitelist_source_id)",
+            "ALTER TABLE ignorelist ADD CONSTRAINT uq_ignorelist_site_id_ignorelist_source_id UNIQUE (site_id, ignorelist_source_id)",
+            "CREATE INDEX IF NOT EXISTS ix_prediction_site_id_algorithm_timestamp ON prediction (site_id, algorithm, timestamp DESC)",
+            "CREATE INDEX IF NOT EXISTS ix_blacklist_best_entry ON blacklist (site_id, blacklist_source_id, timestamp DESC, id DESC)",
+            "CREATE INDEX IF NOT EXISTS ix_greylist_best_entry ON greylist (site_id, greylist_source_id, timestamp DESC, id DESC)",
+            "CREATE INDEX IF NOT EXISTS ix_whitelist_best_entry ON whitelist (site_id, type, whitelist_source_id, timestamp DESC, id DESC)",
+            "CREATE INDEX IF NOT EXISTS ix_ignorelist_best_entry ON ignorelist (site_id, ignorelist_source_id, timestamp DESC, id DESC)",
+            #queue of the asynchronous analysis requests
+            "DO $$ BEGIN CREATE TYPE enumanalysisjobstatus AS ENUM ('queued', 'processing', 'completed', 'failed'); "
+            "EXCEPTION WHEN duplicate_object THEN NULL; END $$",
+            "CREATE TABLE IF NOT EXISTS analysisjob (id BIGSERIAL PRIMARY KEY, job_id VARCHAR(36) NOT NULL UNIQUE, url VARCHAR(256) NOT NULL, "
+            "client_id VARCHAR(256), status enumanalysisjobstatus NOT NULL, site_id BIGINT, processor VARCHAR(32), risk_score VARCHAR(32), "
+            "analyzed_date_time TIMESTAMP WITHOUT TIME ZONE, error VARCHAR(512), created TIMESTAMP WITHOUT TIME ZONE, timestamp TIMESTAMP WITHOUT TIME ZONE)",
+            "CREATE INDEX IF NOT EXISTS ix_analysisjob_status_id ON analysisjob (status, id)",
+            "CREATE INDEX IF NOT EXISTS ix_analysisjob_url_status ON analysisjob (url, status)",
+            "ANALYZE"
+        ]
+    ),
+    (2, "materialized views of the best list entry per site",
+        [statement for statements in db_model.best_entry_views.values() for statement in statements]
+    ),
+    (3, "list change log written by triggers on the list tables",
+        [
+            #version is assigned in commit order when the changes are published (see db_handler.refresh_best_list_db_entries)
+            "CREATE TABLE IF NOT EXISTS list_change (id BIGSERIAL PRIMARY KEY, version BIGINT, list_name VARCHAR(32) NOT NULL, "
+            "site_id BIGINT NOT NULL, operation VARCHAR(8) NOT NULL, timestamp TIMESTAMP WITHOUT TIME ZONE)",
+            "CREATE INDEX IF NOT EXISTS ix_list_change_list_name_version ON list_change (list_name, version)",
+            "CREATE TABLE IF NOT EXISTS list_version (list_name VARCHAR(32) PRIMARY KEY, version BIGINT NOT NULL, "
+            "min_version BIGINT NOT NULL, timestamp TIMESTAMP WITHOUT TIME ZONE)"
+        ] + db_model.list_change_triggers
+    ),
+    (4, "fingerprints of the imported list source payloads",
+        [
+            "CREATE TABLE IF NOT EXISTS source_fingerprint (source VARCHAR(64) NOT NULL, url VARCHAR(512) NOT NULL, etag VARCHAR(256), "
+            "last_modified VARCHAR(64), content_hash VARCHAR(64), import_limit INTEGER, timestamp TIMESTAMP WITHOUT TIME ZONE, "
+            "PRIMARY KEY (source, url))"
+        ]
+    ),
+]
+
+def get_head_version() -> int:
+    """returns the latest available schema version
+
+    Returns:
+        int -- version of the last migration
+    """
+    return migrations[-1][0]
+
+def __get_version(connection) -> int:
+    version = connection.execute(sql.select([sql.func.max(db_model.SchemaVersion.version)])).scalar()
+    #databases created before versioning was introduced have no (or an empty) schema_version table
+    return version or 0
+
+def get_current_version(engine) -> int:
+    """returns the schema version of the database
+
+    Arguments:
+        engine {sql.engine.Engine} -- engine of the db to check
+
+    Returns:
+        int -- current schema version, 0 if the db was never migrated
+    """
+    db_model.SchemaVersion.__table__.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        return __get_version(connection)
+
+def stamp(engine, version:int=None):
+    """marks the database as being at the given schema version without running any migration e.g. after create_all built the latest schema
+
+    Arguments:
+        engine {sql.engine.Engine} -- engine of the db to stamp
+
+    Keyword Arguments:
+        version {int} -- schema version to record (default: {head version})
+    """
+    if version == None:
+        version = get_head_version()
+    db_model.SchemaVersion.__table__.create(engine, checkfirst=True)
+    with engine.begin() as connection:
+        connection.execute(sql.text("SELECT pg_advisory_xact_lock(hashtext(:key))"), key=migration_lock_key)
+        connection.execute(db_model.SchemaVersion.__table__.delete())
+        connection.execute(db_model.SchemaVersion.__table__.insert(), version=version, description="stamped", applied=datetime.now())
+    log.mal2_rest_log.info("stamped db schema version %s",version)
+
+def upgrade(engine, target:int=None) -> int:
+    """upgrades the database in place by applying all pending migrations up to the target version. Each migration runs in its own
+    transaction (postgres ddl is transactional) i.e. a failing migration is rolled back completely and leaves the db at the previous version
+
+    Arguments:
+        engine {sql.engine.Engine} -- engine of the db to upgrade
+
+    Keyword Arguments:
+        target {int} -- schema version to upgrade to (default: {head version})
+
+    Returns:
+        int -- number of applied migrations
+    """
+    if target == None:
+        target = get_head_version()
+    applied = 0
+    current = get_current_version(engine)
+    for version, description, statements in migrations:
+        if version <= current or version > target:
+            continue
+        with engine.begin() as connection:
+            connection.execute(sql.text("SELECT pg_advisory_xact_lock(hashtext(:key))"), key=migration_lock_key)
+            #migrations may rewrite large tables - not subject to the configured statement_timeout
+            connection.execute(sql.text("SET LOCAL statement_timeout = 0"))
+            #re-check - a different process may have applied the migration while waiting for the lock
+            if __get_version(connection) >= version:
+                continue
+            log.mal2_rest_log.info("migrating db schema to version %s: %s",version,description)
+            for statement in statements:
+                if callable(statement):
+                    statement(connection)
+                else:
+                    connection.execute(sql.text(statement))
+            connection.execute(db_model.SchemaVersion.__table__.insert(), version=version, description=description, applied=datetime.now())
+        applied += 1
+    log.mal2_rest_log.info("db schema is at version %s (%s migrations applied)",max(current,min(target,get_head_version())),applied)
+    return applied
+
+
+if __name__ == '__main__':
+    #e.g. 'python -m swagger_server.mal2.db.migration.db_migration upgrade'
+    import swagger_server.mal2.db.handler.db_engine as db_engine
+    Args = argparse.ArgumentParser(description="versioned schema migrations of the mal2 rest-api db")
+    Args.add_argument("command", choices=["current", "upgrade", "stamp"], help="show the current schema version, upgrade the db in place or stamp it without migrating")
+    Args.add_argument("--version", type=int, default=None, help="target version for upgrade and stamp (default: latest)")
+    args = Args.parse_args()
+
+    engine = db_engine.get_engine()
+    if args.command == "upgrade":
+        upgrade(engine, args.version)
+    elif args.command == "stamp":
+        stamp(engine, args.version)
+    print("current schema version: %s - latest: %s"%(get_current_version(engine),get_head_version()))
@@ -1,11 +1,13 @@
 import sqlalchemy as sql
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from sqlalchemy import UniqueConstraint
+from sqlalchemy.orm import relationship, foreign
+from sqlalchemy import UniqueConstraint, event
 from datetime import datetime
 import enum
 
 Base = declarative_base()
+#read only materialized views - not part of Base.metadata, they are created and dropped with it via ddl events (see best_entry_views)
+ViewBase = declarative_base()
 
 #Enums used within the db tables
 class EnumSiteStatus(enum.Enum):
@@ -115,6 +117,15 @@ class EnumPredictionProcessingStatus(enum.Enum):
     completed = "completed"
     failed = "failed"
 
+class EnumAnalysisJobStatus(enum.Enum):
+    """[summary]
+    status codes for asynchronous analysis jobs e.g. waiting in the queue, ongoing, completed or failed
+    """
+    queued = "queued"
+    processing = "processing"
+    completed = "completed"
+    failed = "failed"
+
 #Definition of db tables
 class Prediction(Base):
     """database table prediction stores the mal2_models prediction
@@ -131,6 +142,10 @@ class Prediction(Base):
     timestamp = sql.Column(
         sql.DateTime, default=datetime.now, onupdate=datetime.now
     )
+    #latest prediction of a site per algorithm
+    __table_args__ = (
+        sql.Index("ix_prediction_site_id_algorithm_timestamp", site_id, algorithm, timestamp.desc()),
+    )
     def __repr__(self):
         return "<Prediction(id='%s', site='%s', html_hash='%s', prediction='%s', algorithm='%s', model_version='%s', timestamp='%s')>" % (self.id, self.site, self.html_hash, self.prediction, self.algorithm, self.model_version, self.timestamp)
 
@@ -141,21 +156,53 @@ class PredictionStatus(Base):
     id = sql.Column(sql.BigInteger , primary_key=True)
     url = sql.Column(sql.String(256), nullable=False)
     status = sql.Column(sql.Enum(EnumPredictionProcessingStatus), nullable=False)
-    UniqueConstraint(url)
     timestamp = sql.Column(
         sql.DateTime, default=datetime.now, onupdate=datetime.now
     )
+    __table_args__ = (
+        UniqueConstraint("url", name="uq_predictionstatus_url"),
+    )
     def __repr__(self):
         return "<PredictionStatus(id='%s', url='%s', status='%s', timestamp='%s')>" % (self.id, self.url, self.status, self.timestamp)
 
+class AnalysisJob(Base):
+    """ queue of asynchronous analysis requests and their SiteAnalysisResult once processed
+    """
+    __tablename__ = "analysisjob"
+    id = sql.Column(sql.BigInteger , primary_key=True)
+    job_id = sql.Column(sql.String(36), nullable=False, unique=True)
+    url = sql.Column(sql.String(256), nullable=False)
+    client_id = sql.Column(sql.String(256))
+    status = sql.Column(sql.Enum(EnumAnalysisJobStatus), nullable=False, default=EnumAnalysisJobStatus.queued)
+    #SiteAnalysisResult once completed
+    site_id = sql.Column(sql.BigInteger)
+    processor = sql.Column(sql.String(32))
+    risk_score = sql.Column(sql.String(32))
+    analyzed_date_time = sql.Column(sql.DateTime)
+    #error message once failed
+    error = sql.Column(sql.String(512))
+    created = sql.Column(sql.DateTime, default=datetime.now)
+    timestamp = sql.Column(
+        sql.DateTime, default=datetime.now, onupdate=datetime.now
+    )
+    #claiming the oldest queued job and looking up unfinished jobs of a url
+    __table_args__ = (
+        sql.Index("ix_analysisjob_status_id", status, id),
+        sql.Index("ix_analysisjob_url_status", url, status),
+    )
+    def __repr__(self):
+        return "<AnalysisJob(id='%s', job_id='%s', url='%s', status='%s', processor='%s', risk_score='%s', timestamp='%s')>" % (self.id, self.job_id, self.url, self.status, self.processor, self.risk_score, self.timestamp)
+
 class Site(Base):
     """ website information master table
     """
     __tablename__ = "site"
     id = sql.Column(sql.BigInteger , primary_key=True)
     url = sql.Column(sql.String(256), nullable=False)
-    UniqueConstraint(url)
     status = sql.Column(sql.Enum(EnumSiteStatus), nullable=False, default=EnumSiteStatus.unknown)
+    __table_args__ = (
+        UniqueConstraint("url", name="uq_site_url"),
+    )
     def __repr__(self):
         return "<Site(id='%s', url='%s', status='%s')>" % (self.id, self.url, self.status)
 
@@ -169,13 +216,17 @@ class Blacklist(Base):
     site = relationship("Site",lazy="joined")
     blacklist_source_id = sql.Column(sql.Integer, sql.ForeignKey('blacklist_source.id'), nullable=False)
     blacklist_source = relationship("BlacklistSource",lazy="joined")
-    UniqueConstraint(site_id, blacklist_source_id)
     type = sql.Column(sql.Enum(EnumBlacklistType), nullable=False, default=EnumBlacklistType.other)
     timestamp = sql.Column(
         sql.DateTime, default=datetime.now
     )
     information_link = sql.Column(sql.String(256))
     screenshot_link = sql.Column(sql.String(256))
+    #best list entry per site - matches the order by of the get_best_blacklist_db_entry queries
+    __table_args__ = (
+        UniqueConstraint("site_id", "blacklist_source_id", name="uq_blacklist_site_id_blacklist_source_id"),
+        sql.Index("ix_blacklist_best_entry", site_id, blacklist_source_id, timestamp.desc(), id.desc()),
+    )
     def __repr__(self):
         return "<Blacklist(id='%s', site='%s', blacklist_source='%s', type='%s', timestamp='%s', information_link='%s', screenshot_link='%s')>" % (self.id, self.site, self.blacklist_source, self.type, self.timestamp, self.information_link, self.screenshot_link)
 
@@ -188,7 +239,9 @@ class BlacklistSource(Base):
     description = sql.Column(sql.String(512))
     url = sql.Column(sql.String(256))
     logo_url = sql.Column(sql.String(256))
-    UniqueConstraint(name)
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_blacklist_source_name"),
+    )
     def __repr__(self):
         return "<BlacklisSource(id='%s', name='%s', description='%s', url='%s', logo_url='%s')>" % (self.id, self.name, self.description, self.url, self.logo_url)
 
@@ -202,13 +255,17 @@ class Greylist(Base):
     site = relationship("Site",lazy="joined")
     greylist_source_id = sql.Column(sql.Integer, sql.ForeignKey('greylist_source.id'), nullable=False)
     greylist_source = relationship("GreylistSource",lazy="joined")
-    UniqueConstraint(site_id, greylist_source_id)
     type = sql.Column(sql.Enum(EnumGreylistType), nullable=False, default=EnumGreylistType.other)
     timestamp = sql.Column(
         sql.DateTime, default=datetime.now
     )
     information_link = sql.Column(sql.String(256))
     screenshot_link = sql.Column(sql.String(256))
+    #best list entry per site - matches the order by of the get_best_greylist_db_entry queries
+    __table_args__ = (
+        UniqueConstraint("site_id", "greylist_source_id", name="uq_greylist_site_id_greylist_source_id"),
+        sql.Index("ix_greylist_best_entry", site_id, greylist_source_id, timestamp.desc(), id.desc()),
+    )
     def __repr__(self):
         return "<Greylist(id='%s', site='%s', greylist_source='%s', type='%s', timestamp='%s', information_link='%s', screenshot_link='%s')>" % (self.id, self.site, self.greylist_source, self.type, self.timestamp, self.information_link, self.screenshot_link)
 
@@ -221,7 +278,9 @@ class GreylistSource(Base):
     description = sql.Column(sql.String(512))
     url = sql.Column(sql.String(256))
     logo_url = sql.Column(sql.String(256))
-    UniqueConstraint(name)
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_greylist_source_name"),
+    )
     def __repr__(self):
         return "<GreylisSource(id='%s', name='%s', description='%s', url='%s', logo_url='%s')>" % (self.id, self.name, self.description, self.url, self.logo_url)
 
@@ -235,7 +294,6 @@ class Whitelist(Base):
     site = relationship("Site",lazy="joined")
     whitelist_source_id = sql.Column(sql.Integer, sql.ForeignKey('whitelist_source.id'), nullable=False)
     whitelist_source = relationship("WhitelistSource",lazy="joined")
-    UniqueConstraint(site_id, whitelist_source_id)
     type = sql.Column(sql.Enum(EnumWhitelistType), nullable=False, default=EnumWhitelistType.unknown)
     timestamp = sql.Column(
         sql.DateTime, default=datetime.now
@@ -243,6 +301,11 @@ class Whitelist(Base):
     information_link = sql.Column(sql.String(256))
     company_id = sql.Column(sql.Integer, sql.ForeignKey('company.id'), nullable=False)
     company = relationship("Company",lazy="joined")
+    #best list entry per site - matches the order by of the get_best_whitelist_db_entry queries
+    __table_args__ = (
+        UniqueConstraint("site_id", "whitelist_source_id", name="uq_whitelist_site_id_whitelist_source_id"),
+        sql.Index("ix_whitelist_best_entry", site_id, type, whitelist_source_id, timestamp.desc(), id.desc()),
+    )
     def __repr__(self):
         return "<Whitelist(id='%s', site='%s', whitelist_source='%s', type='%s', timestamp='%s', information_link='%s', company='%s')>" % (self.id, self.site, self.whitelist_source, self.type, self.timestamp, self.information_link, self.company)
 
@@ -257,7 +320,9 @@ class Company(Base):
     city = sql.Column(sql.String(256))
     country = sql.Column(sql.String(128))
     logo_url = sql.Column(sql.String(256))
-    UniqueConstraint(name)
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_company_name"),
+    )
     def __repr__(self):
         return "<Company(id='%s', name='%s', street='%s', zip_code='%s', city='%s', country='%s', logo_url='%s')>" % (self.id, self.name, self.street, self.zip_code, self.city, self.country, self.logo_url)
 
@@ -270,7 +335,9 @@ class WhitelistSource(Base):
     description = sql.Column(sql.String(512))
     url = sql.Column(sql.String(256))
     logo_url = sql.Column(sql.String(256))
-    UniqueConstraint(name)
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_whitelist_source_name"),
+    )
     def __repr__(self):
         return "<WhitelistSource(id='%s', name='%s', description='%s', url='%s', logo_url='%s')>" % (self.id, self.name, self.description, self.url, self.logo_url)
 
@@ -286,10 +353,14 @@ class Ignorelist(Base):
     ignorelist_source_id = sql.Column(sql.Integer, sql.ForeignKey('ignorelist_source.id'), nullable=False)
     ignorelist_source = relationship("IgnorelistSource",lazy="joined")
     category = sql.Column(sql.Enum(EnumIgnoreListCategory), nullable=False, default=EnumIgnoreListCategory.unknown)
-    UniqueConstraint(site_id, ignorelist_source_id)
     timestamp = sql.Column(
         sql.DateTime, default=datetime.now
     )
+    #best list entry per site - matches the order by of the get_best_ignorelist_db_entry queries
+    __table_args__ = (
+        UniqueConstraint("site_id", "ignorelist_source_id", name="uq_ignorelist_site_id_ignorelist_source_id"),
+        sql.Index("ix_ignorelist_best_entry", site_id, ignorelist_source_id, timestamp.desc(), id.desc()),
+    )
     def __repr__(self):
         return "<Ignorelist(id='%s', site='%s', ignorelist_source='%s', category='%s', timestamp='%s')>" % (self.id, self.site, self.ignorelist_source, self.category, self.timestamp)
 
@@ -302,6 +373,214 @@ class IgnorelistSource(Base):
     description = sql.Column(sql.String(512))
     url = sql.Column(sql.String(256))
     logo_url = sql.Column(sql.String(256))
-    UniqueConstraint(name)
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_ignorelist_source_name"),
+    )
+    def __repr__(self):
+        return "<IgnorelistSource(id='%s', name='%s', description='%s', url='%s', logo_url='%s')>" % (self.id, self.name, self.description, self.url, self.logo_url)
+
+class SchemaVersion(Base):
+    """ applied schema migrations - see mal2.db.migration.db_migration
+    """
+    __tablename__ = "schema_version"
+    version = sql.Column(sql.Integer, primary_key=True, autoincrement=False)
+    description = sql.Column(sql.String(256))
+    applied = sql.Column(sql.DateTime, default=datetime.now)
+    def __repr__(self):
+        return "<SchemaVersion(version='%s', description='%s', applied='%s')>" % (self.version, self.description, self.applied)
+
+
+class ListChange(Base):
+    """ change log of the white-, black-, grey- and ignorelist tables - written by db triggers (see list_change_triggers)
+    """
+    __tablename__ = "list_change"
+    id = sql.Column(sql.BigInteger, primary_key=True)
+    #monotonically increasing version per list - assigned in commit order when published, None until then (see db_handler.refresh_best_list_db_entries)
+    version = sql.Column(sql.BigInteger)
+    list_name = sql.Column(sql.String(32), nullable=False)
+    site_id = sql.Column(sql.BigInteger, nullable=False)
+    operation = sql.Column(sql.String(8), nullable=False)
+    timestamp = sql.Column(sql.DateTime, default=datetime.now)
+    __table_args__ = (
+        sql.Index("ix_list_change_list_name_version", list_name, version),
+    )
+    def __repr__(self):
+        return "<ListChange(id='%s', version='%s', list_name='%s', site_id='%s', operation='%s', timestamp='%s')>" % (self.id, self.version, self.list_name, self.site_id, self.operation, self.timestamp)
+
+class ListVersion(Base):
+    """ latest list_change version per list that's reflected by its best entry view i.e. visible to clients
+    """
+    __tablename__ = "list_version"
+    list_name = sql.Column(sql.String(32), primary_key=True)
+    version = sql.Column(sql.BigInteger, nullable=False, default=0)
+    #changes up to this version were removed from the log - clients at an older version have to re-download the full list
+    min_version = sql.Column(sql.BigInteger, nullable=False, default=0)
+    timestamp = sql.Column(
+        sql.DateTime, default=datetime.now, onupdate=datetime.now
+    )
+    def __repr__(self):
+        return "<ListVersion(list_name='%s', version='%s', min_version='%s', timestamp='%s')>" % (self.list_name, self.version, self.min_version, self.timestamp)
+
+class SourceFingerprint(Base):
+    """ http validators and content hash of the last imported payload per list source endpoint - see mal2.sources.source_fingerprint
+    """
+    __tablename__ = "source_fingerprint"
+    #source_fetch.Source name
+    source = sql.Column(sql.String(64), primary_key=True)
+    url = sql.Column(sql.String(512), primary_key=True)
+    etag = sql.Column(sql.String(256))
+    last_modified = sql.Column(sql.String(64))
+    #sha256 of the payload
+    content_hash = sql.Column(sql.String(64))
+    #max imported entries of the source the payload was imported with, -1 imports all
+    import_limit = sql.Column(sql.Integer)
+    timestamp = sql.Column(
+        sql.DateTime, default=datetime.now, onupdate=datetime.now
+    )
+    def __repr__(self):
+        return "<SourceFingerprint(source='%s', url='%s', etag='%s', last_modified='%s', content_hash='%s', import_limit='%s', timestamp='%s')>" % (self.source, self.url, self.etag, self.last_modified, self.content_hash, self.import_limit, self.timestamp)
+
+#Definition of the list change triggers
+list_change_triggers = [
+    """CREATE OR REPLACE FUNCTION record_list_change() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO list_change (list_name, site_id, operation, timestamp) VALUES (TG_TABLE_NAME, OLD.site_id, lower(TG_OP), localtimestamp);
+        END IF;
+        IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.site_id <> OLD.site_id) THEN
+            INSERT INTO list_change (list_name, site_id, operation, timestamp) VALUES (TG_TABLE_NAME, NEW.site_id, lower(TG_OP), localtimestamp);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql"""
+]
+for list_table in ["blacklist", "greylist", "whitelist", "ignorelist"]:
+    list_change_triggers += [
+        "DROP TRIGGER IF EXISTS {table}_change ON {table}".format(table=list_table),
+        "CREATE TRIGGER {table}_change AFTER INSERT OR UPDATE OR DELETE ON {table} FOR EACH ROW EXECUTE PROCEDURE record_list_change()".format(table=list_table)
+    ]
+for statement in list_change_triggers:
+    event.listen(Base.metadata, "after_create", sql.DDL(statement))
+
+
+#Definition of the materialized views
+def __best_entry_view_ddl(view:str, list_table:str, source_table:str, columns:str, order_by:str, joins:str="") -> list:
+    #best list entry per site with its source joined in - ranked as in the get_all_best_*_db_entries queries
+    return [
+        "CREATE MATERIALIZED VIEW IF NOT EXISTS {view} AS SELECT DISTINCT ON (l.site_id) l.id, l.site_id, {columns}, "
+        "s.name AS source_name, s.description AS source_description, s.url AS source_url, s.logo_url AS source_logo_url "
+        "FROM {list_table} l JOIN {source_table} s ON s.id = l.{source_table}_id {joins} "
+        "ORDER BY l.site_id, {order_by}".format(view=view, list_table=list_table, source_table=source_table, columns=columns, order_by=order_by, joins=joins),
+        #required for refreshing concurrently - and the keyset pagination by site_id
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_{view}_site_id ON {view} (site_id)".format(view=view)
+    ]
+
+#view name -> ddl statements. Refreshed after each list import via db_handler.refresh_best_list_db_entries
+best_entry_views = {
+    "best_blacklist": __best_entry_view_ddl("best_blacklist", "blacklist", "blacklist_source",
+        "l.blacklist_source_id, l.type, l.timestamp, l.information_link, l.screenshot_link",
+        "l.blacklist_source_id ASC, l.timestamp DESC, l.id DESC"),
+    "best_greylist": __best_entry_view_ddl("best_greylist", "greylist", "greylist_source",
+        "l.greylist_source_id, l.type, l.timestamp, l.information_link, l.screenshot_link",
+        "l.greylist_source_id ASC, l.timestamp DESC, l.id DESC"),
+    "best_whitelist": __best_entry_view_ddl("best_whitelist", "whitelist", "whitelist_source",
+        "l.whitelist_source_id, l.type, l.timestamp, l.information_link, l.company_id, c.name AS company_name, c.street AS company_street, "
+        "c.zip_code AS company_zip_code, c.city AS company_city, c.country AS company_country, c.logo_url AS company_logo_url",
+        "l.type ASC, l.whitelist_source_id ASC, l.timestamp DESC, l.id DESC",
+        joins="JOIN company c ON c.id = l.company_id"),
+    "best_ignorelist": __best_entry_view_ddl("best_ignorelist", "ignorelist", "ignorelist_source",
+        "l.ignorelist_source_id, l.category, l.timestamp",
+        "l.ignorelist_source_id ASC, l.timestamp DESC, l.id DESC"),
+}
+for view, statements in best_entry_views.items():
+    for statement in statements:
+        event.listen(Base.metadata, "after_create", sql.DDL(statement))
+    event.listen(Base.metadata, "before_drop", sql.DDL("DROP MATERIALIZED VIEW IF EXISTS "+view))
+
+class BestBlacklist(ViewBase):
+    """ materialized view of the most important blacklist entry per site with its blacklist_source joined in
+    """
+    __tablename__ = "best_blacklist"
+    #list table and list_change.list_name
+    list_name = "blacklist"
+    site_id = sql.Column(sql.Integer, primary_key=True)
+    site = relationship(Site, primaryjoin=lambda: foreign(BestBlacklist.site_id) == Site.id, lazy="joined", viewonly=True)
+    id = sql.Column(sql.BigInteger)
+    blacklist_source_id = sql.Column(sql.Integer)
+    type = sql.Column(sql.Enum(EnumBlacklistType))
+    timestamp = sql.Column(sql.DateTime)
+    information_link = sql.Column(sql.String(256))
+    screenshot_link = sql.Column(sql.String(256))
+    source_name = sql.Column(sql.Enum(EnumBlacklistSources))
+    source_description = sql.Column(sql.String(512))
+    source_url = sql.Column(sql.String(256))
+    source_logo_url = sql.Column(sql.String(256))
+    def __repr__(self):
+        return "<BestBlacklist(id='%s', site='%s', source_name='%s', type='%s', timestamp='%s')>" % (self.id, self.site, self.source_name, self.type, self.timestamp)
+
+class BestGreylist(ViewBase):
+    """ materialized view of the most important greylist entry per site with its greylist_source joined in
+    """
+    __tablename__ = "best_greylist"
+    #list table and list_change.list_name
+    list_name = "greylist"
+    site_id = sql.Column(sql.Integer, primary_key=True)
+    site = relationship(Site, primaryjoin=lambda: foreign(BestGreylist.site_id) == Site.id, lazy="joined", viewonly=True)
+    id = sql.Column(sql.BigInteger)
+    greylist_source_id = sql.Column(sql.Integer)
+    type = sql.Column(sql.Enum(EnumGreylistType))
+    timestamp = sql.Column(sql.DateTime)
+    information_link = sql.Column(sql.String(256))
+    screenshot_link = sql.Column(sql.String(256))
+    source_name = sql.Column(sql.Enum(EnumGreylistSources))
+    source_description = sql.Column(sql.String(512))
+    source_url = sql.Column(sql.String(256))
+    source_logo_url = sql.Column(sql.String(256))
+    def __repr__(self):
+        return "<BestGreylist(id='%s', site='%s', source_name='%s', type='%s', timestamp='%s')>" % (self.id, self.site, self.source_name, self.type, self.timestamp)
+
+class BestWhitelist(ViewBase):
+    """ materialized view of the most important whitelist entry per site with its whitelist_source and company joined in
+    """
+    __tablename__ = "best_whitelist"
+    #list table and list_change.list_name
+    list_name = "whitelist"
+    site_id = sql.Column(sql.Integer, primary_key=True)
+    site = relationship(Site, primaryjoin=lambda: foreign(BestWhitelist.site_id) == Site.id, lazy="joined", viewonly=True)
+    id = sql.Column(sql.BigInteger)
+    whitelist_source_id = sql.Column(sql.Integer)
+    type = sql.Column(sql.Enum(EnumWhitelistType))
+    timestamp = sql.Column(sql.DateTime)
+    information_link = sql.Column(sql.String(256))
+    source_name = sql.Column(sql.Enum(EnumWhitelistSources))
+    source_description = sql.Column(sql.String(512))
+    source_url = sql.Column(sql.String(256))
+    source_logo_url = sql.Column(sql.String(256))
+    company_id = sql.Column(sql.Integer)
+    company_name = sql.Column(sql.String(256))
+    company_street = sql.Column(sql.String(256))
+    company_zip_code = sql.Column(sql.String(10))
+    company_city = sql.Column(sql.String(256))
+    company_country = sql.Column(sql.String(128))
+    company_logo_url = sql.Column(sql.String(256))
+    def __repr__(self):
+        return "<BestWhitelist(id='%s', site='%s', source_name='%s', type='%s', timestamp='%s', company_name='%s')>" % (self.id, self.site, self.source_name, self.type, self.timestamp, self.company_name)
+
+class BestIgnorelist(ViewBase):
+    """ materialized view of the most important ignorelist entry per site with its ignorelist_source joined in
+    """
+    __tablename__ = "best_ignorelist"
+    #list table and list_change.list_name
+    list_name = "ignorelist"
+    site_id = sql.Column(sql.Integer, primary_key=True)
+    site = relationship(Site, primaryjoin=lambda: foreign(BestIgnorelist.site_id) == Site.id, lazy="joined", viewonly=True)
+    id = sql.Column(sql.BigInteger)
+    ignorelist_source_id = sql.Column(sql.Integer)
+    category = sql.Column(sql.Enum(EnumIgnoreListCategory))
+    timestamp = sql.Column(sql.DateTime)
+    source_name = sql.Column(sql.Enum(EnumIgnorelistSources))
+    source_description = sql.Column(sql.String(512))
+    source_url = sql.Column(sql.String(256))
+    source_logo_url = sql.Column(sql.String(256))
     def __repr__(self):
-        return "<IgnorelistSource(id='%s', name='%s', description='%s', url='%s', logo_url='%s')>" % (self.id, self.name, self.description, self.url, self.logo_url)
\ No newline at end of file
+        return "<BestIgnorelist(id='%s', site='%s', source_name='%s', category='%s', timestamp='%s')>" % (self.id, self.site, self.source_name, self.category, self.timestamp)
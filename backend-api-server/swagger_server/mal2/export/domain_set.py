@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+import bisect
+import hashlib
+import struct
+import threading
+from collections import namedtuple
+import swagger_server.mal2.export.list_snapshot as list_snapshot
+from swagger_server import logger_config as log
+
+#compact binary set of all listed domains - allows clients to classify known sites locally and only call /analyze for unknown ones
+#
+#format version 1, all integers big-endian (javascript DataView default):
+#  header      magic "MAL2DSET" (8 bytes), format version (uint16), hash bits (uint16), section count (uint16), reserved (uint16),
+#              created unix timestamp (uint64)
+#  sections    per list: name (16 bytes ascii, zero padded) and number of hashes (uint32)
+#  hashes      per list in section order: sorted unique domain hashes (uint64) - a domain is found via binary search
+#
+#domain hash: first 8 bytes of sha256 over the normalized base url e.g. google.at (utf-8) as uint64
+magic = b"MAL2DSET"
+format_version = 1
+hash_bits = 64
+name = "domainset"
+mimetype = "application/octet-stream"
+#seconds a client waits before retrying if the domain set was not rendered yet e.g. during startup
+unavailable_retry_after = 60
+
+__header = struct.Struct(">8sHHHHQ")
+__section = struct.Struct(">16sI")
+
+#sections of a parsed domain set - list name -> sorted domain hashes
+DomainSet = namedtuple("DomainSet", ["format_version", "created", "sections"])
+
+__render_lock = threading.Lock()
+
+
+def hash_domain(url:str) -> int:
+    """hashes a domain as stored in the domain set
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+
+    Returns:
+        int -- unsigned 64 bit hash
+    """
+    return int.from_bytes(hashlib.sha256(url.encode("utf-8")).digest()[:8], "big")
+
+def pack(sections:dict, created:int=None) -> bytes:
+    """serializes the domains of all lists into the binary domain set format
+
+    Arguments:
+        sections {dict} -- list name e.g. blacklist -> list of normalized base urls
+
+    Keyword Arguments:
+        created {int} -- unix timestamp written to the header (default: {now})
+
+    Returns:
+        bytes -- the domain set
+    """
+    if created == None:
+        created = int(time.time())
+    hashes = [(list_name, sorted(set(hash_domain(url) for url in urls))) for list_name, urls in sections.items()]
+    data = [__header.pack(magic, format_version, hash_bits, len(hashes), 0, created)]
+    for list_name, list_hashes in hashes:
+        data.append(__section.pack(list_name.encode("ascii"), len(list_hashes)))
+    for list_name, list_hashes in hashes:
+        data.append(struct.pack(">%sQ"%len(list_hashes), *list_hashes))
+    return b"".join(data)
+
+def unpack(data:bytes) -> DomainSet:
+    """parses a binary domain set e.g. for verifying a published artifact
+
+    Arguments:
+        data {bytes} -- the domain set
+
+    Returns:
+        DomainSet -- format version, created timestamp and the sorted hashes per list
+    """
+    if len(data) < __header.size:
+        raise ValueError("domain set truncated")
+    file_magic, file_format_version, file_hash_bits, section_count, _, created = __header.unpack_from(data, 0)
+    if file_magic != magic:
+        raise ValueError("not a domain set")
+    if file_format_version != format_version or file_hash_bits != hash_bits:
+        raise ValueError("unsupported domain set format version %s with %s bit hashes"%(file_format_version,file_hash_bits))
+    offset = __header.size
+    section_list = []
+    for _ in range(section_count):
+        list_name, count = __section.unpack_from(data, offset)
+        section_list.append((list_name.rstrip(b"\0").decode("ascii"), count))
+        offset += __section.size
+    sections = {}
+    for list_name, count in section_list:
+        if len(data) < offset+count*8:
+            raise ValueError("domain set truncated")
+        sections[list_name] = struct.unpack_from(">%sQ"%count, data, offset)
+        offset += count*8
+    return DomainSet(file_format_version, created, sections)
+
+def lookup(domain_set:DomainSet, url:str) -> str:
+    """classifies a site as the browser plugin does
+
+    Arguments:
+        domain_set {DomainSet} -- the parsed domain set
+        url {str} -- normalized base url e.g. google.at
+
+    Returns:
+        str -- name of the list containing the site or None if the site is unknown and needs to be analyzed
+    """
+    url_hash = hash_domain(url)
+    for list_name, hashes in domain_set.sections.items():
+        i = bisect.bisect_left(hashes, url_hash)
+        if i < len(hashes) and hashes[i] == url_hash:
+            return list_name
+    return None
+
+def get() -> list_snapshot.ListSnapshot:
+    """returns the latest rendered domain set - rendered by any process (see list_snapshot.read_manifest)
+
+    Returns:
+        ListSnapshot -- the domain set file or None if it was not rendered yet
+    """
+    return list_snapshot.read_manifest(name)
+
+def render(sections:dict) -> list_snapshot.ListSnapshot:
+    """renders the domain set to a versioned file next to the list snapshots. Clients of all processes are served the previous version
+    until the new one is completely written
+
+    Arguments:
+        sections {dict} -- list name e.g. blacklist -> list of normalized base urls
+
+    Returns:
+        ListSnapshot -- the rendered domain set
+    """
+    os.makedirs(list_snapshot.snapshot_dir, exist_ok=True)
+    #unique per process - several processes may render the domain set
+    tmp_path = os.path.join(list_snapshot.snapshot_dir, ".%s-%s.bin.tmp"%(name, os.getpid()))
+    with __render_lock:
+        data = pack(sections)
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        path = os.path.join(list_snapshot.snapshot_dir, "%s-%s.bin"%(name, etag))
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        #hashes don't compress - no gzip copy
+        snapshot = list_snapshot.ListSnapshot(name, etag, path, None, sum(len(urls) for urls in sections.values()), None)
+        list_snapshot.write_manifest(snapshot)
+        list_snapshot.remove_old_versions(snapshot)
+    log.mal2_rest_log.info("rendered domain set with %s domains (%s bytes): %s",snapshot.count,len(data),path)
+    return snapshot
+
+
+if __name__ == '__main__':
+    #verifies a published domain set e.g. 'python -m swagger_server.mal2.export.domain_set domainset.bin google.at fakeshop.com'
+    if len(sys.argv) < 2:
+        print("usage: domain_set.py <domain set file> [normalized base url ...]")
+        sys.exit(1)
+    with open(sys.argv[1], "rb") as f:
+        domain_set = unpack(f.read())
+    print("format version %s created %s"%(domain_set.format_version, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(domain_set.created))))
+    for list_name, hashes in domain_set.sections.items():
+        print("%s: %s domains, sorted %s"%(list_name, len(hashes), all(hashes[i] < hashes[i+1] for i in range(len(hashes)-1))))
+    for url in sys.argv[2:]:
+        print("%s: %s"%(url, lookup(domain_set, url) or "unknown"))
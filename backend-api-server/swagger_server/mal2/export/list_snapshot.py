@@ -0,0 +1,199 @@
+import os
+import glob
+import gzip
+import hashlib
+import json
+import threading
+from collections import namedtuple
+from flask import Response, send_file
+from swagger_server import encoder
+from swagger_server import logger_config as log
+
+#directory of the rendered full lists - shared by all api processes, a process serves the snapshots rendered by any of them. Set it to
+#a shared volume if the api processes run on different hosts/containers
+snapshot_dir = os.environ.get("MAL2_LIST_SNAPSHOT_DIR", os.path.abspath(os.getcwd()+"/swagger_server/resources/snapshots/".replace("/",os.path.sep)))
+#optional nginx internal location that maps to snapshot_dir e.g. /list-snapshots/ - nginx then sends the file instead of the api process
+#(enable gzip_static within that location to serve the pre-compressed copy)
+accel_redirect_location = os.environ.get("MAL2_LIST_SNAPSHOT_ACCEL_REDIRECT")
+#rendered versions kept on disk per list - older ones may still be sent to clients
+keep_versions = 2
+
+#a rendered full list - the etag is the content hash which is also part of the file name, the version is the list change log
+#version the clients can request changes since
+ListSnapshot = namedtuple("ListSnapshot", ["name", "etag", "path", "gzip_path", "count", "version"])
+
+#snapshot name -> (manifest file identity, ListSnapshot) as last read from the snapshot's manifest file
+__snapshots = {}
+__render_lock = threading.Lock()
+
+
+def get(list_name:str) -> ListSnapshot:
+    """returns the latest rendered snapshot of a list - rendered by any process
+
+    Arguments:
+        list_name {str} -- e.g. blacklist
+
+    Returns:
+        ListSnapshot -- the snapshot or None if the list was not rendered yet
+    """
+    return read_manifest(list_name)
+
+def __get_manifest_path(name:str) -> str:
+    return os.path.join(snapshot_dir, "%s.latest"%name)
+
+def write_manifest(snapshot:ListSnapshot):
+    """publishes a rendered snapshot as the latest one to all processes - the manifest file is replaced atomically
+
+    Arguments:
+        snapshot {ListSnapshot} -- the completely written snapshot
+    """
+    manifest_path = __get_manifest_path(snapshot.name)
+    tmp_path = os.path.join(snapshot_dir, ".%s.latest.%s.tmp"%(snapshot.name, os.getpid()))
+    try:
+        with open(tmp_path, "w") as f:
+            #file names only - snapshot_dir may be mounted at different paths
+            json.dump({
+                "name": snapshot.name,
+                "etag": snapshot.etag,
+                "file": os.path.basename(snapshot.path),
+                "gzip_file": os.path.basename(snapshot.gzip_path) if snapshot.gzip_path else None,
+                "count": snapshot.count,
+                "version": snapshot.version
+            }, f)
+        os.replace(tmp_path, manifest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def read_manifest(name:str) -> ListSnapshot:
+    """returns the latest snapshot published by write_manifest - the manifest file is only re-read once it was replaced
+
+    Arguments:
+        name {str} -- snapshot name e.g. blacklist
+
+    Returns:
+        ListSnapshot -- the snapshot or None if it was not rendered yet
+    """
+    manifest_path = __get_manifest_path(name)
+    try:
+        stat = os.stat(manifest_path)
+    except FileNotFoundError:
+        return None
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = __snapshots.get(name)
+    if cached != None and cached[0] == identity:
+        return cached[1]
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        log.mal2_rest_log.warning("failed reading snapshot manifest %s: %s",manifest_path,e)
+        return None
+    snapshot = ListSnapshot(
+        manifest["name"],
+        manifest["etag"],
+        os.path.join(snapshot_dir, manifest["file"]),
+        os.path.join(snapshot_dir, manifest["gzip_file"]) if manifest["gzip_file"] else None,
+        manifest["count"],
+        manifest["version"]
+    )
+    __snapshots[name] = (identity, snapshot)
+    return snapshot
+
+def render(list_name:str, entries, version:int=None) -> ListSnapshot:
+    """renders all entries of a list once to a versioned json file and its gzip compressed copy. Clients of all processes are served the
+    previous version until the new one is completely written
+
+    Arguments:
+        list_name {str} -- e.g. blacklist
+        entries {Iterator} -- swagger models of all list entries e.g. BlackListEntry
+
+    Keyword Arguments:
+        version {int} -- published list change log version the entries contain (default: {None})
+
+    Returns:
+        ListSnapshot -- the rendered snapshot
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    #unique per process - several processes may render the same list
+    tmp_path = os.path.join(snapshot_dir, ".%s-%s.json.tmp"%(list_name, os.getpid()))
+    tmp_gzip_path = tmp_path+".gz"
+    with __render_lock:
+        digest = hashlib.sha256()
+        count = 0
+        try:
+            with open(tmp_path, "wb") as f, gzip.open(tmp_gzip_path, "wb") as gz:
+                def write(chunk:str):
+                    data = chunk.encode("utf-8")
+                    digest.update(data)
+                    f.write(data)
+                    gz.write(data)
+
+                write("[")
+                for entry in entries:
+                    write(("," if count > 0 else "")+json.dumps(entry, cls=encoder.JSONEncoder))
+                    count += 1
+                write("]")
+            etag = digest.hexdigest()[:32]
+            path = os.path.join(snapshot_dir, "%s-%s.json"%(list_name, etag))
+            os.replace(tmp_path, path)
+            os.replace(tmp_gzip_path, path+".gz")
+        finally:
+            for tmp in [tmp_path, tmp_gzip_path]:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        snapshot = ListSnapshot(list_name, etag, path, path+".gz", count, version)
+        write_manifest(snapshot)
+        remove_old_versions(snapshot)
+    log.mal2_rest_log.info("rendered %s snapshot with %s entries: %s",list_name,count,path)
+    return snapshot
+
+def remove_old_versions(snapshot:ListSnapshot):
+    """removes all but the latest keep_versions rendered versions of a snapshot from disk
+
+    Arguments:
+        snapshot {ListSnapshot} -- the latest snapshot
+    """
+    paths = glob.glob(os.path.join(snapshot_dir, "%s-*%s"%(snapshot.name, os.path.splitext(snapshot.path)[1])))
+    paths = [path for path in paths if path != snapshot.path]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[keep_versions-1:]:
+        for old in [path, path+".gz"]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+def send(snapshot:ListSnapshot, request, mimetype:str="application/json") -> Response:
+    """sends a rendered snapshot without serializing the list again - gzip compressed if accepted by the client and
+    304 not modified if the client already holds this version (If-None-Match)
+
+    Arguments:
+        snapshot {ListSnapshot} -- the snapshot to send
+        request -- the current flask request
+
+    Keyword Arguments:
+        mimetype {str} -- content type of the snapshot file (default: {"application/json"})
+
+    Returns:
+        Response -- flask response
+    """
+    use_gzip = snapshot.gzip_path != None and "gzip" in request.accept_encodings
+    #different representations require different etags
+    etag = snapshot.etag+"-gzip" if use_gzip else snapshot.etag
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif accel_redirect_location:
+        #nginx sends the file (and sets its own etag)
+        response = Response(mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = accel_redirect_location+os.path.basename(snapshot.path)
+    else:
+        #wsgi file wrapper - sendfile if supported by the server
+        response = send_file(snapshot.gzip_path if use_gzip else snapshot.path, mimetype=mimetype, add_etags=False, conditional=False)
+        if use_gzip:
+            response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(etag)
+    if snapshot.version != None:
+        response.headers["X-List-Version"] = str(snapshot.version)
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
@@ -0,0 +1,125 @@
+import threading
+import datetime as dt
+from time import monotonic
+import swagger_server.mal2.db.handler.db_handler as db
+import swagger_server.mal2.db.model.db_model as db_model
+from swagger_server import logger_config as log
+
+#number of worker threads draining the analysis job queue (each worker holds at most one db connection)
+max_workers = 4
+#idle workers re-check the db queue in this interval (seconds) - jobs enqueued by other processes are picked up latest then
+poll_interval = 5
+#processing jobs that were not updated within this period are considered abandoned (e.g. process died) and are claimed again
+stale_after = dt.timedelta(minutes=30)
+#finished jobs are removed from db after
+keep_finished_jobs = dt.timedelta(days=2)
+
+__workers = []
+#set on enqueue within this process to wake up idle workers immediately
+__job_enqueued = threading.Event()
+__stop = threading.Event()
+#notified whenever a worker of this process finished a job (wakes up long polling requests)
+__job_finished = threading.Condition()
+
+
+def enqueue(url:str, client_id:str=None) -> db_model.AnalysisJob:
+    """enqueues an analysis job for the url or returns the already queued/processing job for that url
+
+    Arguments:
+        url {str} -- normalized base url e.g. google.at
+        client_id {str} -- optional client ID of the requesting client
+
+    Returns:
+        db_model.AnalysisJob -- new or existing db_model.AnalysisJob object
+    """
+    job_db = db.create_or_get_analysisjob_db_entry(url, client_id)
+    __job_enqueued.set()
+    return job_db
+
+def wait_for_job(job_id:str, timeout:float) -> db_model.AnalysisJob:
+    """long polling - waits up to timeout seconds for the job to complete or fail. Doesn't hold a db connection while waiting
+
+    Arguments:
+        job_id {str} -- job_id as returned by enqueue
+        timeout {float} -- max seconds to wait
+
+    Returns:
+        db_model.AnalysisJob -- db_model.AnalysisJob object in its latest state or None if the job does not exist
+    """
+    wait_until = monotonic() + timeout
+    while True:
+        job_db = db.get_analysisjob_db_entry_by_job_id(job_id)
+        if job_db == None or job_db.status in [db_model.EnumAnalysisJobStatus.completed, db_model.EnumAnalysisJobStatus.failed]:
+            return job_db
+        remaining = wait_until - monotonic()
+        if remaining <= 0:
+            return job_db
+        db.Session.remove()
+        #jobs finished by other processes are noticed by re-checking the db at least every second
+        with __job_finished:
+            __job_finished.wait(min(remaining, 1))
+
+def start_workers(process_job):
+    """starts the worker threads that drain the analysis job queue. Jobs that were queued (or abandoned) before the start are resumed
+
+    Arguments:
+        process_job {callable} -- called as process_job(url, client_id) by the workers, returns the SiteAnalysisResult or raises an Exception
+    """
+    __stop.clear()
+    for i in range(max_workers):
+        worker = threading.Thread(target=__work, args=(process_job,), name="analysis-job-worker-%s"%i, daemon=True)
+        worker.start()
+        __workers.append(worker)
+    log.mal2_rest_log.info("started %s analysis job workers",max_workers)
+
+def stop_workers():
+    """signals the worker threads to stop after their current job
+    """
+    __stop.set()
+    __job_enqueued.set()
+    __workers.clear()
+
+def cleanup_finished_jobs():
+    """removes finished jobs from the db that are older than keep_finished_jobs
+    """
+    db.delete_analysisjob_db_entries_older_than(dt.datetime.now() - keep_finished_jobs)
+
+def __work(process_job):
+    while not __stop.is_set():
+        try:
+            job_db = db.claim_next_analysisjob_db_entry(dt.datetime.now() - stale_after)
+            if job_db == None:
+                db.Session.remove()
+                #queue empty - sleep until a job gets enqueued
+                __job_enqueued.wait(poll_interval)
+                __job_enqueued.clear()
+                continue
+            __process(job_db, process_job)
+        except Exception as e:
+            log.mal2_rest_log.exception("analysis job worker error: %s",e)
+            __stop.wait(poll_interval)
+        finally:
+            db.Session.remove()
+
+def __process(job_db:db_model.AnalysisJob, process_job):
+    job_id, url, client_id = job_db.job_id, job_db.url, job_db.client_id
+    log.mal2_rest_log.info("processing analysis job %s for site: %s",job_id,url)
+    try:
+        result = process_job(url, client_id)
+        #processing may have removed the worker's db session
+        job_db = db.get_analysisjob_db_entry_by_job_id(job_id)
+        job_db.site_id = result.site_id
+        job_db.processor = result.processor
+        job_db.risk_score = result.risk_score
+        job_db.analyzed_date_time = result.analyzed_date_time
+        job_db.status = db_model.EnumAnalysisJobStatus.completed
+    except Exception as e:
+        log.mal2_rest_log.info("analysis job %s for site: %s failed: %s",job_id,url,e)
+        db.Session.rollback()
+        job_db = db.get_analysisjob_db_entry_by_job_id(job_id)
+        job_db.status = db_model.EnumAnalysisJobStatus.failed
+        job_db.error = str(e)[:512]
+    db.commit_db_etnries(job_db)
+    log.mal2_rest_log.info("finished analysis job %s for site: %s with status: %s",job_id,url,job_db.status)
+    with __job_finished:
+        __job_finished.notify_all()
@@ -4,6 +4,7 @@ import io as io
 import pandas as pd
 from swagger_server import logger_config as log
 import swagger_server.mal2.sources.sources_utils as sources_utils
+import swagger_server.mal2.sources.source_fingerprint as source_fingerprint
 import traceback
 
 def get_all_whitelist_entries():
@@ -60,6 +61,8 @@ def __get_securelisting_json_entry_list(api_url):
             #uses pagination rest-api
             total_pages = resp.headers['X-WP-TotalPages']
             results = []
+            #the listing is fingerprinted over all pages - an entry may move between pages
+            content = [resp.content]
             api_data = resp.json()
             results = results + api_data
 
@@ -69,8 +72,12 @@ def __get_securelisting_json_entry_list(api_url):
                 if resp.status_code != 200:
                     raise Exception("Error fetching data for: %s"%url_next)
                 url_next = __extrac_next_link(resp)
+                content.append(resp.content)
                 api_data = resp.json()
                 results = results + api_data
+
+            #raises source_fingerprint.SourceNotModified if the listing didn't change since the last import
+            source_fingerprint.check(api_url, b"".join(content))
             
             log.mal2_fakeshop_db_log.info("overall number of entries received from api: %s",len(results))
 
@@ -130,6 +137,8 @@ def __get_securelisting_json_entry_list(api_url):
             log.mal2_fakeshop_db_log.error("error status code: %s response: %s",resp.status_code,resp.text)
         
         return None
+    except source_fingerprint.SourceNotModified:
+        raise
     except Exception as e:
         log.mal2_fakeshop_db_log.error("failure in reaching buchhandel_at API endpoint: %s",e)
         traceback.print_exc()
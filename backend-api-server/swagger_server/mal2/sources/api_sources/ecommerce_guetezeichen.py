@@ -1,9 +1,9 @@
-import requests
 import datetime as dt
 import io as io
 import pandas as pd
 from swagger_server import logger_config as log
 import swagger_server.mal2.sources.sources_utils as sources_utils
+import swagger_server.mal2.sources.source_fingerprint as source_fingerprint
 
 def get_all_whitelist_entries():
     log.mal2_fakeshop_db_log.info("checking ecommerce guetezeichen api (csv data) for whitelist entries")
@@ -24,7 +24,8 @@ def __get_guetezeichen_csv_entry_list(api_url):
         Dataframe -- pandas dataframe or none
     """
     log.mal2_fakeshop_db_log.info("__get_guetezeichen_csv_entry_list for %s",api_url)
-    resp =requests.get(api_url,timeout=10)
+    #raises source_fingerprint.SourceNotModified if the export didn't change since the last import
+    resp =source_fingerprint.get(api_url,timeout=10)
     
     #parse responds
     if resp.status_code == 200:
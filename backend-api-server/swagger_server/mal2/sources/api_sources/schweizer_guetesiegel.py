@@ -1,9 +1,9 @@
-import requests
 import datetime as dt
 import io as io
 import pandas as pd
 from swagger_server import logger_config as log
 import swagger_server.mal2.sources.sources_utils as sources_utils
+import swagger_server.mal2.sources.source_fingerprint as source_fingerprint
 import traceback
 
 def get_all_whitelist_entries():
@@ -25,7 +25,8 @@ def __get_guetezeichen_json_entry_list(api_url):
         Dataframe -- pandas dataframe or none
     """
     log.mal2_fakeshop_db_log.info("__get_guetezeichen_json_entry_list for %s",api_url)
-    resp =requests.get(api_url,timeout=10)
+    #raises source_fingerprint.SourceNotModified if the export didn't change since the last import
+    resp =source_fingerprint.get(api_url,timeout=10)
 
     #parse responds
     if resp.status_code == 200:
@@ -2,13 +2,29 @@ import swagger_server.mal2.db.model.db_model as db_model
 from swagger_server import logger_config as log
 import swagger_server.mal2.sources.sources_utils as sources_utils
 import requests
+from requests.adapters import HTTPAdapter
 import datetime as dt
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qs, urlencode
 from w3lib.url import url_query_cleaner
 from url_normalize import url_normalize
 
 #list of sites to skip from fake-shop db entries
 # e.g. preventing https://instagram.com to get added as fake-shop due to https://instagram.com/yeezystoregermany entry
 skip_baseurls = ["instagram.com", "google.com", "google.at", "facebook.com"]
+#pages downloaded ahead of the one being processed
+prefetch_pages = 4
+#max concurrent screenshot checks
+screenshot_workers = 8
+image_base_url = "https://db.malzwei.at/media/websites/screenshots/{}.png"
+
+#pooled and keep-alive connections shared by all page and screenshot requests
+__session = requests.Session()
+__session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=max(prefetch_pages, screenshot_workers)))
+__session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=max(prefetch_pages, screenshot_workers)))
+#website ids with an existing screenshot
+__screenshot_ids = set()
 
 def translate_site_status(website_type:int, website_category) -> db_model.EnumSiteStatus:
         """translates the fake-Shop type received from the mal2 db to either site status whitelist, blacklist or unknown
@@ -76,8 +92,8 @@ def translate_ignorelist_category(website_category:int) -> db_model.EnumIgnoreLi
         return db_model.EnumIgnoreListCategory.unknown
 
 
-def get_website_entry_list(api_url,api_token,results,fetch_screenshots=False, limit_imported_items:int=-1, curr_page=1):
-    """queries the given mal2 fakeshopdb entpoint (api_url) and extracts all 'website' elements 
+def get_website_entry_list(api_url,api_token,results,fetch_screenshots=False, limit_imported_items:int=-1):
+    """queries the given mal2 fakeshopdb entpoint (api_url) and extracts all 'website' elements (see iter_website_entries)
 
     Arguments:
         api_url {Str} -- 'website' endpoint e.g. api/v1/website/fake_shop/?ordering=-created_at
@@ -87,73 +103,205 @@ def get_website_entry_list(api_url,api_token,results,fetch_screenshots=False, li
     Returns:
         List[Dict] -- List of Dict{ws_id, fs_id, url, created_at, website_type}
     """
-
-    log.mal2_fakeshop_db_log.info("get_website_entry_list for %s",api_url)
     if results == None:
         results = []
+    results.extend(iter_website_entries(api_url,api_token,fetch_screenshots=fetch_screenshots,limit_imported_items=limit_imported_items))
+    return results
+
+
+def iter_website_entries(api_url, api_token, fetch_screenshots=False, limit_imported_items:int=-1):
+    """streams all 'website' elements of the given mal2 fakeshopdb entpoint (api_url) page by page. While a page is processed the
+    following prefetch_pages pages are already downloaded over the pooled session - their urls are derived from the 'next' link
+    (?page=n or ?offset=n), unpredictable links (e.g. cursors) are followed one after another. A page that can't be fetched raises - a
+    truncated listing would remove the entries of the missing pages on import
+
+    Arguments:
+        api_url {Str} -- 'website' endpoint e.g. api/v1/website/fake_shop/?ordering=-created_at
+        api_token {Str} -- token string for querying the fakeshopdb
+
+    Keyword Arguments:
+        fetch_screenshots {bool} -- add the screenshot_link of entries with a screenshot (default: {False})
+        limit_imported_items {int} -- max entries to return, -1 returns all (default: {-1})
+
+    Raises:
+        Exception: a page linked by 'next' failed
+
+    Returns:
+        Iterator[Dict] -- yields Dict{ws_id, fs_id, url, created_at, website_type, company_type[, screenshot_link]}
+    """
+    log.mal2_fakeshop_db_log.info("iter_website_entries for %s",api_url)
     headers = {'content-type': 'application/json', 'Authorization':'Token {}'.format(api_token) }
-    resp =requests.get(api_url,headers=headers,timeout=10)
-    
-    #parse responds
-    if resp.status_code == 200:
-        #are there more results? then there's a next url
-        resp_dict= resp.json()
-        next_page_url = resp_dict['next']
-        #print(resp_dict)
-        #there should be a results entry in the response json
-        if resp_dict['results']:
-            #iterate over the fake-shop db results and filter out wildcard matchings e.g. orf.at in .ff-wallendorf.at   
-            for res_entry in resp_dict['results']:
-                row = {}
-                #website id
-                row['ws_id']= res_entry['id']
-                #fake shop entry (with manual evaluation data) db_id
-                row['fs_id']= res_entry['db_id']
-                base_url = sources_utils.extract_base_url(res_entry['url'])
-                row['url']= base_url
-                row['created_at']=dt.datetime.fromisoformat(res_entry['created_at'])
-                #ws_type: 1=no verification required, 2=Fake Shop, 3=Markenfälscher, 4= verified as no-fake
-                row['website_type']=res_entry['website_type']
-                row['company_type']=res_entry['website_category']
-                
-                if(fetch_screenshots):
-                    screenshot_link = __getScreenshotLink(res_entry['id'])
+    executor = ThreadPoolExecutor(max_workers=max(prefetch_pages, screenshot_workers), thread_name_prefix="mal2-fakeshopdb")
+    #(url, future, predicted) of the requested pages in page order - the first one is the page to process next. A predicted page is
+    #validated once the 'next' link of the page before it matches its url
+    pages = deque([(api_url, executor.submit(__get_page, api_url, headers), False)])
+    count = 0
+    try:
+        while pages:
+            page_url, page, predicted = pages.popleft()
+            try:
+                resp_dict = page.result()
+            except Exception as e:
+                if not predicted:
+                    raise
+                log.mal2_fakeshop_db_log.warn("prefetching page %s failed - retrying: %s",page_url,e)
+                resp_dict = None
+            if resp_dict == None:
+                #the 'next' link points to the prefetched page - it must exist, raises if it fails again
+                resp_dict = __get_page(page_url, headers)
+            next_page_url = resp_dict.get('next')
+            if pages and not __is_same_page(pages[0][0], next_page_url):
+                #last page or mispredicted - drop the prefetched pages
+                for prefetched_url, prefetched, prefetched_predicted in pages:
+                    prefetched.cancel()
+                pages.clear()
+            if next_page_url and not pages:
+                #nothing prefetched (first page or unpredictable links) - continue with the 'next' link
+                pages.append((next_page_url, executor.submit(__get_page, next_page_url, headers), False))
+            #keep prefetch_pages pages in flight
+            while next_page_url and len(pages) < prefetch_pages:
+                predicted_url = __get_following_page_url(pages[-1][0])
+                if not predicted_url:
+                    break
+                pages.append((predicted_url, executor.submit(__get_page, predicted_url, headers, True), True))
+
+            rows = __parse_page(resp_dict)
+            if fetch_screenshots:
+                #bounded concurrency - at most screenshot_workers requests against the media server
+                for row, screenshot_link in zip(rows, executor.map(__get_screenshot_link, [row['ws_id'] for row in rows])):
                     if screenshot_link:
                         row['screenshot_link'] = screenshot_link
+            for row in rows:
+                yield row
+                count += 1
+                if limit_imported_items > -1 and count >= limit_imported_items:
+                    log.mal2_fakeshop_db_log.debug("reached max item limit to import from fake-shop db.")
+                    return
+    finally:
+        for page_url, page, predicted in pages:
+            page.cancel()
+        executor.shutdown(wait=False)
 
-                #check if not in skip-list
-                if not (base_url in skip_baseurls):
-                    results.append(row)
-                else:
-                    log.mal2_fakeshop_db_log.debug("skipping entry for %s", res_entry['url'])
-        else:
-            log.mal2_fakeshop_db_log.warn("unknown site to fake-shop database: %s",resp_dict)
-            
-        #now check if continue the recursion
-        if next_page_url:
-            if limit_imported_items > -1 and len(results)*curr_page >= limit_imported_items:
-                log.mal2_fakeshop_db_log.debug("reached max item limit to import from fake-shop db.")
-                pass
-            else:
-                results = get_website_entry_list(next_page_url,api_token,results,fetch_screenshots,limit_imported_items,curr_page+1)
-        
+
+def __get_page(page_url, headers, predicted=False):
+    """fetches a page of the fakeshopdb api
+
+    Arguments:
+        page_url {Str} -- url of the page
+        headers {Dict} -- request headers incl. the api token
+
+    Keyword Arguments:
+        predicted {bool} -- the url was derived, not taken from a 'next' link - it may be beyond the last page (default: {False})
+
+    Raises:
+        Exception: the page failed
+
+    Returns:
+        Dict -- the page json or None if the predicted page doesn't exist
+    """
+    resp = __session.get(page_url,headers=headers,timeout=10)
+    if resp.status_code == 200:
+        return resp.json()
+    elif resp.status_code == 404 and predicted:
+        log.mal2_fakeshop_db_log.debug("predicted page %s does not exist",page_url)
+        return None
     elif resp.status_code == 403:
         log.mal2_fakeshop_db_log.warn("invalid credentials code: %s response: %s",resp.status_code,resp.text)
     else:
         log.mal2_fakeshop_db_log.warn("error status code: %s response: %s",resp.status_code,resp.text)
-    
-    return results
+    raise Exception("fetching fake-shop db page %s failed with status code %s"%(page_url,resp.status_code))
+
+
+def __get_following_page_url(page_url):
+    """derives the url of the page after page_url from its page or offset query parameter
+
+    Arguments:
+        page_url {Str} -- url of a page (a 'next' link or a url derived from it)
+
+    Returns:
+        Str -- the url of the following page or None if it can't be predicted
+    """
+    parts = urlsplit(page_url)
+    query = parse_qs(parts.query)
+    try:
+        if 'page' in query:
+            query['page'] = [str(int(query['page'][0])+1)]
+        elif 'offset' in query and 'limit' in query:
+            query['offset'] = [str(int(query['offset'][0])+int(query['limit'][0]))]
+        else:
+            return None
+    except ValueError:
+        #e.g. ?page=last
+        return None
+    return urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def __is_same_page(page_url, next_page_url):
+    """compares a predicted page url with the 'next' link - ignoring the scheme/host (proxies) and the order of the query parameters
+    """
+    if not next_page_url:
+        return False
+    parts, next_parts = urlsplit(page_url), urlsplit(next_page_url)
+    return parts.path == next_parts.path and parse_qs(parts.query) == parse_qs(next_parts.query)
+
 
+def __parse_page(resp_dict):
+    """extracts the website entries of a fakeshopdb api page
 
-def __getScreenshotLink(website_id):
-    image_base_url = "https://db.malzwei.at/media/websites/screenshots/{}.png"
+    Returns:
+        List[Dict] -- List of Dict{ws_id, fs_id, url, created_at, website_type, company_type}
+    """
+    rows = []
+    #there should be a results entry in the response json
+    if not resp_dict.get('results'):
+        log.mal2_fakeshop_db_log.warn("unknown site to fake-shop database: %s",resp_dict)
+        return rows
+    #iterate over the fake-shop db results and filter out wildcard matchings e.g. orf.at in .ff-wallendorf.at   
+    for res_entry in resp_dict['results']:
+        row = {}
+        #website id
+        row['ws_id']= res_entry['id']
+        #fake shop entry (with manual evaluation data) db_id
+        row['fs_id']= res_entry['db_id']
+        base_url = sources_utils.extract_base_url(res_entry['url'])
+        row['url']= base_url
+        row['created_at']=dt.datetime.fromisoformat(res_entry['created_at'])
+        #ws_type: 1=no verification required, 2=Fake Shop, 3=Markenfälscher, 4= verified as no-fake
+        row['website_type']=res_entry['website_type']
+        row['company_type']=res_entry['website_category']
+
+        #check if not in skip-list
+        if not (base_url in skip_baseurls):
+            rows.append(row)
+        else:
+            log.mal2_fakeshop_db_log.debug("skipping entry for %s", res_entry['url'])
+    return rows
+
+
+def __get_screenshot_link(website_id):
+    """checks via HEAD (with fallback to a streamed GET) if a screenshot exists for the website without downloading it. Screenshots
+    aren't removed - found ones aren't checked again
+
+    Returns:
+        Str -- the screenshot url or None
+    """
     screenshot_url = image_base_url.format(website_id)
-    headers = {'content-type': 'application/json'}
-    
-    resp =requests.get(screenshot_url,headers=headers,timeout=10)
-    
+    if website_id in __screenshot_ids:
+        return screenshot_url
+
+    try:
+        resp = __session.head(screenshot_url,timeout=10,allow_redirects=True)
+        if resp.status_code == 405:
+            #HEAD not supported - don't read the image
+            with __session.get(screenshot_url,timeout=10,stream=True) as resp:
+                pass
+    except requests.RequestException as e:
+        log.mal2_fakeshop_db_log.debug("failed checking screenshot for website_id: %s: %s",website_id,e)
+        return None
+
     if resp.status_code == 200:
         log.mal2_fakeshop_db_log.info("returning screenshot link: %s for website_id: %s,",screenshot_url,website_id)
+        __screenshot_ids.add(website_id)
         return screenshot_url
     else:
         log.mal2_fakeshop_db_log.debug("no screenshot found for website_id: %s, with: %s at: %s",website_id, resp.status_code,screenshot_url)
@@ -0,0 +1,127 @@
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import swagger_server.mal2.sources.source_fingerprint as source_fingerprint
+from swagger_server import logger_config as log
+
+#fetch stage of the list imports - all sources are downloaded/parsed concurrently without db access, the list handlers write the fetched
+#dataframes afterwards one source at a time. The import takes as long as the slowest source instead of the sum of all sources
+
+#list source - unique name, fetch() returning its pandas dataframe, write(dataframe, limit_imported_items) importing it into the db, the
+#seconds the fetch may take (default: fetch_timeout) and the max entries written (-1 writes all). The import limit is part of the source's
+#fingerprints - a source written with a different limit is written again even if unchanged
+Source = namedtuple("Source", ["name", "fetch", "write", "timeout", "import_limit"], defaults=[None, -1])
+#fetched dataframe or the error the fetch failed with (source_fingerprint.SourceNotModified if unchanged), the seconds it took and the
+#fingerprints of the downloaded payloads - stored once the dataframe was written
+FetchResult = namedtuple("FetchResult", ["dataframe", "error", "duration", "fingerprints"], defaults=[None])
+
+#e.g. MAL2_IMPORT_FETCH_WORKERS=4 - sources fetched at the same time
+fetch_workers = int(os.environ.get("MAL2_IMPORT_FETCH_WORKERS", 8))
+#e.g. MAL2_IMPORT_FETCH_TIMEOUT=300 - seconds a single source may take to fetch
+fetch_timeout = float(os.environ.get("MAL2_IMPORT_FETCH_TIMEOUT", 600))
+#e.g. MAL2_IMPORT_FETCH_TOTAL_TIMEOUT=1200 - seconds all sources may take together, incl. waiting for a worker
+fetch_total_timeout = float(os.environ.get("MAL2_IMPORT_FETCH_TOTAL_TIMEOUT", 1800))
+
+
+def fetch(sources:list, max_workers:int=None, force:bool=False) -> dict:
+    """fetches the sources concurrently in a bounded thread pool. A failing, unchanged or timed out source doesn't affect the others - it's
+    skipped by write. Timed out fetches can't be interrupted, they finish in the background (the source's requests time out) and are dropped.
+    Sources still waiting for a worker after fetch_total_timeout e.g. as all workers are blocked by timed out fetches are not started at all
+
+    Arguments:
+        sources {list} -- the Sources to fetch
+
+    Keyword Arguments:
+        max_workers {int} -- max sources fetched at the same time (default: {fetch_workers})
+        force {bool} -- fetch and write remote sources even if their payload didn't change since the last import (default: {False})
+
+    Returns:
+        dict -- source name -> FetchResult
+    """
+    results = {}
+    if not sources:
+        return results
+    #start time per source name - the timeout counts from the start of the fetch, not while waiting for a worker
+    started = {}
+    #loaded once up front - the fetches don't access the db
+    fingerprints = source_fingerprint.load()
+    def run(source:Source):
+        started[source.name] = time.monotonic()
+        with source_fingerprint.fetching(source.name, fingerprints, force, source.import_limit) as pending:
+            dataframe = source.fetch()
+        if dataframe is None:
+            raise ValueError("no data fetched")
+        return dataframe, pending
+
+    begin = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=min(max_workers or fetch_workers, len(sources)), thread_name_prefix="mal2-source-fetch")
+    futures = {executor.submit(run, source): source for source in sources}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=min(1, max(0, begin + fetch_total_timeout - time.monotonic())), return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in done:
+                source = futures[future]
+                duration = now - started.get(source.name, now)
+                try:
+                    dataframe, pending_fingerprints = future.result()
+                    results[source.name] = FetchResult(dataframe, None, duration, pending_fingerprints)
+                    log.mal2_rest_log.info("fetched source %s in %.1fs",source.name,duration)
+                except source_fingerprint.SourceNotModified as e:
+                    log.mal2_rest_log.info("source %s unchanged since last import (%.1fs)",source.name,duration)
+                    results[source.name] = FetchResult(None, e, duration)
+                except Exception as e:
+                    log.mal2_rest_log.exception("failed fetching source %s: %s",source.name,e)
+                    results[source.name] = FetchResult(None, e, duration)
+            for future in list(pending):
+                source = futures[future]
+                timeout = source.timeout or fetch_timeout
+                if source.name in started and now - started[source.name] > timeout:
+                    pending.discard(future)
+                    log.mal2_rest_log.warning("fetching source %s timed out after %ss - skipping it",source.name,timeout)
+                    results[source.name] = FetchResult(None, TimeoutError("fetch timed out after %ss"%timeout), now - started[source.name])
+            if pending and now - begin > fetch_total_timeout:
+                for future in pending:
+                    source = futures[future]
+                    #not yet started fetches are dropped from the queue
+                    if future.cancel() or source.name not in started:
+                        log.mal2_rest_log.warning("fetching source %s never started within %ss - skipping it",source.name,fetch_total_timeout)
+                        results[source.name] = FetchResult(None, TimeoutError("fetch not started within %ss"%fetch_total_timeout), 0)
+                    else:
+                        log.mal2_rest_log.warning("fetching source %s timed out after %ss - skipping it",source.name,fetch_total_timeout)
+                        results[source.name] = FetchResult(None, TimeoutError("fetch timed out after %ss"%fetch_total_timeout), now - started[source.name])
+                pending = set()
+    finally:
+        executor.shutdown(wait=False)
+    log.mal2_rest_log.info("fetched %s of %s sources in %.1fs",sum(1 for result in results.values() if result.error == None),len(sources),time.monotonic()-begin)
+    return results
+
+def write(source:Source, fetched:dict) -> bool:
+    """writes a fetched source into the db (limited to its import_limit) and stores its fingerprints - sources that failed to fetch or are
+    unchanged are skipped, their existing entries are kept
+
+    Arguments:
+        source {Source} -- the source to write
+        fetched {dict} -- fetch results (see fetch)
+
+    Returns:
+        bool -- True if the source was written
+    """
+    result = fetched.get(source.name)
+    if result != None and isinstance(result.error, source_fingerprint.SourceNotModified):
+        log.mal2_rest_log.info("skipping import of source %s - unchanged",source.name)
+        return False
+    if result == None or result.error != None:
+        log.mal2_rest_log.warning("skipping import of source %s - fetch failed: %s",source.name,result.error if result != None else "not fetched")
+        return False
+    try:
+        #the same limit the fingerprints were taken with
+        source.write(result.dataframe, limit_imported_items=source.import_limit)
+        #only fingerprinted once written - a failed write is retried on the next import
+        source_fingerprint.store(result.fingerprints)
+    except Exception as e:
+        log.mal2_rest_log.warning("import of source %s failed: %s",source.name,e)
+        return False
+    return True
@@ -0,0 +1,179 @@
+import hashlib
+import threading
+import requests
+from contextlib import contextmanager
+import swagger_server.mal2.db.model.db_model as db_model
+import swagger_server.mal2.db.handler.db_handler as db_handler
+from swagger_server import logger_config as log
+
+#conditional downloads of the remote list sources - the ETag/Last-Modified validators and a sha256 of the payload are kept per source
+#endpoint (db_model.SourceFingerprint). A source whose endpoints answer 304 or return a byte-identical payload raises SourceNotModified
+#and is neither parsed nor written. The fingerprints of a fetch are only stored after its source was written (see source_fetch.write).
+#A fingerprint only applies to imports with the same import limit - a payload imported partially is imported again with a different limit
+
+#fetch context of the current thread - see fetching
+__context = threading.local()
+
+
+class SourceNotModified(Exception):
+    """raised by a source fetch if the payload of its endpoints didn't change since the last import
+    """
+    pass
+
+
+@contextmanager
+def fetching(source_name:str, fingerprints:dict, force:bool=False, import_limit:int=-1):
+    """enables conditional requests for the source fetched within the context (by the current thread)
+
+    Arguments:
+        source_name {str} -- name of the fetched source_fetch.Source
+        fingerprints {dict} -- stored fingerprints (source, url) -> db_model.SourceFingerprint (see load)
+
+    Keyword Arguments:
+        force {bool} -- download and return all payloads even if unchanged (default: {False})
+        import_limit {int} -- max imported entries of the source, -1 imports all (default: {-1})
+
+    Returns:
+        List[db_model.SourceFingerprint] -- yields the fingerprints of the downloaded payloads, filled by the fetch
+    """
+    pending = []
+    __context.fetch = (source_name, fingerprints, force, import_limit, pending)
+    try:
+        yield pending
+    finally:
+        __context.fetch = None
+
+def load() -> dict:
+    """loads the stored fingerprints - without them all payloads are downloaded and imported
+
+    Returns:
+        dict -- (source, url) -> db_model.SourceFingerprint
+    """
+    try:
+        return db_handler.get_source_fingerprint_db_entries()
+    except Exception as e:
+        log.mal2_rest_log.warning("failed loading source fingerprints - fetching unconditionally: %s",e)
+        return {}
+
+def store(fingerprints:list):
+    """stores the fingerprints of an imported source
+
+    Arguments:
+        fingerprints {List[db_model.SourceFingerprint]} -- the fingerprints collected by fetching
+    """
+    if fingerprints:
+        db_handler.commit_source_fingerprint_db_entries(fingerprints)
+
+def get(url:str, **kwargs):
+    """GETs a source endpoint. Within fetching the stored validators are sent as If-None-Match/If-Modified-Since, outside it's a plain
+    requests.get
+
+    Arguments:
+        url {str} -- the source endpoint
+
+    Keyword Arguments:
+        passed to requests.get e.g. timeout (default: 10)
+
+    Raises:
+        SourceNotModified: the endpoint answered 304 or returned the same payload as on the last import
+
+    Returns:
+        requests.Response -- the response
+    """
+    resp, unchanged = __get(url, **kwargs)
+    if unchanged:
+        raise SourceNotModified(url)
+    return resp
+
+def get_all(urls:list, **kwargs) -> list:
+    """GETs all endpoints of a source - the source is only unchanged if none of its endpoints changed. Endpoints that answered 304 while
+    others changed are downloaded again unconditionally as the source is parsed as a whole
+
+    Arguments:
+        urls {list} -- the source endpoints
+
+    Keyword Arguments:
+        passed to requests.get
+
+    Raises:
+        SourceNotModified: none of the endpoints changed
+
+    Returns:
+        List[requests.Response] -- the responses in order of urls
+    """
+    responses = [__get(url, **kwargs) for url in urls]
+    if all(unchanged for resp, unchanged in responses):
+        raise SourceNotModified(", ".join(urls))
+    kwargs.setdefault("timeout", 10)
+    return [requests.get(url, **kwargs) if resp.status_code == 304 else resp for url, (resp, unchanged) in zip(urls, responses)]
+
+def check(url:str, content:bytes):
+    """fingerprints a payload that was assembled from several requests e.g. the pages of a paginated endpoint
+
+    Arguments:
+        url {str} -- the endpoint the payload is stored under
+        content {bytes} -- the payload
+
+    Raises:
+        SourceNotModified: the payload is the same as on the last import
+    """
+    context = getattr(__context, "fetch", None)
+    if context != None and __fingerprint(context, url, content, {}):
+        raise SourceNotModified(url)
+
+def __get(url:str, **kwargs):
+    """GETs an endpoint conditionally
+
+    Returns:
+        tuple -- the requests.Response and True if the endpoint didn't change
+    """
+    kwargs.setdefault("timeout", 10)
+    context = getattr(__context, "fetch", None)
+    if context == None:
+        return requests.get(url, **kwargs), False
+    source_name, fingerprints, force, import_limit, pending = context
+    stored = __get_stored(context, url)
+    headers = dict(kwargs.pop("headers", None) or {})
+    if stored != None and not force:
+        if stored.etag:
+            headers["If-None-Match"] = stored.etag
+        if stored.last_modified:
+            headers["If-Modified-Since"] = stored.last_modified
+    resp = requests.get(url, headers=headers, **kwargs)
+    if resp.status_code == 304:
+        log.mal2_rest_log.info("source %s not modified: %s",source_name,url)
+        return resp, True
+    if resp.status_code == 200:
+        return resp, __fingerprint(context, url, resp.content, resp.headers)
+    return resp, False
+
+def __get_stored(context:tuple, url:str) -> db_model.SourceFingerprint:
+    #the stored fingerprint if the endpoint was imported with the same import limit - otherwise its payload is imported again
+    source_name, fingerprints, force, import_limit, pending = context
+    stored = fingerprints.get((source_name, url))
+    if stored != None and stored.import_limit != import_limit:
+        log.mal2_rest_log.info("source %s import limit changed from %s to %s: %s",source_name,stored.import_limit,import_limit,url)
+        return None
+    return stored
+
+def __fingerprint(context:tuple, url:str, content:bytes, headers) -> bool:
+    """adds the payload's fingerprint to the pending fingerprints of the fetch
+
+    Returns:
+        bool -- True if the payload is the same as on the last import (always False if forced)
+    """
+    source_name, fingerprints, force, import_limit, pending = context
+    content_hash = hashlib.sha256(content or b"").hexdigest()
+    pending.append(db_model.SourceFingerprint(
+        source=source_name,
+        url=url,
+        etag=headers.get("ETag"),
+        last_modified=headers.get("Last-Modified"),
+        content_hash=content_hash,
+        import_limit=import_limit
+    ))
+    stored = __get_stored(context, url)
+    if stored != None and stored.content_hash == content_hash and not force:
+        log.mal2_rest_log.info("source %s payload unchanged: %s",source_name,url)
+        return True
+    return False
@@ -1,7 +1,7 @@
 from swagger_server import logger_config as log
 import swagger_server.mal2.db.model.db_model as db_model
 import swagger_server.mal2.sources.sources_utils as sources_utils
-import requests
+import swagger_server.mal2.sources.source_fingerprint as source_fingerprint
 import datetime as dt
 import pandas as pd
 
@@ -21,16 +21,20 @@ def get_all_blacklist_entries():
     ret = []
 
     log.mal2_fakeshop_db_log.info("checking watchlist-internet website for blacklist entries")
+    #download all csvs - raises source_fingerprint.SourceNotModified if none of them changed since the last import
+    fake_shop_resp, fraud_streaming_resp, fraud_realestate_resp = source_fingerprint.get_all(
+        [WATCHLIST_FAKE_SHOP_CSV, WATCHLIST_FRAUD_STREAMING_CSV, WATCHLIST_FRAUD_REALESTATE_CSV], timeout=10)
+
     #fetch all fake_shops (even though its fake-shops + counterfeit_goods)
-    fake_shops = __get_csv_bl_entry_list(WATCHLIST_FAKE_SHOP_CSV,db_model.EnumBlacklistType.fraudulent_online_shop)
+    fake_shops = __get_csv_bl_entry_list(WATCHLIST_FAKE_SHOP_CSV,fake_shop_resp,db_model.EnumBlacklistType.fraudulent_online_shop)
     log.mal2_rest_log.info("downloaded fake_shops. count: %s, from: %s",len(fake_shops),WATCHLIST_FAKE_SHOP_CSV)
 
     #fetch all fraudulent streaming sites from csv listing
-    fraud_streaming = __get_csv_bl_entry_list(WATCHLIST_FRAUD_STREAMING_CSV,db_model.EnumBlacklistType.fraudulent_streaming_platform)
+    fraud_streaming = __get_csv_bl_entry_list(WATCHLIST_FRAUD_STREAMING_CSV,fraud_streaming_resp,db_model.EnumBlacklistType.fraudulent_streaming_platform)
     log.mal2_rest_log.info("downloaded fraudulent streaming sites. count: %s, from: %s",len(fraud_streaming),WATCHLIST_FRAUD_STREAMING_CSV)
 
     #fetch all fraudulent streaming sites from csv listing
-    fraud_realestate = __get_csv_bl_entry_list(WATCHLIST_FRAUD_REALESTATE_CSV,db_model.EnumBlacklistType.fraudulent_real_estate_agency)
+    fraud_realestate = __get_csv_bl_entry_list(WATCHLIST_FRAUD_REALESTATE_CSV,fraud_realestate_resp,db_model.EnumBlacklistType.fraudulent_real_estate_agency)
     log.mal2_rest_log.info("downloaded fraudulent realestate sites. count: %s, from: %s",len(fraud_realestate),WATCHLIST_FRAUD_REALESTATE_CSV)
         
     ret = fake_shops + fraud_streaming + fraud_realestate
@@ -43,12 +47,13 @@ def get_all_blacklist_entries():
     return df
 
 
-def __get_csv_bl_entry_list(api_url, bl_type:db_model.EnumBlacklistType):
-    """queries the watchlist-internet csv entpoints (api_url) and extracts all listed elements 
+def __get_csv_bl_entry_list(api_url, resp, bl_type:db_model.EnumBlacklistType):
+    """extracts all listed elements from the response of a watchlist-internet csv entpoint (api_url)
     example format of a line: "007drones.de";26.02.2018;"Fake-Shop"
 
     Arguments:
         api_url {Str} -- 'watchlist internet csv endpoint e.g. https://www.watchlist-internet.at/index.php?id=120&no_cache=1
+        resp {requests.Response} -- the downloaded csv
         type {db_model.EnumBlacklistType} -- List to append results. If None, new list is created
         results {List} -- List[Dict] to append results. If None, new list is created
 
@@ -85,8 +90,6 @@ def __get_csv_bl_entry_list(api_url, bl_type:db_model.EnumBlacklistType):
             return bl_type
 
     results = []
-    #log.mal2_fakeshop_db_log.info("get_website_entry_list for %s",api_url)
-    resp =requests.get(api_url,timeout=10)
     
     #parse responds
     if resp.status_code == 200:
@@ -198,7 +201,8 @@ def __get_csv_gl_entry_list(api_url):
 
     results = []
     #log.mal2_fakeshop_db_log.info("get_website_entry_list for %s",api_url)
-    resp =requests.get(api_url,timeout=10)
+    #raises source_fingerprint.SourceNotModified if the csv didn't change since the last import
+    resp =source_fingerprint.get(api_url,timeout=10)
     
     #parse responds
     if resp.status_code == 200:
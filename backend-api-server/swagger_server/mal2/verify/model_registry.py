@@ -0,0 +1,131 @@
+import os
+import pickle
+import threading
+import pkg_resources
+from swagger_server import logger_config as log
+
+#models shipped with the mal2-fakeshop-models package
+model_names = ["xgboost", "random_forest", "neural_net"]
+
+#immutable snapshot of the loaded models - replaced as a whole on (re-)load so readers never see a partially loaded registry
+__registry = None
+__load_lock = threading.Lock()
+
+
+class LoadedModels:
+    """immutable snapshot of the models, vectorizers and version loaded together - see get_snapshot
+    """
+    def __init__(self, models, vectorizers, version, mtimes):
+        self.models = models
+        self.vectorizers = vectorizers
+        self.version = version
+        self.mtimes = mtimes
+
+
+def __get_paths():
+    paths = {model: pkg_resources.resource_filename('verify', 'files/'+model+'.model') for model in model_names}
+    paths["vectorizers"] = pkg_resources.resource_filename('verify', 'files/vectorizers.dict')
+    return paths
+
+def __get_mtimes(paths):
+    return {key: os.path.getmtime(path) for key, path in paths.items()}
+
+def __get_version():
+    #fresh working set - picks up a re-installed package version without restart
+    return pkg_resources.WorkingSet().find(pkg_resources.Requirement.parse("mal2-fakeshop-models")).version
+
+def __load():
+    paths = __get_paths()
+    mtimes = __get_mtimes(paths)
+    models = {}
+    for model in model_names:
+        with open(paths[model], "rb") as f:
+            models[model] = pickle.load(f)
+    with open(paths["vectorizers"], "rb") as f:
+        vectorizers = pickle.load(f)
+    version = __get_version()
+    log.mal2_model_log.info("loaded mal2-models %s version %s",model_names,version)
+    return LoadedModels(models, vectorizers, version, mtimes)
+
+def __get_registry():
+    global __registry
+    registry = __registry
+    if registry == None:
+        with __load_lock:
+            #lazy load on first use - re-check as a different thread may have loaded meanwhile
+            if __registry == None:
+                __registry = __load()
+            registry = __registry
+    return registry
+
+def preload():
+    """loads all models and the vectorizers (if not yet loaded) e.g. at startup to avoid loading on the first prediction request
+    """
+    __get_registry()
+
+def get_snapshot() -> LoadedModels:
+    """returns the currently loaded models, vectorizers and version as one snapshot - a prediction that uses more than one of them
+    has to take them from the same snapshot, a reload in between would mix models and vectorizers of different versions
+
+    Returns:
+        LoadedModels -- models (model name -> model), vectorizers and version of one load
+    """
+    return __get_registry()
+
+def get_model(model:str):
+    """returns the deserialized model
+
+    Arguments:
+        model {str} -- one of model_names e.g. xgboost
+
+    Returns:
+        the loaded xgboost Booster or sklearn model
+    """
+    models = __get_registry().models
+    if model not in models:
+        raise ValueError("non-supported model selected")
+    return models[model]
+
+def get_vectorizers():
+    """returns the deserialized vectorizers dict that's shared by all models
+
+    Returns:
+        {Dict} -- feature name -> fitted vectorizer
+    """
+    return __get_registry().vectorizers
+
+def get_version() -> str:
+    """returns the version of the loaded mal2-fakeshop-models package
+
+    Returns:
+        {str} -- model version e.g. 0.25
+    """
+    return __get_registry().version
+
+def reload():
+    """explicitly re-loads all models and vectorizers from the model package files. Predictions in flight finish with the previously loaded models
+    as long as they took them from one snapshot (see get_snapshot)
+    """
+    global __registry
+    with __load_lock:
+        __registry = __load()
+
+def reload_if_changed() -> bool:
+    """re-loads all models and vectorizers if any of the model package files changed since they were loaded
+
+    Returns:
+        bool -- True if the models were re-loaded
+    """
+    registry = __registry
+    if registry == None:
+        #not loaded yet - will load lazily with the current files
+        return False
+    try:
+        changed = __get_mtimes(__get_paths()) != registry.mtimes
+    except Exception as e:
+        log.mal2_model_log.warning("failed checking mal2-model files for changes: %s",e)
+        return False
+    if changed:
+        log.mal2_model_log.info("mal2-model files changed - re-loading models")
+        reload()
+    return changed
@@ -1,6 +1,8 @@
 import os, shutil
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 import verify as mal2_model_verify
-import pkg_resources
+import swagger_server.mal2.verify.model_registry as model_registry
 from swagger_server import logger_config as log
 import swagger_server.mal2.common.common_utils as utils
 import checksumdir
@@ -10,6 +12,11 @@ import checksumdir
 # - install package via pip install .
 # - uninstall package via pip uninstall mal2-fakeshop-models -y
 
+supported_models = model_registry.model_names
+#get_ensemble_prediction mirrors the scrape, vectorize and score steps of verify.main of this mal2-model release (see requirements.txt) -
+#re-check it against verify.main before upgrading the package
+mirrored_model_version = "0.25"
+
 def get_model_prediction(site:str,model="xgboost",keep_cache=False,use_cache=False):
     """verifies a given site url against the mal2-model component
 
@@ -19,41 +26,76 @@ def get_model_prediction(site:str,model="xgboost",keep_cache=False,use_cache=Fal
     Returns:
         prediction {Float}, hash {Str}, model_name {Str}, model_version {Str} -- Returns the models prediction [0..1], a hash of the downloaded html artefacts, model_name, model_version
     """
+    return get_ensemble_prediction(site,[model],keep_cache=keep_cache,use_cache=use_cache)[model]
+
+def get_ensemble_prediction(site:str,models=supported_models,keep_cache=False,use_cache=False):
+    """verifies a given site url against multiple models of the mal2-model component. Other than calling get_model_prediction per model the site
+    is scraped, vectorized and hashed only once and the models score the site vector in parallel
 
-    supported_models = ["xgboost", "random_forest", "neural_net"]
+    Arguments:
+        site {Str} -- url without protocol prefix e.g. google.at
+        models {List[Str]} -- models to score the site with
+
+    Returns:
+        {Dict} -- model_name -> (prediction {Float}, hash {Str}, model_name {Str}, model_version {Str}) as returned by get_model_prediction
+    """
     # validate selected model input
-    if model not in supported_models:
-        raise ValueError("non-supported model selected")
-
-    #load the resources from the package 
-    MODEL = model
-    MODEL_PATH = pkg_resources.resource_filename('verify', 'files/'+MODEL+'.model')
-    DICT_PATH = pkg_resources.resource_filename('verify', 'files/vectorizers.dict')
-    VERSION = pkg_resources.get_distribution("mal2-fakeshop-models").version
-    prediction = None
-    dirhash = None
-
-    #that's created by the mal2-model (downloaded html artefacts via scrapy)
+    if not models:
+        raise ValueError("no model selected")
+    for model in models:
+        if model not in supported_models:
+            raise ValueError("non-supported model selected")
+
+    #same (relative) location the mal2-model's verify scrapes to
+    store_path = "data/verify_sites/"
     verify_output_dir = os.path.abspath(os.getcwd()+"/data/verify_sites/"+site+"/".replace("/",os.path.sep))
 
     if use_cache == False:
         utils.nukedir_recursively(verify_output_dir)
-    
-    #call mal2-model verify 
+
+    def score(model, site_vector):
+        model_obj = snapshot.models[model]
+        #same as mal2-model's verify
+        if type(model_obj).__name__ == "Booster":
+            return float(model_obj.predict(mal2_model_verify.xgb.DMatrix(site_vector))[0])
+        return float(model_obj.predict_proba(site_vector)[0][1])
+
     try:
-        #call the mal2_model
-        score, verified, explanation = mal2_model_verify.main(MODEL_PATH,DICT_PATH,site,check_db=False, use_cache=use_cache, do_feature_importance=False, do_scrape_images=False)
-        if score != None:
-            prediction = score[0]
-            log.mal2_model_log.info("mal2-model verify result site: %s model: %s risk-score: %s verified: %s explanation: %s",site, model, prediction,verified,explanation)
-        
-            #store the hash of html artefacts
-            dirhash = checksumdir.dirhash(verify_output_dir)
-            log.mal2_model_log.info("hash of html scrapy download %s",dirhash)
-        else:
-            log.mal2_model_log.info("issues getting prediction from model %s for %s",model, site)
-            #exception forwarded to ui
-            raise Exception("failed to get prediction") 
+        #preloaded models, vectorizers and version of one load - a concurrent reload doesn't affect this prediction
+        snapshot = model_registry.get_snapshot()
+        VERSION = snapshot.version
+        if VERSION != mirrored_model_version:
+            raise Exception("mal2-model version %s is not supported - prediction mirrors version %s"%(VERSION,mirrored_model_version))
+
+        #download site via scrapy (once for all models) - blocking calls
+        if not (use_cache and os.path.isdir(verify_output_dir)):
+            mal2_model_verify.run_scrapy_spider(mal2_model_verify.spider.HtmlSpider, input=site, output=store_path)
+            mal2_model_verify.run_scrapy_spider(mal2_model_verify.spider.CssSpider, input=site, output=store_path)
+            if not (os.path.exists(verify_output_dir+os.path.sep+"index.html") and os.path.isdir(verify_output_dir+os.path.sep+"cssjs")):
+                log.mal2_model_log.info("issues scraping site %s for prediction",site)
+                #exception forwarded to ui
+                raise Exception("failed to get prediction")
+
+        #vectorize (once for all models)
+        vectorizers = snapshot.vectorizers
+        df_site = mal2_model_verify.AggregateShops(do_whois=False).add_site(store_path+site+"/", status_id=None)
+        for col in list(vectorizers):
+            if col not in df_site.columns:
+                df_site[col] = np.nan
+        site_vector = mal2_model_verify.ProcessDataframes().vectorize(df_site, vectorizers)
+
+        #store the hash of html artefacts
+        dirhash = checksumdir.dirhash(verify_output_dir)
+        log.mal2_model_log.info("hash of html scrapy download %s",dirhash)
+
+        #score all models in parallel
+        with ThreadPoolExecutor(max_workers=len(models)) as executor:
+            futures = {model: executor.submit(score, model, site_vector) for model in models}
+            predictions = {}
+            for model, future in futures.items():
+                prediction = future.result()
+                log.mal2_model_log.info("mal2-model verify result site: %s model: %s risk-score: %s",site, model, prediction)
+                predictions[model] = (prediction, dirhash, model, VERSION)
     except Exception as err:
         log.mal2_model_log.exception("error calling verify_site for %s with "+str(err),site)
         #exception forwarded to ui
@@ -63,4 +105,4 @@ def get_model_prediction(site:str,model="xgboost",keep_cache=False,use_cache=Fal
         if keep_cache == False:
             utils.nukedir_recursively(verify_output_dir)
 
-    return prediction, dirhash, MODEL, VERSION
\ No newline at end of file
+    return predictions
@@ -3,10 +3,12 @@
 # flake8: noqa
 from __future__ import absolute_import
 # import models into model package
+from swagger_server.models.analysis_job import AnalysisJob
 from swagger_server.models.black_list_entry import BlackListEntry
 from swagger_server.models.grey_list_entry import GreyListEntry
 from swagger_server.models.ignore_list_entry import IgnoreListEntry
 from swagger_server.models.inline_response400 import InlineResponse400
+from swagger_server.models.list_changes import ListChanges
 from swagger_server.models.site import Site
 from swagger_server.models.site_analysis_result import SiteAnalysisResult
 from swagger_server.models.white_list_entry import WhiteListEntry
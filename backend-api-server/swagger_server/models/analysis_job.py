@@ -0,0 +1,205 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+from datetime import date, datetime  # noqa: F401
+
+from typing import List, Dict  # noqa: F401
+
+from swagger_server.models.base_model_ import Model
+from swagger_server.models.site_analysis_result import SiteAnalysisResult  # noqa: F401,E501
+from swagger_server import util
+
+
+class AnalysisJob(Model):
+    """NOTE: This class is auto generated by the swagger code generator program.
+
+    Do not edit the class manually.
+    """
+    def __init__(self, job_id: str=None, site_url: str=None, status: str=None, created_date_time: datetime=None, result: SiteAnalysisResult=None, error: str=None):  # noqa: E501
+        """AnalysisJob - a model defined in Swagger
+
+        :param job_id: The job_id of this AnalysisJob.  # noqa: E501
+        :type job_id: str
+        :param site_url: The site_url of this AnalysisJob.  # noqa: E501
+        :type site_url: str
+        :param status: The status of this AnalysisJob.  # noqa: E501
+        :type status: str
+        :param created_date_time: The created_date_time of this AnalysisJob.  # noqa: E501
+        :type created_date_time: datetime
+        :param result: The result of this AnalysisJob.  # noqa: E501
+        :type result: SiteAnalysisResult
+        :param error: The error of this AnalysisJob.  # noqa: E501
+        :type error: str
+        """
+        self.swagger_types = {
+            'job_id': str,
+            'site_url': str,
+            'status': str,
+            'created_date_time': datetime,
+            'result': SiteAnalysisResult,
+            'error': str
+        }
+
+        self.attribute_map = {
+            'job_id': 'job_id',
+            'site_url': 'site_url',
+            'status': 'status',
+            'created_date_time': 'created_date_time',
+            'result': 'result',
+            'error': 'error'
+        }
+        self._job_id = job_id
+        self._site_url = site_url
+        self._status = status
+        self._created_date_time = created_date_time
+        self._result = result
+        self._error = error
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'AnalysisJob':
+        """Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The Analysis-Job of this AnalysisJob.  # noqa: E501
+        :rtype: AnalysisJob
+        """
+        return util.deserialize_model(dikt, cls)
+
+    @property
+    def job_id(self) -> str:
+        """Gets the job_id of this AnalysisJob.
+
+        ID of the analysis job as provided by the server  # noqa: E501
+
+        :return: The job_id of this AnalysisJob.
+        :rtype: str
+        """
+        return self._job_id
+
+    @job_id.setter
+    def job_id(self, job_id: str):
+        """Sets the job_id of this AnalysisJob.
+
+        ID of the analysis job as provided by the server  # noqa: E501
+
+        :param job_id: The job_id of this AnalysisJob.
+        :type job_id: str
+        """
+
+        self._job_id = job_id
+
+    @property
+    def site_url(self) -> str:
+        """Gets the site_url of this AnalysisJob.
+
+
+        :return: The site_url of this AnalysisJob.
+        :rtype: str
+        """
+        return self._site_url
+
+    @site_url.setter
+    def site_url(self, site_url: str):
+        """Sets the site_url of this AnalysisJob.
+
+
+        :param site_url: The site_url of this AnalysisJob.
+        :type site_url: str
+        """
+
+        self._site_url = site_url
+
+    @property
+    def status(self) -> str:
+        """Gets the status of this AnalysisJob.
+
+
+        :return: The status of this AnalysisJob.
+        :rtype: str
+        """
+        return self._status
+
+    @status.setter
+    def status(self, status: str):
+        """Sets the status of this AnalysisJob.
+
+
+        :param status: The status of this AnalysisJob.
+        :type status: str
+        """
+        allowed_values = ["queued", "processing", "completed", "failed"]  # noqa: E501
+        if status not in allowed_values:
+            raise ValueError(
+                "Invalid value for `status` ({0}), must be one of {1}"
+                .format(status, allowed_values)
+            )
+
+        self._status = status
+
+    @property
+    def created_date_time(self) -> datetime:
+        """Gets the created_date_time of this AnalysisJob.
+
+
+        :return: The created_date_time of this AnalysisJob.
+        :rtype: datetime
+        """
+        return self._created_date_time
+
+    @created_date_time.setter
+    def created_date_time(self, created_date_time: datetime):
+        """Sets the created_date_time of this AnalysisJob.
+
+
+        :param created_date_time: The created_date_time of this AnalysisJob.
+        :type created_date_time: datetime
+        """
+
+        self._created_date_time = created_date_time
+
+    @property
+    def result(self) -> SiteAnalysisResult:
+        """Gets the result of this AnalysisJob.
+
+        Site Analysis Result once the job completed  # noqa: E501
+
+        :return: The result of this AnalysisJob.
+        :rtype: SiteAnalysisResult
+        """
+        return self._result
+
+    @result.setter
+    def result(self, result: SiteAnalysisResult):
+        """Sets the result of this AnalysisJob.
+
+        Site Analysis Result once the job completed  # noqa: E501
+
+        :param result: The result of this AnalysisJob.
+        :type result: SiteAnalysisResult
+        """
+
+        self._result = result
+
+    @property
+    def error(self) -> str:
+        """Gets the error of this AnalysisJob.
+
+        error message once the job failed  # noqa: E501
+
+        :return: The error of this AnalysisJob.
+        :rtype: str
+        """
+        return self._error
+
+    @error.setter
+    def error(self, error: str):
+        """Sets the error of this AnalysisJob.
+
+        error message once the job failed  # noqa: E501
+
+        :param error: The error of this AnalysisJob.
+        :type error: str
+        """
+
+        self._error = error
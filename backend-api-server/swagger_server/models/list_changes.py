@@ -0,0 +1,150 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+from datetime import date, datetime  # noqa: F401
+
+from typing import List, Dict  # noqa: F401
+
+from swagger_server.models.base_model_ import Model
+from swagger_server import util
+
+
+class ListChanges(Model):
+    """NOTE: This class is auto generated by the swagger code generator program.
+
+    Do not edit the class manually.
+    """
+    def __init__(self, version: int=None, has_more: bool=None, upserted: List[object]=None, deleted: List[int]=None):  # noqa: E501
+        """ListChanges - a model defined in Swagger
+
+        :param version: The version of this ListChanges.  # noqa: E501
+        :type version: int
+        :param has_more: The has_more of this ListChanges.  # noqa: E501
+        :type has_more: bool
+        :param upserted: The upserted of this ListChanges.  # noqa: E501
+        :type upserted: List[object]
+        :param deleted: The deleted of this ListChanges.  # noqa: E501
+        :type deleted: List[int]
+        """
+        self.swagger_types = {
+            'version': int,
+            'has_more': bool,
+            'upserted': List[object],
+            'deleted': List[int]
+        }
+
+        self.attribute_map = {
+            'version': 'version',
+            'has_more': 'has_more',
+            'upserted': 'upserted',
+            'deleted': 'deleted'
+        }
+        self._version = version
+        self._has_more = has_more
+        self._upserted = upserted
+        self._deleted = deleted
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'ListChanges':
+        """Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The List-Changes of this ListChanges.  # noqa: E501
+        :rtype: ListChanges
+        """
+        return util.deserialize_model(dikt, cls)
+
+    @property
+    def version(self) -> int:
+        """Gets the version of this ListChanges.
+
+        list version the client is at after applying the changes - pass it as since parameter of the next request  # noqa: E501
+
+        :return: The version of this ListChanges.
+        :rtype: int
+        """
+        return self._version
+
+    @version.setter
+    def version(self, version: int):
+        """Sets the version of this ListChanges.
+
+        list version the client is at after applying the changes - pass it as since parameter of the next request  # noqa: E501
+
+        :param version: The version of this ListChanges.
+        :type version: int
+        """
+        if version is None:
+            raise ValueError("Invalid value for `version`, must not be `None`")  # noqa: E501
+
+        self._version = version
+
+    @property
+    def has_more(self) -> bool:
+        """Gets the has_more of this ListChanges.
+
+        further changes are available - request again with the returned version  # noqa: E501
+
+        :return: The has_more of this ListChanges.
+        :rtype: bool
+        """
+        return self._has_more
+
+    @has_more.setter
+    def has_more(self, has_more: bool):
+        """Sets the has_more of this ListChanges.
+
+        further changes are available - request again with the returned version  # noqa: E501
+
+        :param has_more: The has_more of this ListChanges.
+        :type has_more: bool
+        """
+
+        self._has_more = has_more
+
+    @property
+    def upserted(self) -> List[object]:
+        """Gets the upserted of this ListChanges.
+
+        list entries that were added or changed - replaces the client's entry with the same site_id  # noqa: E501
+
+        :return: The upserted of this ListChanges.
+        :rtype: List[object]
+        """
+        return self._upserted
+
+    @upserted.setter
+    def upserted(self, upserted: List[object]):
+        """Sets the upserted of this ListChanges.
+
+        list entries that were added or changed - replaces the client's entry with the same site_id  # noqa: E501
+
+        :param upserted: The upserted of this ListChanges.
+        :type upserted: List[object]
+        """
+
+        self._upserted = upserted
+
+    @property
+    def deleted(self) -> List[int]:
+        """Gets the deleted of this ListChanges.
+
+        site_ids that were removed from the list  # noqa: E501
+
+        :return: The deleted of this ListChanges.
+        :rtype: List[int]
+        """
+        return self._deleted
+
+    @deleted.setter
+    def deleted(self, deleted: List[int]):
+        """Sets the deleted of this ListChanges.
+
+        site_ids that were removed from the list  # noqa: E501
+
+        :param deleted: The deleted of this ListChanges.
+        :type deleted: List[int]
+        """
+
+        self._deleted = deleted
@@ -14,7 +14,7 @@ class SiteAnalysisResult(Model):
 
     Do not edit the class manually.
     """
-    def __init__(self, site_id: str=None, site_url: str=None, analyzed_date_time: datetime=None, processor: str=None, risk_score: str=None):  # noqa: E501
+    def __init__(self, site_id: str=None, site_url: str=None, analyzed_date_time: datetime=None, processor: str=None, risk_score: str=None, error: str=None):  # noqa: E501
         """SiteAnalysisResult - a model defined in Swagger
 
         :param site_id: The site_id of this SiteAnalysisResult.  # noqa: E501
@@ -27,13 +27,16 @@ class SiteAnalysisResult(Model):
         :type processor: str
         :param risk_score: The risk_score of this SiteAnalysisResult.  # noqa: E501
         :type risk_score: str
+        :param error: The error of this SiteAnalysisResult.  # noqa: E501
+        :type error: str
         """
         self.swagger_types = {
             'site_id': str,
             'site_url': str,
             'analyzed_date_time': datetime,
             'processor': str,
-            'risk_score': str
+            'risk_score': str,
+            'error': str
         }
 
         self.attribute_map = {
@@ -41,13 +44,15 @@ class SiteAnalysisResult(Model):
             'site_url': 'site_url',
             'analyzed_date_time': 'analyzed_date_time',
             'processor': 'processor',
-            'risk_score': 'risk_score'
+            'risk_score': 'risk_score',
+            'error': 'error'
         }
         self._site_id = site_id
         self._site_url = site_url
         self._analyzed_date_time = analyzed_date_time
         self._processor = processor
         self._risk_score = risk_score
+        self._error = error
 
     @classmethod
     def from_dict(cls, dikt) -> 'SiteAnalysisResult':
@@ -176,3 +181,26 @@ class SiteAnalysisResult(Model):
             )
 
         self._risk_score = risk_score
+
+    @property
+    def error(self) -> str:
+        """Gets the error of this SiteAnalysisResult.
+
+        error message if the site could not be analyzed (batch analysis only) - no processor and risk_score unknown  # noqa: E501
+
+        :return: The error of this SiteAnalysisResult.
+        :rtype: str
+        """
+        return self._error
+
+    @error.setter
+    def error(self, error: str):
+        """Sets the error of this SiteAnalysisResult.
+
+        error message if the site could not be analyzed (batch analysis only) - no processor and risk_score unknown  # noqa: E501
+
+        :param error: The error of this SiteAnalysisResult.
+        :type error: str
+        """
+
+        self._error = error
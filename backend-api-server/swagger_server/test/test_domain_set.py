@@ -0,0 +1,52 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import struct
+import unittest
+
+import swagger_server.mal2.export.domain_set as domain_set
+
+
+class TestDomainSet(unittest.TestCase):
+    """binary domain set format tests"""
+
+    sections = {
+        'blacklist': ['fakeshop.com', 'fake-brand.at'],
+        'whitelist': ['google.at', 'google.at'],
+        'ignorelist': []
+    }
+
+    def test_pack_unpack(self):
+        """a packed domain set round-trips with sorted unique hashes per list"""
+        parsed = domain_set.unpack(domain_set.pack(self.sections, created=1600000000))
+        self.assertEqual(parsed.format_version, domain_set.format_version)
+        self.assertEqual(parsed.created, 1600000000)
+        self.assertEqual(list(parsed.sections.keys()), ['blacklist', 'whitelist', 'ignorelist'])
+        self.assertEqual(list(parsed.sections['blacklist']), sorted(domain_set.hash_domain(url) for url in self.sections['blacklist']))
+        self.assertEqual(list(parsed.sections['whitelist']), [domain_set.hash_domain('google.at')])
+        self.assertEqual(len(parsed.sections['ignorelist']), 0)
+
+    def test_lookup(self):
+        """sites are classified by the list containing them"""
+        parsed = domain_set.unpack(domain_set.pack(self.sections))
+        self.assertEqual(domain_set.lookup(parsed, 'fakeshop.com'), 'blacklist')
+        self.assertEqual(domain_set.lookup(parsed, 'fake-brand.at'), 'blacklist')
+        self.assertEqual(domain_set.lookup(parsed, 'google.at'), 'whitelist')
+        self.assertIsNone(domain_set.lookup(parsed, 'unknown.at'))
+
+    def test_unpack_invalid(self):
+        """truncated, foreign or unsupported data is rejected"""
+        data = domain_set.pack(self.sections)
+        with self.assertRaises(ValueError):
+            domain_set.unpack(data[:10])
+        with self.assertRaises(ValueError):
+            domain_set.unpack(data[:-1])
+        with self.assertRaises(ValueError):
+            domain_set.unpack(b'NOTADSET' + data[8:])
+        with self.assertRaises(ValueError):
+            domain_set.unpack(data[:8] + struct.pack('>H', domain_set.format_version + 1) + data[10:])
+
+
+if __name__ == '__main__':
+    unittest.main()
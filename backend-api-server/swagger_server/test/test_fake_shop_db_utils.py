@@ -0,0 +1,50 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import unittest
+
+import swagger_server.mal2.sources.fakeshopdb.fake_shop_db_utils as fake_shop_db_utils
+
+#module private helpers - name mangling prevents accessing them as attributes within the test class
+get_following_page_url = getattr(fake_shop_db_utils, "__get_following_page_url")
+is_same_page = getattr(fake_shop_db_utils, "__is_same_page")
+
+
+class TestFakeShopDbUtils(unittest.TestCase):
+    """fake-shop db paginator url helper tests"""
+
+    def test_get_following_page_url_page(self):
+        """the page parameter is incremented, other parameters are kept"""
+        url = get_following_page_url("https://db.malzwei.at/api/v1/website/fake_shop/?ordering=-created_at&page=2")
+        self.assertTrue(is_same_page(url, "https://db.malzwei.at/api/v1/website/fake_shop/?ordering=-created_at&page=3"))
+
+    def test_get_following_page_url_offset(self):
+        """the offset is moved by limit"""
+        url = get_following_page_url("https://db.malzwei.at/api/v1/website/fake_shop/?limit=100&offset=200")
+        self.assertTrue(is_same_page(url, "https://db.malzwei.at/api/v1/website/fake_shop/?limit=100&offset=300"))
+
+    def test_get_following_page_url_unpredictable(self):
+        """cursors, offsets without limit and non numeric pages can't be predicted"""
+        self.assertIsNone(get_following_page_url("https://db.malzwei.at/api/v1/website/fake_shop/?cursor=cD0yMDIw"))
+        self.assertIsNone(get_following_page_url("https://db.malzwei.at/api/v1/website/fake_shop/?offset=200"))
+        self.assertIsNone(get_following_page_url("https://db.malzwei.at/api/v1/website/fake_shop/?page=last"))
+        self.assertIsNone(get_following_page_url("https://db.malzwei.at/api/v1/website/fake_shop/"))
+
+    def test_is_same_page(self):
+        """scheme, host and parameter order are ignored"""
+        self.assertTrue(is_same_page(
+            "https://db.malzwei.at/api/v1/website/fake_shop/?ordering=-created_at&page=3",
+            "http://internal:8000/api/v1/website/fake_shop/?page=3&ordering=-created_at"))
+
+    def test_is_not_same_page(self):
+        """differing pages, paths or a missing next link don't match"""
+        url = "https://db.malzwei.at/api/v1/website/fake_shop/?ordering=-created_at&page=3"
+        self.assertFalse(is_same_page(url, "https://db.malzwei.at/api/v1/website/fake_shop/?ordering=-created_at&page=4"))
+        self.assertFalse(is_same_page(url, "https://db.malzwei.at/api/v1/website/brand_counterfeiter/?ordering=-created_at&page=3"))
+        self.assertFalse(is_same_page(url, "https://db.malzwei.at/api/v1/website/fake_shop/?page=3"))
+        self.assertFalse(is_same_page(url, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
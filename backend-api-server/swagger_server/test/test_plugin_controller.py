@@ -4,7 +4,9 @@ from __future__ import absolute_import
 
 from flask import json
 from six import BytesIO
+from unittest import mock
 
+from swagger_server.models.analysis_job import AnalysisJob  # noqa: E501
 from swagger_server.models.black_list_entry import BlackListEntry  # noqa: E501
 from swagger_server.models.grey_list_entry import GreyListEntry  # noqa: E501
 from swagger_server.models.ignore_list_entry import IgnoreListEntry  # noqa: E501
@@ -12,6 +14,8 @@ from swagger_server.models.inline_response400 import InlineResponse400  # noqa:
 from swagger_server.models.site import Site  # noqa: E501
 from swagger_server.models.site_analysis_result import SiteAnalysisResult  # noqa: E501
 from swagger_server.models.white_list_entry import WhiteListEntry  # noqa: E501
+import swagger_server.mal2.db.handler.db_handler as db_handler
+import swagger_server.mal2.export.domain_set as domain_set
 from swagger_server.test import BaseTestCase
 
 
@@ -32,6 +36,104 @@ class TestPluginController(BaseTestCase):
         self.assert200(response,
                        'Response body is : ' + response.data.decode('utf-8'))
 
+    def test_analyze_batch_post(self):
+        """Test case for analyze_batch_post
+
+        request Fake-Score analysis results of multiple sites
+        """
+        body = [Site(site_base_url='https://www.google.at', client_id='client_id_example'),
+                Site(site_base_url='http://fakeshop-example.at', client_id='client_id_example'),
+                Site(site_base_url='http://google.at/impressum', client_id='client_id_example')]
+        response = self.client.open(
+            '/malzwei/ecommerce/1.1/analyze/batch',
+            method='POST',
+            data=json.dumps(body),
+            content_type='application/json')
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+        #one result per normalized url in request order
+        results = response.json
+        self.assertEqual([result['site_url'] for result in results], ['google.at', 'fakeshop-example.at'])
+        for result in results:
+            self.assertIn(result['risk_score'], ['very low', 'low', 'below average', 'above average', 'high', 'very high', 'unknown'])
+            #either a verdict or the reason there's none
+            self.assertTrue(result.get('processor') or result.get('error'))
+            if result.get('error'):
+                self.assertEqual(result['risk_score'], 'unknown')
+                self.assertIsNone(result.get('processor'))
+
+    def test_analyze_job_id_get(self):
+        """Test case for analyze_job_id_get
+
+        returns the status and result of an asynchronous analysis job
+        """
+        job_db = db_handler.create_or_get_analysisjob_db_entry('analysis-job-example.at', 'client_id_example')
+        job_id = job_db.job_id
+        db_handler.Session.remove()
+        query_string = [('client_id', 'client_id_example')]
+        response = self.client.open(
+            '/malzwei/ecommerce/1.1/analyze/{job_id}'.format(job_id=job_id),
+            method='GET',
+            query_string=query_string)
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+        self.assertEqual(response.json['job_id'], job_id)
+
+    def test_analyze_job_id_get_unknown(self):
+        """Test case for analyze_job_id_get of a job id that was never enqueued
+
+        returns 404
+        """
+        query_string = [('wait', 1),
+                        ('client_id', 'client_id_example')]
+        response = self.client.open(
+            '/malzwei/ecommerce/1.1/analyze/{job_id}'.format(job_id='job_id_example'),
+            method='GET',
+            query_string=query_string)
+        self.assert404(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
+    def test_list_changes_get(self):
+        """Test case for blacklist_changes_get, greylist_changes_get, ignorelist_changes_get and whitelist_changes_get
+
+        returns the list changes since the X-List-Version of the full list - paged in version order, 410 for an unknown version
+        """
+        for list_name in ['blacklist', 'greylist', 'ignorelist', 'whitelist']:
+            with self.subTest(list_name=list_name):
+                response = self.client.open(
+                    '/malzwei/ecommerce/1.1/{list_name}'.format(list_name=list_name),
+                    method='GET',
+                    query_string=[('all', True), ('client_id', 'client_id_example')])
+                self.assert200(response)
+                version = int(response.headers['X-List-Version'])
+                min_version, _ = db_handler.get_list_change_range(list_name)
+
+                #page through the logged changes one site at a time - each page continues at the previous page's version
+                since = min_version
+                has_more = True
+                while has_more:
+                    response = self.client.open(
+                        '/malzwei/ecommerce/1.1/{list_name}/changes'.format(list_name=list_name),
+                        method='GET',
+                        query_string=[('since', since), ('limit', 1), ('client_id', 'client_id_example')])
+                    self.assert200(response,
+                                   'Response body is : ' + response.data.decode('utf-8'))
+                    changes = response.json
+                    self.assertLessEqual(len(changes['upserted']) + len(changes['deleted']), 1)
+                    self.assertLessEqual(changes['version'], version)
+                    if changes['has_more']:
+                        self.assertGreater(changes['version'], since)
+                    else:
+                        self.assertEqual(changes['version'], version)
+                    since = changes['version']
+                    has_more = changes['has_more']
+
+                response = self.client.open(
+                    '/malzwei/ecommerce/1.1/{list_name}/changes'.format(list_name=list_name),
+                    method='GET',
+                    query_string=[('since', version + 1), ('client_id', 'client_id_example')])
+                self.assertStatus(response, 410)
+
     def test_blacklist_get(self):
         """Test case for blacklist_get
 
@@ -61,6 +163,37 @@ class TestPluginController(BaseTestCase):
         self.assert200(response,
                        'Response body is : ' + response.data.decode('utf-8'))
 
+    def test_domainset_get(self):
+        """Test case for domainset_get
+
+        returns the compact domain set of all listed sites
+        """
+        domain_set.render({'blacklist': ['fakeshop.com'], 'whitelist': ['google.at']})
+        query_string = [('client_id', 'client_id_example')]
+        response = self.client.open(
+            '/malzwei/ecommerce/1.1/domainset',
+            method='GET',
+            query_string=query_string)
+        #binary body - not decoded into the failure message
+        self.assert200(response)
+        self.assertEqual(response.mimetype, domain_set.mimetype)
+        parsed = domain_set.unpack(response.data)
+        self.assertEqual(domain_set.lookup(parsed, 'fakeshop.com'), 'blacklist')
+        self.assertEqual(domain_set.lookup(parsed, 'google.at'), 'whitelist')
+        self.assertIsNone(domain_set.lookup(parsed, 'unknown.at'))
+
+    def test_domainset_get_unavailable(self):
+        """Test case for domainset_get before the domain set was rendered
+
+        returns 503 with Retry-After
+        """
+        with mock.patch.object(domain_set, 'get', return_value=None):
+            response = self.client.open(
+                '/malzwei/ecommerce/1.1/domainset',
+                method='GET')
+        self.assertStatus(response, 503)
+        self.assertEqual(response.headers.get('Retry-After'), str(domain_set.unavailable_retry_after))
+
     def test_greylist_get(self):
         """Test case for greylist_get
 
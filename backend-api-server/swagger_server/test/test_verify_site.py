@@ -0,0 +1,136 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+import swagger_server.mal2.verify.model_registry as model_registry
+import swagger_server.mal2.verify.verify_site as verify_site
+
+
+class Booster:
+    """xgboost model - scored on a DMatrix"""
+    def __init__(self, prediction):
+        self.prediction = prediction
+        self.scored = []
+
+    def predict(self, matrix):
+        self.scored.append(matrix)
+        return [self.prediction]
+
+
+class Classifier:
+    """sklearn model - scored on the site vector"""
+    def __init__(self, prediction):
+        self.prediction = prediction
+        self.scored = []
+
+    def predict_proba(self, site_vector):
+        self.scored.append(site_vector)
+        return [[1 - self.prediction, self.prediction]]
+
+
+class TestVerifySite(unittest.TestCase):
+    """ensemble prediction tests against a fake mal2-model verify module"""
+
+    site = 'fakeshop-example.at'
+
+    def setUp(self):
+        #the site is scraped to data/verify_sites relative to the working directory
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        self.spiders = []
+        self.added_sites = []
+        self.vectorized = []
+        self.models = {'xgboost': Booster(0.9), 'random_forest': Classifier(0.75), 'neural_net': Classifier(0.5)}
+
+        def run_scrapy_spider(spider, input, output):
+            self.spiders.append(spider)
+            os.makedirs(os.path.join(output, input, 'cssjs'), exist_ok=True)
+            with open(os.path.join(output, input, 'index.html'), 'w') as f:
+                f.write('<html></html>')
+
+        class AggregateShops:
+            def __init__(shops, do_whois):
+                pass
+
+            def add_site(shops, path, status_id):
+                self.added_sites.append(path)
+                return pd.DataFrame({'html': ['<html></html>']})
+
+        class ProcessDataframes:
+            def vectorize(processor, df_site, vectorizers):
+                self.vectorized.append(list(df_site.columns))
+                return 'site-vector'
+
+        verify = types.SimpleNamespace(
+            spider=types.SimpleNamespace(HtmlSpider='HtmlSpider', CssSpider='CssSpider'),
+            run_scrapy_spider=run_scrapy_spider,
+            AggregateShops=AggregateShops,
+            ProcessDataframes=ProcessDataframes,
+            xgb=types.SimpleNamespace(DMatrix=lambda site_vector: ('dmatrix', site_vector))
+        )
+        snapshot = model_registry.LoadedModels(self.models, {'html': None, 'whois': None}, verify_site.mirrored_model_version, {})
+        self.patches = [
+            mock.patch.object(verify_site, 'mal2_model_verify', verify),
+            mock.patch.object(model_registry, 'get_snapshot', return_value=snapshot)
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def test_get_ensemble_prediction(self):
+        """the site is scraped and vectorized once and scored by all models"""
+        predictions = verify_site.get_ensemble_prediction(self.site, ['xgboost', 'random_forest', 'neural_net'])
+        self.assertEqual(self.spiders, ['HtmlSpider', 'CssSpider'])
+        self.assertEqual(self.added_sites, ['data/verify_sites/'+self.site+'/'])
+        self.assertEqual(self.vectorized, [['html', 'whois']])
+        self.assertEqual(self.models['xgboost'].scored, [('dmatrix', 'site-vector')])
+        self.assertEqual(self.models['random_forest'].scored, ['site-vector'])
+        self.assertEqual(self.models['neural_net'].scored, ['site-vector'])
+        self.assertEqual(sorted(predictions.keys()), ['neural_net', 'random_forest', 'xgboost'])
+        dirhash = predictions['xgboost'][1]
+        self.assertEqual(predictions['xgboost'], (0.9, dirhash, 'xgboost', verify_site.mirrored_model_version))
+        self.assertEqual(predictions['random_forest'], (0.75, dirhash, 'random_forest', verify_site.mirrored_model_version))
+        self.assertEqual(predictions['neural_net'], (0.5, dirhash, 'neural_net', verify_site.mirrored_model_version))
+        #the scraped site is removed unless kept
+        self.assertFalse(os.path.exists(os.path.join('data', 'verify_sites', self.site)))
+
+    def test_get_model_prediction(self):
+        """a single model prediction is the model's entry of the ensemble"""
+        prediction = verify_site.get_model_prediction(self.site, 'random_forest')
+        self.assertEqual(prediction[0], 0.75)
+        self.assertEqual(prediction[2:], ('random_forest', verify_site.mirrored_model_version))
+        self.assertEqual(self.models['xgboost'].scored, [])
+
+    def test_get_ensemble_prediction_invalid_models(self):
+        """no or unknown models are rejected before scraping"""
+        with self.assertRaises(ValueError):
+            verify_site.get_ensemble_prediction(self.site, [])
+        with self.assertRaises(ValueError):
+            verify_site.get_ensemble_prediction(self.site, ['xgboost', 'unknown'])
+        self.assertEqual(self.spiders, [])
+
+    def test_get_ensemble_prediction_unsupported_version(self):
+        """a mal2-model version the prediction doesn't mirror fails without scraping"""
+        model_registry.get_snapshot.return_value = model_registry.LoadedModels(self.models, {}, '0.0', {})
+        with self.assertRaises(Exception):
+            verify_site.get_ensemble_prediction(self.site, ['xgboost'])
+        self.assertEqual(self.spiders, [])
+
+
+if __name__ == '__main__':
+    unittest.main()